@@ -12,6 +12,7 @@ from .compiler import compile_dict
 from .compiler import compile_string
 from .compiler import compile_files
 from .compiler import pre_process_dict
+from .compiler import load
 from .parser import parse_string
 from .parser import parse_files
 from .parser import ParseError
@@ -59,6 +60,15 @@ def print_dict(dict_, indent=0):
             print('{}{}: {}'.format(indent * ' ', key, value))
 
 
+def _do_compile(args):
+    specification = compile_files(args.specification,
+                                  args.codec,
+                                  profile=args.profile)
+
+    if args.profile:
+        print(specification.profile)
+
+
 def _do_decode(args):
     specification = compile_files(args.specification, args.codec)
     encoded = binascii.unhexlify(args.hexstring)
@@ -86,6 +96,25 @@ def _main():
                                        dest='subcommand')
     subparsers.required = True
 
+    # The 'compile' subparser.
+    compile_parser = subparsers.add_parser(
+        'compile',
+        description='Compile given specification.')
+    compile_parser.add_argument('-c', '--codec',
+                                choices=('ber', 'der', 'jer', 'per', 'uper', 'xer'),
+                                default='ber',
+                                help='Codec (default: ber).')
+    compile_parser.add_argument('--profile',
+                                action='store_true',
+                                help=('Print the time spent in each phase of '
+                                      'parsing and compiling the '
+                                      'specification, and statistics of the '
+                                      'compiled types.'))
+    compile_parser.add_argument('specification',
+                                nargs='+',
+                                help='ASN.1 specification as one or more .asn files.')
+    compile_parser.set_defaults(func=_do_compile)
+
     # The 'decode' subparser.
     decode_parser = subparsers.add_parser(
         'decode',
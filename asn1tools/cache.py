@@ -0,0 +1,172 @@
+"""Persistent on-disk cache of parsed and compiled ASN.1 specifications.
+
+Entries are stored as pickle files named after a hash of the
+specification files contents, the asn1tools and Python versions, the
+parser backend and its version, and any other input affecting the
+result. A changed input
+gives a new key, so stale entries are never used, but eventually
+evicted when the cache directory grows too big.
+
+"""
+
+import os
+import sys
+import hashlib
+import pickle
+import tempfile
+import logging
+
+
+LOGGER = logging.getLogger(__name__)
+
+# Maximum total size in bytes of all entries in a cache directory. The
+# least recently used entries are removed when exceeded.
+CACHE_SIZE_MAX = 256 * 1024 * 1024
+
+SUFFIX = '.pickle'
+
+
+def make_key(kind, filenames, backend, *args):
+    """Returns a key for given kind of cache entry, specification files,
+    parser backend and additional arguments `args`. pyparsing is only
+    imported, for its version, if `backend` is ``'pyparsing'``.
+
+    """
+
+    from . import __version__
+
+    hasher = hashlib.sha256()
+    header = [
+        kind,
+        __version__,
+        sys.version_info[:2],
+        backend
+    ]
+
+    if backend == 'pyparsing':
+        import pyparsing
+
+        header.append(pyparsing.__version__)
+
+    for item in header + list(args):
+        hasher.update(repr(item).encode('utf-8'))
+        hasher.update(b'\x00')
+
+    for filename in filenames:
+        with open(filename, 'rb') as fin:
+            data = fin.read()
+
+        hasher.update(str(len(data)).encode('ascii'))
+        hasher.update(b'\x00')
+        hasher.update(data)
+
+    return kind + '-' + hasher.hexdigest()
+
+
+def load(cache_dir, key):
+    """Returns the object stored as given key in given cache directory, or
+    ``None`` if missing or unreadable.
+
+    """
+
+    path = os.path.join(cache_dir, key + SUFFIX)
+
+    try:
+        with open(path, 'rb') as fin:
+            value = pickle.load(fin)
+    except (IOError, OSError):
+        return None
+    except Exception as e:
+        LOGGER.warning("Removing unreadable cache entry '%s': %s", path, e)
+        _remove(path)
+
+        return None
+
+    # Mark the entry as recently used.
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+    LOGGER.debug("Loaded cache entry '%s'.", path)
+
+    return value
+
+
+def store(cache_dir, key, value):
+    """Store given object as given key in given cache directory. The entry
+    is first written to a temporary file and then renamed, so
+    concurrent readers and writers never see a partially written
+    entry.
+
+    """
+
+    try:
+        encoded = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, RuntimeError, TypeError) as e:
+        LOGGER.warning("Unable to cache '%s': %s", key, e)
+        return
+
+    if not os.path.isdir(cache_dir):
+        try:
+            os.makedirs(cache_dir)
+        except OSError:
+            if not os.path.isdir(cache_dir):
+                raise
+
+    path = os.path.join(cache_dir, key + SUFFIX)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+
+    try:
+        with os.fdopen(fd, 'wb') as fout:
+            fout.write(encoded)
+
+        os.rename(tmp_path, path)
+    except OSError:
+        # Most likely a concurrent writer already renamed an identical
+        # entry into place on a platform that does not allow replacing
+        # files.
+        _remove(tmp_path)
+
+    LOGGER.debug("Stored cache entry '%s'.", path)
+
+    evict(cache_dir, CACHE_SIZE_MAX)
+
+
+def evict(cache_dir, size_max):
+    """Remove least recently used entries from given cache directory until
+    their total size is at most `size_max` bytes.
+
+    """
+
+    entries = []
+
+    for name in os.listdir(cache_dir):
+        if not name.endswith(SUFFIX):
+            continue
+
+        path = os.path.join(cache_dir, name)
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    size = sum([entry[1] for entry in entries])
+
+    for _, entry_size, path in sorted(entries):
+        if size <= size_max:
+            break
+
+        LOGGER.debug("Evicting cache entry '%s'.", path)
+        _remove(path)
+        size -= entry_size
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -1,5 +1,13 @@
+import sys
 import binascii
 
+try:
+    from collections.abc import MutableMapping
+    from collections.abc import MutableSequence
+except ImportError:
+    from collections import MutableMapping
+    from collections import MutableSequence
+
 
 class EncodeError(Exception):
     """General ASN.1 encode error.
@@ -36,3 +44,322 @@ class DecodeTagError(DecodeError):
             binascii.hexlify(actual_tag).decode('ascii'),
             offset)
         super(DecodeTagError, self).__init__(message)
+
+
+def as_memoryview(data):
+    """Returns given bytes, bytearray, memoryview or mmap object as a
+    memoryview of bytes, without copying it. On Python 2, where
+    indexing a memoryview does not give integers, a bytearray copy
+    of it is returned instead.
+
+    """
+
+    if sys.version_info[0] < 3:
+        return bytearray(data)
+
+    data = memoryview(data)
+
+    if data.format != 'B':
+        data = data.cast('B')
+
+    return data
+
+
+def create_path_tree(paths):
+    """Returns given list of dot separated member paths, for example
+    ``['a.b', 'a.c', 'd']``, as a tree of dictionaries, for example
+    ``{'a': {'b': None, 'c': None}, 'd': None}``. ``None`` means the
+    whole value.
+
+    """
+
+    tree = {}
+
+    for path in paths:
+        node = tree
+        names = path.split('.')
+
+        for name in names[:-1]:
+            if name in node and node[name] is None:
+                node = None
+                break
+
+            node = node.setdefault(name, {})
+
+        if node is not None:
+            node[names[-1]] = None
+
+    return tree
+
+
+class Undecoded(object):
+    """A value at given offset in the data of a lazily decoded value,
+    decoded by calling ``decode(data, offset)`` when first accessed.
+    `name` is the member name of the value, or None for an element of
+    a SEQUENCE OF or SET OF.
+
+    """
+
+    __slots__ = ['decode', 'offset', 'name']
+
+    def __init__(self, decode, offset, name=None):
+        self.decode = decode
+        self.offset = offset
+        self.name = name
+
+
+def decode_undecoded(data, value, location):
+    """Returns given undecoded value decoded from given data. The member
+    name of the value and given location, the member names of the
+    lazily decoded value containing it, are added to the location of
+    decode errors, as when decoding all at once.
+
+    """
+
+    if value.name is not None:
+        location = [value.name] + location
+
+    try:
+        decoded = value.decode(data, value.offset)[0]
+    except IndexError:
+        e = DecodeError('out of data at offset {}'.format(value.offset))
+        e.location.extend(location)
+        raise e
+    except DecodeError as e:
+        e.location.extend(location)
+        raise
+
+    # The value of a CHOICE is in a dictionary with one item.
+    lazy = decoded
+
+    while isinstance(lazy, dict) and len(lazy) == 1:
+        lazy = next(iter(lazy.values()))
+
+    if isinstance(lazy, (LazyDict, LazyList)):
+        lazy._location = location
+
+    return decoded
+
+
+class LazyDict(MutableMapping):
+    """A lazily decoded SEQUENCE or SET. Behaves like a dictionary, but
+    members are decoded when first accessed.
+
+    """
+
+    def __init__(self, data, items):
+        self._data = data
+        self._items = items
+        self._location = []
+
+    def __getitem__(self, key):
+        value = self._items[key]
+
+        if isinstance(value, Undecoded):
+            value = decode_undecoded(self._data, value, self._location)
+            self._items[key] = value
+
+        return value
+
+    def __setitem__(self, key, value):
+        self._items[key] = value
+
+    def __delitem__(self, key):
+        del self._items[key]
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class LazyList(MutableSequence):
+    """A lazily decoded SEQUENCE OF or SET OF. Behaves like a list, but
+    elements are decoded when first accessed.
+
+    """
+
+    def __init__(self, data, items):
+        self._data = data
+        self._items = items
+        self._location = []
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        value = self._items[index]
+
+        if isinstance(value, Undecoded):
+            value = decode_undecoded(self._data, value, self._location)
+            self._items[index] = value
+
+        return value
+
+    def __setitem__(self, index, value):
+        self._items[index] = value
+
+    def __delitem__(self, index):
+        del self._items[index]
+
+    def __len__(self):
+        return len(self._items)
+
+    def insert(self, index, value):
+        self._items.insert(index, value)
+
+    def __eq__(self, other):
+        if isinstance(other, (list, LazyList)):
+            return list(self) == list(other)
+
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+
+        if equal is NotImplemented:
+            return equal
+
+        return not equal
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+# Number of bytes read at a time by StreamDecoder.read().
+STREAM_READ_SIZE = 65536
+
+
+class StreamDecoder(object):
+    """Decodes values from data given to :meth:`.feed()` in chunks of any
+    size, for example as received from a socket. Iterate over the
+    decoder to get the values completely fed so far.
+
+    Data is only copied once when fed, and the tag and length of each
+    value are only decoded once.
+
+    If `offsets` is ``True``, the iterator gives the offset of each
+    value in the stream and the value as a tuple.
+
+    """
+
+    def __init__(self, decode, decode_end, offsets=False):
+        self._decode = decode
+        self._decode_end = decode_end
+        self._offsets = offsets
+        self._buffer = bytearray()
+        self._position = 0
+        self._offset = 0
+        self._end = None
+
+    def feed(self, data):
+        """Add given bytes object `data` to the stream.
+
+        """
+
+        # Remove decoded values from the buffer.
+        if self._offset > 0:
+            del self._buffer[:self._offset]
+            self._position += self._offset
+
+            if self._end is not None:
+                self._end -= self._offset
+
+            self._offset = 0
+
+        self._buffer.extend(data)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._end is None:
+            self._end = self._decode_end(self._buffer, self._offset)
+
+            if self._end is None:
+                raise StopIteration()
+
+        if len(self._buffer) < self._end:
+            raise StopIteration()
+
+        offset = self._offset
+        end = self._end
+        self._offset = end
+        self._end = None
+        value, value_end = self._decode(self._buffer, offset)
+
+        if value_end > end:
+            raise DecodeError(
+                'expected value at offset {} to end at offset {} but it '
+                'ended at offset {}'.format(self._position + offset,
+                                            self._position + end,
+                                            self._position + value_end))
+
+        if self._offsets:
+            return self._position + offset, value
+        else:
+            return value
+
+    next = __next__
+
+    def read(self, stream):
+        """Feed data read from given file-like object `stream` until its
+        end, and yield the decoded values. Raises a
+        :class:`~asn1tools.DecodeError` if the stream ends within a
+        value.
+
+        """
+
+        while True:
+            data = stream.read(STREAM_READ_SIZE)
+
+            if not data:
+                break
+
+            self.feed(data)
+
+            for value in self:
+                yield value
+
+        if self._offset < len(self._buffer):
+            raise DecodeError('out of data at offset {}'.format(
+                self._position + self._offset))
+
+
+def decode_many(decode, decode_end, data, offsets):
+    """Yield the values decoded by given function `decode` from given
+    data, one after the other until the end of the data.
+
+    """
+
+    offset = 0
+    size = len(data)
+
+    while offset < size:
+        end = decode_end(data, offset)
+
+        if end is None or end > size:
+            raise DecodeError('out of data at offset {}'.format(offset))
+
+        value, value_end = decode(data, offset)
+
+        if value_end > end:
+            raise DecodeError(
+                'expected value at offset {} to end at offset {} but it '
+                'ended at offset {}'.format(offset, end, value_end))
+
+        if offsets:
+            yield offset, value
+        else:
+            yield value
+
+        offset = end
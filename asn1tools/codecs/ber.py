@@ -2,9 +2,18 @@
 
 """
 
+from array import array
+
 from . import EncodeError
 from . import DecodeError
 from . import DecodeTagError
+from . import as_memoryview
+from . import create_path_tree
+from . import Undecoded
+from . import LazyDict
+from . import LazyList
+from . import StreamDecoder
+from . import decode_many
 from . import compiler
 
 
@@ -52,6 +61,14 @@ class Tag(object):
     BMP_STRING        = 0x1e
 
 
+# Signed integers of at least 64 bits, if available.
+try:
+    array('q')
+    ARRAY_TYPECODE = 'q'
+except ValueError:
+    ARRAY_TYPECODE = 'l'
+
+
 class DecodeChoiceError(Exception):
     pass
 
@@ -72,6 +89,100 @@ def encode_length_definite(length):
     return encoded
 
 
+class Encoder(object):
+    """An encoding in progress, appended to with :meth:`append()` and
+    :meth:`extend()` as a bytearray. Lengths of contents of 128 bytes
+    or more do not fit in their one byte placeholder, and are inserted
+    by :meth:`finish()` once the whole value is encoded, instead of
+    when known. Each byte is then moved once, instead of once per
+    enclosing value with such a length.
+
+    """
+
+    __slots__ = [
+        'buffer',
+        'append',
+        'extend',
+        'lengths',
+        'inserted',
+        'placeholders'
+    ]
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.append = self.buffer.append
+        self.extend = self.buffer.extend
+        # Offsets of the contents after the placeholders of lengths to
+        # insert, and the encoded lengths.
+        self.lengths = []
+        # Number of bytes added by the lengths to insert, in total and
+        # when each unset placeholder was appended.
+        self.inserted = 0
+        self.placeholders = []
+
+    def finish(self):
+        """Returns the encoding as a bytearray with all lengths inserted.
+
+        """
+
+        buffer = self.buffer
+
+        if not self.lengths:
+            return buffer
+
+        # Grow the buffer once and move the contents between the
+        # placeholders to their final offsets, last first.
+        stop = len(buffer)
+        shift = self.inserted
+        buffer.extend(bytearray(shift))
+        view = memoryview(buffer)
+        self.lengths.sort()
+
+        for offset, length in reversed(self.lengths):
+            view[offset + shift:stop + shift] = view[offset:stop]
+            shift -= len(length) - 1
+            start = offset - 1 + shift
+            view[start:start + len(length)] = length
+            stop = offset - 1
+
+        # Release the view so the buffer can be resized.
+        del view
+
+        return buffer
+
+
+def encode_length_placeholder(encoded):
+    """Append a one byte length placeholder to given encoder and return
+    the offset of the contents following it. The length is set by
+    :func:`set_length_definite()` once the contents are encoded.
+
+    """
+
+    encoded.append(0)
+    encoded.placeholders.append(encoded.inserted)
+
+    return len(encoded.buffer)
+
+
+def set_length_definite(encoded, offset):
+    """Set the length of the contents from given offset to the end of
+    given encoder, including lengths to insert within the contents. A
+    length not fitting in the placeholder byte is inserted by
+    :meth:`Encoder.finish()`.
+
+    """
+
+    inserted = encoded.inserted - encoded.placeholders.pop()
+    length = len(encoded.buffer) - offset + inserted
+
+    if length <= 127:
+        encoded.buffer[offset - 1] = length
+    else:
+        length = encode_length_definite(length)
+        encoded.lengths.append((offset, length))
+        encoded.inserted += len(length) - 1
+
+
 def decode_length_definite(encoded, offset):
     length = encoded[offset]
     offset += 1
@@ -90,6 +201,53 @@ def decode_length_definite(encoded, offset):
         return length, offset + number_of_bytes
 
 
+def decode_end(data, offset):
+    """Returns the offset after the value at given offset in given data,
+    or None if its tag and length are not yet in the data.
+
+    """
+
+    size = len(data)
+    end = offset + 1
+
+    if end > size:
+        return None
+
+    if (data[offset] & 0x1f) == 0x1f:
+        while True:
+            if end >= size:
+                return None
+
+            end += 1
+
+            if not data[end - 1] & 0x80:
+                break
+
+    if end >= size:
+        return None
+
+    length = data[end]
+    end += 1
+
+    if length == 0x80:
+        # The end of an indefinite length value is only known once
+        # all of it is in the data.
+        try:
+            return skip_tlv(data, offset)
+        except (IndexError, DecodeError):
+            return None
+    elif length > 127:
+        number_of_bytes = (length & 0x7f)
+
+        if end + number_of_bytes > size:
+            return None
+
+        length = decode_integer(data[end:end + number_of_bytes])
+        end += number_of_bytes
+
+    return end + length
+
+
 def decode_integer(data):
     value = 0
 
@@ -145,8 +303,145 @@ def decode_signed_integer(data):
     return value
 
 
-def decode_tag(_, offset):
-    return 0, 0, offset + 1
+def read_tag(data, offset):
+    """Returns the tag at given offset in given data as bytes, or an
+    empty bytes object if out of data.
+
+    """
+
+    end = offset + 1
+
+    if end <= len(data) and (data[offset] & 0x1f) == 0x1f:
+        while end < len(data) and (data[end] & 0x80):
+            end += 1
+
+        end += 1
+
+    return bytes(data[offset:end])
+
+
+def is_end_of_contents(data, offset):
+    return data[offset:offset + 2] == b'\x00\x00'
+
+
+def decode_end_of_contents(data, offset):
+    if not is_end_of_contents(data, offset):
+        raise DecodeError(
+            'expected end-of-contents at offset {}'.format(offset))
+
+    return offset + 2
+
+
+def decode_contents(data, offset):
+    """Returns the offset of the contents, the offset after the contents
+    and the offset after the value with its length at given offset in
+    given data. The contents of an indefinite length value are followed
+    by end-of-contents octets.
+
+    """
+
+    if data[offset] == 0x80:
+        offset += 1
+        end = offset
+
+        while not is_end_of_contents(data, end):
+            end = skip_tlv(data, end)
+
+        return offset, end, end + 2
+    else:
+        length, offset = decode_length_definite(data, offset)
+        end = offset + length
+
+        return offset, end, end
+
+
+def skip_tlv(data, offset):
+    """Returns the offset after the tag, length and contents at given
+    offset in given data, without decoding the contents.
+
+    """
+
+    if (data[offset] & 0x1f) == 0x1f:
+        offset += 1
+
+        while data[offset] & 0x80:
+            offset += 1
+
+    offset += 1
+
+    if data[offset] == 0x80:
+        return decode_contents(data, offset)[2]
+
+    length, offset = decode_length_definite(data, offset)
+
+    return offset + length
+
+
+def decode_segments(data, offset, tag, segments):
+    """Appends the contents of the primitive segments, with given tag, of
+    the constructed string with its length at given offset in given
+    data to given list. Segments may themselves be constructed. Returns
+    the offset after the constructed string.
+
+    """
+
+    offset, end, value_end = decode_contents(data, offset)
+
+    while offset < end:
+        if data[offset] == tag:
+            length, offset = decode_length_definite(data, offset + 1)
+            segments.append(data[offset:offset + length])
+            offset += length
+        elif data[offset] == tag | Encoding.CONSTRUCTED:
+            offset = decode_segments(data, offset + 1, tag, segments)
+        else:
+            raise DecodeError(
+                'expected segment with tag 0x{:02x} but got 0x{:02x} at '
+                'offset {}'.format(tag, data[offset], offset))
+
+    if offset != end:
+        raise DecodeError(
+            'segments end at offset {}, but the constructed string ends at '
+            'offset {}'.format(offset, end))
+
+    return value_end
+
+
+def any_defined_by_decoder(member, values):
+    """Returns a function decoding given ANY DEFINED BY member of a
+    lazily decoded value, using given decoded values.
+
+    """
+
+    def decode(data, offset):
+        return member.decode(data, offset, values)
+
+    return decode
+
+
+def create_tag_index(members):
+    """Returns a dictionary of the tags of given members to the members,
+    used to decode a CHOICE or SET member with a single lookup. An
+    untagged CHOICE member is found by all tags of its members. The
+    first member with a tag is used if the tag is not unique.
+
+    """
+
+    index = {}
+
+    for member in members:
+        if isinstance(member, Choice) and member.tag is None:
+            tags = member.tag_index
+        elif member.tag is not None:
+            tags = [bytes(member.tag)]
+        else:
+            continue
+
+        for tag in tags:
+            if tag not in index:
+                index[tag] = member
+
+    return index
 
 
 class Type(object):
@@ -185,6 +480,60 @@ class Type(object):
 
         return end
 
+    def decode_string(self, data, offset):
+        """Returns the contents of the primitive or constructed string at
+        given offset in given data, and the offset after it. The
+        segments of a constructed string are joined into a new
+        bytearray.
+
+        """
+
+        end = offset + len(self.tag)
+
+        if data[offset:end] == self.tag:
+            length, offset = decode_length_definite(data, end)
+            end = offset + length
+
+            return data[offset:end], end
+
+        segments, end = self.decode_constructed(data,
+                                                offset,
+                                                Tag.OCTET_STRING)
+
+        return bytearray().join(segments), end
+
+    def decode_constructed(self, data, offset, segment_tag):
+        """Returns a list of the contents of the primitive segments of the
+        constructed string at given offset in given data, and the offset
+        after it.
+
+        """
+
+        end = offset + len(self.tag)
+        tag = bytearray(self.tag)
+        tag[0] |= Encoding.CONSTRUCTED
+
+        if data[offset:end] != tag:
+            raise DecodeTagError(self.type_name,
+                                 self.tag,
+                                 data[offset:end],
+                                 offset)
+
+        segments = []
+
+        return segments, decode_segments(data, end, segment_tag, segments)
+
+    def encode_stream(self, _data, _stream):
+        raise EncodeError(
+            'only SEQUENCE OF and SET OF can be encoded to a stream, not '
+            '{}'.format(self.type_name))
+
+    def decode_paths(self, data, offset, _paths):
+        return self.decode(data, offset)
+
+    def decode_lazy(self, data, offset):
+        return self.decode(data, offset)
+
 
 class Integer(Type):
 
@@ -264,11 +613,9 @@ class IA5String(Type):
         encoded.extend(data.encode('ascii'))
 
     def decode(self, data, offset):
-        offset = self.decode_tag(data, offset)
-        length, offset = decode_length_definite(data, offset)
-        end = offset + length
+        contents, end = self.decode_string(data, offset)
 
-        return data[offset:end].decode('ascii'), end
+        return bytes(contents).decode('ascii'), end
 
     def __repr__(self):
         return 'IA5String({})'.format(self.name)
@@ -287,11 +634,9 @@ class NumericString(Type):
         encoded.extend(data.encode('ascii'))
 
     def decode(self, data, offset):
-        offset = self.decode_tag(data, offset)
-        length, offset = decode_length_definite(data, offset)
-        end = offset + length
+        contents, end = self.decode_string(data, offset)
 
-        return data[offset:end].decode('ascii'), end
+        return bytes(contents).decode('ascii'), end
 
     def __repr__(self):
         return 'NumericString({})'.format(self.name)
@@ -306,12 +651,36 @@ class MembersType(Type):
                                           Encoding.CONSTRUCTED)
         self.members = members
 
+        # The tags of each optional member and member with a default
+        # value, used to find absent members without decoding them. None
+        # for other members and if the tags are unknown.
+        self.absent_member_tags = []
+
+        for member in members:
+            tags = None
+
+            if member.optional or member.default is not None:
+                tags = frozenset(create_tag_index([member]))
+
+                if not tags:
+                    tags = None
+
+            self.absent_member_tags.append(tags)
+
+        # Members needed to decode ANY DEFINED BY members.
+        self.type_member_names = frozenset([
+            member.type_member
+            for member in members
+            if isinstance(member, AnyDefinedBy)
+        ])
+
     def set_tag(self, number, flags):
         super(MembersType, self).set_tag(number,
                                          flags | Encoding.CONSTRUCTED)
 
     def encode(self, data, encoded):
-        encoded_members = bytearray()
+        encoded.extend(self.tag)
+        offset = encode_length_placeholder(encoded)
 
         for member in self.members:
             name = member.name
@@ -320,9 +689,9 @@ class MembersType(Type):
                 value = data[name]
 
                 if isinstance(member, AnyDefinedBy):
-                    member.encode(value, encoded_members, data)
+                    member.encode(value, encoded, data)
                 elif member.default != value or isinstance(member, Null):
-                    member.encode(value, encoded_members)
+                    member.encode(value, encoded)
             elif member.optional:
                 pass
             elif member.default is None:
@@ -331,22 +700,49 @@ class MembersType(Type):
                         name,
                         data))
 
-        encoded.extend(self.tag)
-        encoded.extend(encode_length_definite(len(encoded_members)))
-        encoded.extend(encoded_members)
+        set_length_definite(encoded, offset)
 
     def decode(self, data, offset):
         offset = self.decode_tag(data, offset)
 
         if data[offset] == 0x80:
-            raise NotImplementedError(
-                'decode until an end-of-contents tag is found')
+            indefinite = True
+            offset += 1
+            end = len(data)
         else:
-            _, offset = decode_length_definite(data, offset)
+            indefinite = False
+            length, offset = decode_length_definite(data, offset)
+            end = offset + length
 
         values = {}
 
-        for member in self.members:
+        for member, tags in zip(self.members, self.absent_member_tags):
+            if offset >= end:
+                if member.optional:
+                    continue
+
+                if member.default is None:
+                    e = DecodeError('out of data at offset {}'.format(offset))
+                    e.location.append(member.name)
+                    raise e
+
+                values[member.name] = member.default
+                continue
+
+            if tags is not None and read_tag(data, offset) not in tags:
+                if not member.optional:
+                    values[member.name] = member.default
+
+                continue
+
+            if indefinite and is_end_of_contents(data, offset):
+                if member.optional:
+                    continue
+
+                if member.default is not None:
+                    values[member.name] = member.default
+                    continue
+
             try:
                 if isinstance(member, AnyDefinedBy):
                     value, offset = member.decode(data, offset, values)
@@ -367,8 +763,164 @@ class MembersType(Type):
 
             values[member.name] = value
 
+        if indefinite:
+            offset = self.decode_end_of_contents(data, offset)
+
+        return values, offset
+
+    def decode_end_of_contents(self, data, offset):
+        # Skip unknown members, for example extension additions.
+        try:
+            while not is_end_of_contents(data, offset):
+                offset = skip_tlv(data, offset)
+        except IndexError:
+            raise DecodeError('out of data at offset {}'.format(offset))
+
+        return offset + 2
+
+    def decode_paths(self, data, offset, paths):
+        offset = self.decode_tag(data, offset)
+
+        if data[offset] == 0x80:
+            indefinite = True
+            offset += 1
+            end = len(data)
+        else:
+            indefinite = False
+            length, offset = decode_length_definite(data, offset)
+            end = offset + length
+
+        values = {}
+
+        for member, tags in zip(self.members, self.absent_member_tags):
+            name = member.name
+
+            if offset >= end:
+                if member.optional:
+                    continue
+
+                if member.default is None:
+                    e = DecodeError('out of data at offset {}'.format(offset))
+                    e.location.append(name)
+                    raise e
+
+                if name in paths:
+                    values[name] = member.default
+
+                continue
+
+            if tags is not None and read_tag(data, offset) not in tags:
+                if not member.optional and name in paths:
+                    values[name] = member.default
+
+                continue
+
+            if indefinite and is_end_of_contents(data, offset):
+                if member.optional:
+                    continue
+
+                if member.default is not None:
+                    if name in paths:
+                        values[name] = member.default
+
+                    continue
+
+            try:
+                if name in paths:
+                    member_paths = paths[name]
+
+                    if isinstance(member, AnyDefinedBy):
+                        value, offset = member.decode(data, offset, values)
+                    elif member_paths is None:
+                        value, offset = member.decode(data, offset)
+                    else:
+                        value, offset = member.decode_paths(data,
+                                                            offset,
+                                                            member_paths)
+                elif name in self.type_member_names:
+                    value, offset = member.decode(data, offset)
+                else:
+                    offset = skip_tlv(data, offset)
+                    continue
+            except (DecodeError, IndexError) as e:
+                if member.optional:
+                    continue
+
+                if member.default is None:
+                    if isinstance(e, IndexError):
+                        e = DecodeError('out of data at offset {}'.format(offset))
+
+                    e.location.append(name)
+                    raise e
+
+                value = member.default
+
+            values[name] = value
+
+        for name in self.type_member_names:
+            if name in values and name not in paths:
+                del values[name]
+
+        if indefinite:
+            offset = self.decode_end_of_contents(data, offset)
+
         return values, offset
 
+    def decode_lazy(self, data, offset):
+        offset = self.decode_tag(data, offset)
+
+        try:
+            offset, end, value_end = decode_contents(data, offset)
+        except IndexError:
+            raise DecodeError('out of data at offset {}'.format(offset))
+
+        items = {}
+        values = LazyDict(data, items)
+
+        for member, tags in zip(self.members, self.absent_member_tags):
+            name = member.name
+
+            if offset >= end or (tags is not None
+                                 and read_tag(data, offset) not in tags):
+                if member.optional:
+                    continue
+
+                if member.default is None:
+                    e = DecodeError('out of data at offset {}'.format(offset))
+                    e.location.append(name)
+                    raise e
+
+                items[name] = member.default
+                continue
+
+            if isinstance(member, AnyDefinedBy):
+                decode = any_defined_by_decoder(member, values)
+            else:
+                decode = member.decode_lazy
+
+            if tags is None and (member.optional
+                                 or member.default is not None):
+                # The member tags are unknown, so the member must be
+                # decoded to find out if it is present.
+                try:
+                    items[name], offset = decode(data, offset)
+                except (DecodeError, IndexError):
+                    if not member.optional:
+                        items[name] = member.default
+
+                continue
+
+            items[name] = Undecoded(decode, offset, name)
+
+            try:
+                offset = skip_tlv(data, offset)
+            except IndexError:
+                e = DecodeError('out of data at offset {}'.format(offset))
+                e.location.append(name)
+                raise e
+
+        return values, value_end
+
     def __repr__(self):
         return '{}({}, [{}])'.format(
             self.__class__.__name__,
@@ -387,6 +939,132 @@ class Set(MembersType):
     def __init__(self, name, members):
         super(Set, self).__init__(name, 'SET', Tag.SET, members)
 
+        # Members are decoded in any order if all of them can be found
+        # by their tag, otherwise in the order they are defined.
+        if all([member.tag is not None or isinstance(member, Choice)
+                for member in members]):
+            self.tag_index = create_tag_index(members)
+        else:
+            self.tag_index = None
+
+    def decode(self, data, offset):
+        if self.tag_index is None:
+            return super(Set, self).decode(data, offset)
+
+        return self.decode_any_order(data, offset, None)
+
+    def decode_paths(self, data, offset, paths):
+        if self.tag_index is None:
+            return super(Set, self).decode_paths(data, offset, paths)
+
+        return self.decode_any_order(data, offset, paths)
+
+    def decode_lazy(self, data, offset):
+        if self.tag_index is None:
+            return super(Set, self).decode_lazy(data, offset)
+
+        offset = self.decode_tag(data, offset)
+
+        try:
+            offset, end, value_end = decode_contents(data, offset)
+        except IndexError:
+            raise DecodeError('out of data at offset {}'.format(offset))
+
+        items = {}
+
+        while offset < end:
+            member = self.tag_index.get(read_tag(data, offset))
+
+            if member is not None:
+                items[member.name] = Undecoded(member.decode_lazy,
+                                               offset,
+                                               member.name)
+
+            try:
+                offset = skip_tlv(data, offset)
+            except IndexError:
+                raise DecodeError('out of data at offset {}'.format(offset))
+
+        for member in self.members:
+            if member.name in items or member.optional:
+                continue
+
+            if member.default is None:
+                e = DecodeError('member not found')
+                e.location.append(member.name)
+                raise e
+
+            items[member.name] = member.default
+
+        return LazyDict(data, items), value_end
+
+    def decode_any_order(self, data, offset, paths):
+        offset = self.decode_tag(data, offset)
+
+        if data[offset] == 0x80:
+            end = None
+            offset += 1
+        else:
+            length, offset = decode_length_definite(data, offset)
+            end = offset + length
+
+        values = {}
+
+        while True:
+            if end is None:
+                if is_end_of_contents(data, offset):
+                    offset += 2
+                    break
+            elif offset >= end:
+                break
+
+            member = self.tag_index.get(read_tag(data, offset))
+
+            if member is None:
+                # Skip unknown members, for example extension
+                # additions.
+                offset = skip_tlv(data, offset)
+                continue
+
+            name = member.name
+
+            try:
+                if paths is None:
+                    value, offset = member.decode(data, offset)
+                elif name not in paths:
+                    offset = skip_tlv(data, offset)
+                    continue
+                elif paths[name] is None:
+                    value, offset = member.decode(data, offset)
+                else:
+                    value, offset = member.decode_paths(data,
+                                                        offset,
+                                                        paths[name])
+            except (DecodeError, IndexError) as e:
+                if isinstance(e, IndexError):
+                    e = DecodeError('out of data at offset {}'.format(offset))
+
+                e.location.append(name)
+                raise e
+
+            values[name] = value
+
+        for member in self.members:
+            if member.name in values or member.optional:
+                continue
+
+            if paths is not None and member.name not in paths:
+                continue
+
+            if member.default is None:
+                e = DecodeError('member not found')
+                e.location.append(member.name)
+                raise e
+
+            values[member.name] = member.default
+
+        return values, offset
+
 
 class ArrayType(Type):
 
@@ -402,17 +1080,30 @@ class ArrayType(Type):
                                        flags | Encoding.CONSTRUCTED)
 
     def encode(self, data, encoded):
-        encoded_elements = bytearray()
+        encoded.extend(self.tag)
+        offset = encode_length_placeholder(encoded)
 
         for entry in data:
-            self.element_type.encode(entry, encoded_elements)
+            self.element_type.encode(entry, encoded)
 
-        encoded.extend(self.tag)
-        encoded.extend(encode_length_definite(len(encoded_elements)))
-        encoded.extend(encoded_elements)
+        set_length_definite(encoded, offset)
+
+    def encode_stream(self, data, stream):
+        stream.write(self.tag + b'\x80')
+
+        for entry in data:
+            encoded = Encoder()
+            self.element_type.encode(entry, encoded)
+            stream.write(encoded.finish())
+
+        stream.write(b'\x00\x00')
 
     def decode(self, data, offset):
         offset += 1
+
+        if data[offset] == 0x80:
+            return self.decode_indefinite(data, offset + 1)
+
         length, offset = decode_length_definite(data, offset)
         decoded = []
         start_offset = offset
@@ -423,6 +1114,61 @@ class ArrayType(Type):
 
         return decoded, offset
 
+    def decode_indefinite(self, data, offset, paths=None):
+        decoded = []
+
+        while not is_end_of_contents(data, offset):
+            if paths is None:
+                decoded_element, offset = self.element_type.decode(data,
+                                                                   offset)
+            else:
+                decoded_element, offset = self.element_type.decode_paths(
+                    data,
+                    offset,
+                    paths)
+
+            decoded.append(decoded_element)
+
+        return decoded, offset + 2
+
+    def decode_paths(self, data, offset, paths):
+        offset += 1
+
+        if data[offset] == 0x80:
+            return self.decode_indefinite(data, offset + 1, paths)
+
+        length, offset = decode_length_definite(data, offset)
+        decoded = []
+        start_offset = offset
+
+        while (offset - start_offset) < length:
+            decoded_element, offset = self.element_type.decode_paths(data,
+                                                                     offset,
+                                                                     paths)
+            decoded.append(decoded_element)
+
+        return decoded, offset
+
+    def decode_lazy(self, data, offset):
+        offset += 1
+
+        try:
+            offset, end, value_end = decode_contents(data, offset)
+        except IndexError:
+            raise DecodeError('out of data at offset {}'.format(offset))
+
+        items = []
+
+        while offset < end:
+            items.append(Undecoded(self.element_type.decode_lazy, offset))
+
+            try:
+                offset = skip_tlv(data, offset)
+            except IndexError:
+                raise DecodeError('out of data at offset {}'.format(offset))
+
+        return LazyList(data, items), value_end
+
     def __repr__(self):
         return '{}({}, {})'.format(self.__class__.__name__,
                                    self.name,
@@ -466,13 +1212,24 @@ class BitString(Type):
         encoded.extend(data[0])
 
     def decode(self, data, offset):
-        offset = self.decode_tag(data, offset)
-        length, offset = decode_length_definite(data, offset)
-        end = offset + length
-        number_of_bits = 8 * (length - 1) - data[offset]
-        offset += 1
+        end = offset + len(self.tag)
+
+        if data[offset:end] == self.tag:
+            length, offset = decode_length_definite(data, end)
+            end = offset + length
+            number_of_bits = 8 * (length - 1) - data[offset]
+            offset += 1
 
-        return (bytearray(data[offset:end]), number_of_bits), end
+            return (data[offset:end], number_of_bits), end
+
+        segments, end = self.decode_constructed(data,
+                                                offset,
+                                                Tag.BIT_STRING)
+        number_of_bits = sum([8 * (len(segment) - 1) - segment[0]
+                              for segment in segments])
+        value = bytearray().join([segment[1:] for segment in segments])
+
+        return (value, number_of_bits), end
 
     def __repr__(self):
         return 'BitString({})'.format(self.name)
@@ -491,11 +1248,9 @@ class OctetString(Type):
         encoded.extend(data)
 
     def decode(self, data, offset):
-        offset = self.decode_tag(data, offset)
-        length, offset = decode_length_definite(data, offset)
-        end = offset + length
+        contents, end = self.decode_string(data, offset)
 
-        return bytearray(data[offset:end]), end
+        return contents, end
 
     def __repr__(self):
         return 'OctetString({})'.format(self.name)
@@ -514,11 +1269,9 @@ class PrintableString(Type):
         encoded.extend(data.encode('ascii'))
 
     def decode(self, data, offset):
-        offset = self.decode_tag(data, offset)
-        length, offset = decode_length_definite(data, offset)
-        end = offset + length
+        contents, end = self.decode_string(data, offset)
 
-        return data[offset:end].decode('ascii'), end
+        return bytes(contents).decode('ascii'), end
 
     def __repr__(self):
         return 'PrintableString({})'.format(self.name)
@@ -537,11 +1290,9 @@ class UniversalString(Type):
         encoded.extend(data.encode('ascii'))
 
     def decode(self, data, offset):
-        offset = self.decode_tag(data, offset)
-        length, offset = decode_length_definite(data, offset)
-        end = offset + length
+        contents, end = self.decode_string(data, offset)
 
-        return data[offset:end].decode('ascii'), end
+        return bytes(contents).decode('ascii'), end
 
     def __repr__(self):
         return 'UniversalString({})'.format(self.name)
@@ -560,11 +1311,9 @@ class VisibleString(Type):
         encoded.extend(data.encode('ascii'))
 
     def decode(self, data, offset):
-        offset = self.decode_tag(data, offset)
-        length, offset = decode_length_definite(data, offset)
-        end = offset + length
+        contents, end = self.decode_string(data, offset)
 
-        return data[offset:end].decode('ascii'), end
+        return bytes(contents).decode('ascii'), end
 
     def __repr__(self):
         return 'VisibleString({})'.format(self.name)
@@ -583,11 +1332,9 @@ class UTF8String(Type):
         encoded.extend(data.encode('utf-8'))
 
     def decode(self, data, offset):
-        offset = self.decode_tag(data, offset)
-        length, offset = decode_length_definite(data, offset)
-        end = offset + length
+        contents, end = self.decode_string(data, offset)
 
-        return data[offset:end].decode('utf-8'), end
+        return bytes(contents).decode('utf-8'), end
 
     def __repr__(self):
         return 'UTF8String({})'.format(self.name)
@@ -606,11 +1353,9 @@ class BMPString(Type):
         encoded.extend(data)
 
     def decode(self, data, offset):
-        offset = self.decode_tag(data, offset)
-        length, offset = decode_length_definite(data, offset)
-        end = offset + length
+        contents, end = self.decode_string(data, offset)
 
-        return bytearray(data[offset:end]), end
+        return bytearray(contents), end
 
     def __repr__(self):
         return 'BMPString({})'.format(self.name)
@@ -629,11 +1374,9 @@ class UTCTime(Type):
         encoded.extend(bytearray((data + 'Z').encode('ascii')))
 
     def decode(self, data, offset):
-        offset = self.decode_tag(data, offset)
-        length, offset = decode_length_definite(data, offset)
-        end = offset + length
+        contents, end = self.decode_string(data, offset)
 
-        return data[offset:end][:-1].decode('ascii'), end
+        return bytes(contents[:-1]).decode('ascii'), end
 
     def __repr__(self):
         return 'UTCTime({})'.format(self.name)
@@ -652,11 +1395,9 @@ class GeneralizedTime(Type):
         encoded.extend(data.encode('ascii'))
 
     def decode(self, data, offset):
-        offset = self.decode_tag(data, offset)
-        length, offset = decode_length_definite(data, offset)
-        end = offset + length
+        contents, end = self.decode_string(data, offset)
 
-        return data[offset:end].decode('ascii'), end
+        return bytes(contents).decode('ascii'), end
 
     def __repr__(self):
         return 'GeneralizedTime({})'.format(self.name)
@@ -675,11 +1416,9 @@ class TeletexString(Type):
         encoded.extend(data)
 
     def decode(self, data, offset):
-        offset = self.decode_tag(data, offset)
-        length, offset = decode_length_definite(data, offset)
-        end = offset + length
+        contents, end = self.decode_string(data, offset)
 
-        return bytearray(data[offset:end]), end
+        return bytearray(contents), end
 
     def __repr__(self):
         return 'TeletexString({})'.format(self.name)
@@ -751,6 +1490,7 @@ class Choice(Type):
     def __init__(self, name, members):
         super(Choice, self).__init__(name, 'CHOICE', None)
         self.members = members
+        self.tag_index = create_tag_index(members)
 
     def set_tag(self, number, flags):
         super(Choice, self).set_tag(number,
@@ -762,11 +1502,10 @@ class Choice(Type):
                 if self.tag is None:
                     member.encode(data[member.name], encoded)
                 else:
-                    encoded_members = bytearray()
-                    member.encode(data[member.name], encoded_members)
                     encoded.extend(self.tag)
-                    encoded.extend(encode_length_definite(len(encoded_members)))
-                    encoded.extend(encoded_members)
+                    offset = encode_length_placeholder(encoded)
+                    member.encode(data[member.name], encoded)
+                    set_length_definite(encoded, offset)
 
                 return
 
@@ -776,21 +1515,89 @@ class Choice(Type):
                 ''.join([name for name in data])))
 
     def decode(self, data, offset):
+        indefinite = False
+
         if self.tag is not None:
             offset = self.decode_tag(data, offset)
-            _, offset = decode_length_definite(data, offset)
 
-        for member in self.members:
-            if (isinstance(member, Choice)
-                or member.tag == data[offset:offset + len(member.tag)]):
-                try:
-                    decoded, offset = member.decode(data, offset)
-                except DecodeChoiceError:
-                    pass
-                else:
-                    return {member.name: decoded}, offset
+            if data[offset] == 0x80:
+                indefinite = True
+                offset += 1
+            else:
+                _, offset = decode_length_definite(data, offset)
+
+        member = self.tag_index.get(read_tag(data, offset))
+
+        if member is None:
+            raise DecodeChoiceError()
+
+        decoded, offset = member.decode(data, offset)
 
-        raise DecodeChoiceError()
+        if indefinite:
+            offset = decode_end_of_contents(data, offset)
+
+        return {member.name: decoded}, offset
+
+    def decode_paths(self, data, offset, paths):
+        indefinite = False
+
+        if self.tag is not None:
+            offset = self.decode_tag(data, offset)
+
+            if data[offset] == 0x80:
+                indefinite = True
+                offset += 1
+            else:
+                _, offset = decode_length_definite(data, offset)
+
+        member = self.tag_index.get(read_tag(data, offset))
+
+        if member is None:
+            raise DecodeChoiceError()
+
+        if member.name not in paths:
+            decoded = {}
+            offset = skip_tlv(data, offset)
+        else:
+            member_paths = paths[member.name]
+
+            if member_paths is None:
+                decoded, offset = member.decode(data, offset)
+            else:
+                decoded, offset = member.decode_paths(data,
+                                                      offset,
+                                                      member_paths)
+
+            decoded = {member.name: decoded}
+
+        if indefinite:
+            offset = decode_end_of_contents(data, offset)
+
+        return decoded, offset
+
+    def decode_lazy(self, data, offset):
+        indefinite = False
+
+        if self.tag is not None:
+            offset = self.decode_tag(data, offset)
+
+            if data[offset] == 0x80:
+                indefinite = True
+                offset += 1
+            else:
+                _, offset = decode_length_definite(data, offset)
+
+        member = self.tag_index.get(read_tag(data, offset))
+
+        if member is None:
+            raise DecodeChoiceError()
+
+        decoded, offset = member.decode_lazy(data, offset)
+
+        if indefinite:
+            offset = decode_end_of_contents(data, offset)
+
+        return {member.name: decoded}, offset
 
     def __repr__(self):
         return 'Choice({}, [{}])'.format(
@@ -825,12 +1632,9 @@ class Any(Type):
         encoded.extend(data)
 
     def decode(self, data, offset):
-        start = offset
-        _, _, offset = decode_tag(data, offset)
-        length, offset = decode_length_definite(data, offset)
-        end = offset + length
+        end = skip_tlv(data, offset)
 
-        return data[start:end], end
+        return data[offset:end], end
 
     def __repr__(self):
         return 'Any({})'.format(self.name)
@@ -857,12 +1661,9 @@ class AnyDefinedBy(Type):
             return self.choices[values[self.type_member]].decode(data,
                                                                  offset)
         else:
-            start = offset
-            _, _, offset = decode_tag(data, offset)
-            length, offset = decode_length_definite(data, offset)
-            end = offset + length
+            end = skip_tlv(data, offset)
 
-            return data[start:end], end
+            return data[offset:end], end
 
     def __repr__(self):
         return 'AnyDefinedBy({})'.format(self.name)
@@ -932,44 +1733,97 @@ class ExplicitTag(Type):
                                          flags | Encoding.CONSTRUCTED)
 
     def encode(self, data, encoded):
-        encoded_inner = bytearray()
-        self.inner.encode(data, encoded_inner)
         encoded.extend(self.tag)
-        encoded.extend(encode_length_definite(len(encoded_inner)))
-        encoded.extend(encoded_inner)
+        offset = encode_length_placeholder(encoded)
+        self.inner.encode(data, encoded)
+        set_length_definite(encoded, offset)
+
+    def encode_stream(self, data, stream):
+        stream.write(self.tag + b'\x80')
+        self.inner.encode_stream(data, stream)
+        stream.write(b'\x00\x00')
 
     def decode(self, data, offset):
         offset = self.decode_tag(data, offset)
+
+        if data[offset] == 0x80:
+            decoded, offset = self.inner.decode(data, offset + 1)
+
+            return decoded, decode_end_of_contents(data, offset)
+
         _, offset = decode_length_definite(data, offset)
         return self.inner.decode(data, offset)
 
+    def decode_paths(self, data, offset, paths):
+        offset = self.decode_tag(data, offset)
+
+        if data[offset] == 0x80:
+            decoded, offset = self.inner.decode_paths(data, offset + 1, paths)
+
+            return decoded, decode_end_of_contents(data, offset)
+
+        _, offset = decode_length_definite(data, offset)
+        return self.inner.decode_paths(data, offset, paths)
+
+    def decode_lazy(self, data, offset):
+        offset = self.decode_tag(data, offset)
+
+        if data[offset] == 0x80:
+            decoded, offset = self.inner.decode_lazy(data, offset + 1)
+
+            return decoded, decode_end_of_contents(data, offset)
+
+        _, offset = decode_length_definite(data, offset)
+        return self.inner.decode_lazy(data, offset)
+
     def __repr__(self):
         return 'Tag()'
 
 
-class CompiledType(object):
-
-    def __init__(self, type_):
-        self._type = type_
+class CompiledType(compiler.CompiledType):
 
     def encode(self, data):
-        encoded = bytearray()
+        encoded = Encoder()
         self._type.encode(data, encoded)
-        return encoded
+        return encoded.finish()
 
-    def decode(self, data):
-        return self._type.decode(bytearray(data), 0)[0]
+    def encode_stream(self, data, stream):
+        self._type.encode_stream(data, stream)
 
-    def __repr__(self):
-        return repr(self._type)
+    def decode(self, data, zero_copy=False, paths=None, lazy=False):
+        if zero_copy:
+            data = as_memoryview(data)
+        else:
+            data = bytearray(data)
+
+        if paths is not None:
+            return self._type.decode_paths(data, 0, create_path_tree(paths))[0]
+        elif lazy:
+            return self._type.decode_lazy(data, 0)[0]
+        else:
+            return self._type.decode(data, 0)[0]
+
+    def decode_many(self, data, zero_copy=False, offsets=False):
+        if zero_copy:
+            data = as_memoryview(data)
+        else:
+            data = bytearray(data)
+
+        return decode_many(self._type.decode, decode_end, data, offsets)
+
+    def iter_decode(self, stream, offsets=False):
+        return self.stream_decoder(offsets).read(stream)
+
+    def stream_decoder(self, offsets=False):
+        return StreamDecoder(self._type.decode, decode_end, offsets)
 
 
 class Compiler(compiler.Compiler):
 
-    def process_type(self, type_name, type_descriptor, module_name):
-        return CompiledType(self.compile_type(type_name,
-                                              type_descriptor,
-                                              module_name))
+    def process_type(self, type_name, module_name):
+        return CompiledType(self.compile_user_type(type_name,
+                                                   type_name,
+                                                   module_name))
 
     def compile_implicit_type(self, name, type_descriptor, module_name):
         type_name = type_descriptor['type']
@@ -1049,18 +1903,14 @@ class Compiler(compiler.Compiler):
         elif type_name == 'NULL':
             compiled = Null(name)
         else:
-            if type_name in self.types_backtrace:
+            if self.is_recursive(type_name):
                 compiled = Recursive(name,
                                      type_name,
                                      module_name)
             else:
-                self.types_backtrace_push(type_name)
-                compiled = self.compile_type(
-                    name,
-                    *self.lookup_type_descriptor(
-                        type_name,
-                        module_name))
-                self.types_backtrace_pop()
+                compiled = self.compile_user_type(name,
+                                                  type_name,
+                                                  module_name)
 
         return compiled
 
@@ -1121,8 +1971,8 @@ class Compiler(compiler.Compiler):
         return compiled_members
 
 
-def compile_dict(specification):
-    return Compiler(specification).process()
+def compile_dict(specification, lazy=False, profile=None):
+    return Compiler(specification, profile).process(lazy)
 
 
 def decode_length(data):
@@ -1130,3 +1980,221 @@ def decode_length(data):
         return sum(decode_length_definite(bytearray(data), 1))
     except IndexError:
         raise DecodeError('Not enough data.')
+
+
+class TlvIndex(object):
+    """An index of all tags, lengths and values (TLVs) in given BER or
+    DER encoded data, created by scanning the data once. The TLVs are
+    numbered in the order they are found, and each attribute below is
+    an array with one entry per TLV.
+
+    `tags` is the tag as an integer, for example ``0x30`` for a
+    SEQUENCE and ``0x7f64`` for ``[APPLICATION 100]``, `offsets` the
+    offset of the tag, `contents_offsets` the offset of the contents,
+    `lengths` the length of the contents, `depths` the number of
+    enclosing constructed TLVs and `parents` the index of the
+    innermost enclosing TLV, or -1 if none.
+
+    The data may contain several TLVs one after the other.
+
+    """
+
+    def __init__(self, data):
+        self._data = as_memoryview(data)
+        self._indefinite = set()
+        self.tags = array(ARRAY_TYPECODE)
+        self.offsets = array(ARRAY_TYPECODE)
+        self.contents_offsets = array(ARRAY_TYPECODE)
+        self.lengths = array(ARRAY_TYPECODE)
+        self.depths = array(ARRAY_TYPECODE)
+        self.parents = array(ARRAY_TYPECODE)
+
+        try:
+            self._scan(self._data)
+        except IndexError:
+            raise DecodeError('out of data at offset {}'.format(len(data)))
+        except OverflowError:
+            raise DecodeError('tag or length too big to index')
+
+    def _scan(self, data):
+        # The columns are built in lists, which are faster to append
+        # to than arrays.
+        tags = []
+        offsets = []
+        contents_offsets = []
+        lengths = []
+        depths = []
+        parents = []
+        size = len(data)
+        offset = 0
+
+        # The index, contents end offset (-1 if indefinite) and depth
+        # of the innermost enclosing constructed TLV, and a stack of
+        # the outer ones.
+        parent = -1
+        end = size
+        depth = 0
+        stack = []
+
+        while True:
+            while offset >= end or end == -1:
+                if not stack:
+                    break
+
+                if end == -1:
+                    if data[offset:offset + 2] != b'\x00\x00':
+                        break
+
+                    lengths[parent] = offset - contents_offsets[parent]
+                    offset += 2
+                elif offset > end:
+                    raise DecodeError(
+                        'contents of TLV at offset {} end at offset {}, but '
+                        'its last enclosed TLV ends at offset {}'.format(
+                            offsets[parent],
+                            end,
+                            offset))
+
+                parent, end = stack.pop()
+                depth -= 1
+
+            if offset >= size:
+                if parent != -1:
+                    raise IndexError()
+
+                break
+
+            start = offset
+            tag = data[offset]
+            offset += 1
+
+            if (tag & 0x1f) == 0x1f:
+                while True:
+                    byte = data[offset]
+                    tag = ((tag << 8) | byte)
+                    offset += 1
+
+                    if not byte & 0x80:
+                        break
+
+            length = data[offset]
+            offset += 1
+
+            if length > 127:
+                if length == 0x80:
+                    length = -1
+                else:
+                    number_of_bytes = (length & 0x7f)
+
+                    if offset + number_of_bytes > size:
+                        raise IndexError()
+
+                    length = decode_integer(data[offset:offset + number_of_bytes])
+                    offset += number_of_bytes
+
+            tags.append(tag)
+            offsets.append(start)
+            contents_offsets.append(offset)
+            lengths.append(length)
+            depths.append(depth)
+            parents.append(parent)
+
+            if length != -1:
+                if end == -1 or end > size:
+                    limit = size
+                else:
+                    limit = end
+
+                if offset + length > limit:
+                    raise DecodeError(
+                        'out of data at offset {}'.format(start))
+
+            if data[start] & Encoding.CONSTRUCTED:
+                stack.append((parent, end))
+                parent = len(tags) - 1
+                depth += 1
+
+                if length == -1:
+                    self._indefinite.add(parent)
+                    end = -1
+                else:
+                    end = offset + length
+            elif length == -1:
+                raise DecodeError(
+                    'expected definite length of primitive TLV at offset '
+                    '{}'.format(start))
+            else:
+                offset += length
+
+        self.tags.extend(tags)
+        self.offsets.extend(offsets)
+        self.contents_offsets.extend(contents_offsets)
+        self.lengths.extend(lengths)
+        self.depths.extend(depths)
+        self.parents.extend(parents)
+
+    def __len__(self):
+        return len(self.tags)
+
+    def is_constructed(self, index):
+        """Returns ``True`` if given TLV is constructed, that is, its
+        contents are other TLVs, and ``False`` otherwise.
+
+        """
+
+        return bool(self._data[self.offsets[index]] & Encoding.CONSTRUCTED)
+
+    def is_indefinite(self, index):
+        """Returns ``True`` if given TLV has indefinite length, and
+        ``False`` otherwise.
+
+        """
+
+        return index in self._indefinite
+
+    def children(self, index):
+        """Returns a list of the indexes of the TLVs directly enclosed by
+        given TLV.
+
+        """
+
+        depths = self.depths
+        depth = depths[index] + 1
+        children = []
+
+        for i in range(index + 1, len(depths)):
+            if depths[i] < depth:
+                break
+
+            if depths[i] == depth:
+                children.append(i)
+
+        return children
+
+    def contents(self, index):
+        """Returns the contents of given TLV, as a memoryview of the
+        indexed data.
+
+        """
+
+        offset = self.contents_offsets[index]
+
+        return self._data[offset:offset + self.lengths[index]]
+
+    def encoded(self, index):
+        """Returns the tag, length and contents of given TLV, as a
+        memoryview of the indexed data. It can be decoded with
+        :meth:`~asn1tools.compiler.Specification.decode()`.
+
+        """
+
+        end = self.contents_offsets[index] + self.lengths[index]
+
+        if index in self._indefinite:
+            end += 2
+
+        return self._data[self.offsets[index]:end]
+
+
+def tlv_index(data):
+    return TlvIndex(data)
@@ -2,15 +2,106 @@
 
 """
 
-from copy import deepcopy
+from copy import copy
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
 from ..errors import CompileError
+from . import EncodeError
+from . import DecodeError
+from ..profile import NullProfile
+
+
+class LazyTypes(Mapping):
+    """The types of given module, each compiled by given compiler on first
+    access.
+
+    """
+
+    def __init__(self, compiler, module_name):
+        self._compiler = compiler
+        self._module_name = module_name
+
+    def __getitem__(self, type_name):
+        return self._compiler.process_type_lazily(type_name,
+                                                  self._module_name)
+
+    def __contains__(self, type_name):
+        return type_name in self._compiler.type_names(self._module_name)
+
+    def __iter__(self):
+        return iter(self._compiler.type_names(self._module_name))
+
+    def __len__(self):
+        return len(self._compiler.type_names(self._module_name))
+
+
+class CompiledType(object):
+    """A compiled type of a codec. Zero-copy, path, lazy, many and stream
+    decoding and stream encoding are not supported unless overridden
+    by the codec.
+
+    """
+
+    def __init__(self, type_):
+        self._type = type_
+
+    def encode_stream(self, _data, _stream):
+        raise EncodeError('Stream encoding not supported for this codec.')
+
+    def decode(self, data, zero_copy=False, paths=None, lazy=False):
+        if zero_copy:
+            raise DecodeError(
+                'Zero-copy decoding not supported for this codec.')
+
+        if paths is not None:
+            raise DecodeError(
+                'Decoding paths not supported for this codec.')
+
+        if lazy:
+            raise DecodeError(
+                'Lazy decoding not supported for this codec.')
+
+        return self.decode_value(data)
+
+    def decode_value(self, data):
+        """Returns given encoded data decoded, without any decoding options.
+
+        """
+
+        raise NotImplementedError()
+
+    def decode_many(self, _data, _zero_copy=False, _offsets=False):
+        raise DecodeError('Decode many not supported for this codec.')
+
+    def iter_decode(self, _stream, _offsets=False):
+        raise DecodeError('Stream decoding not supported for this codec.')
+
+    def stream_decoder(self, _offsets=False):
+        raise DecodeError('Stream decoding not supported for this codec.')
+
+    def __repr__(self):
+        return repr(self._type)
 
 
 class Compiler(object):
 
-    def __init__(self, specification):
+    def __init__(self, specification, profile=None):
+        if profile is None:
+            profile = NullProfile()
+
         self._specification = specification
+        self._profile = profile
         self._types_backtrace = []
+        self._compiled_user_types = {}
+        self._expanded_type_names = set()
+        self._recursion_index = 0
+        self._number_of_recursive_references = 0
+        self._symbols = {}
+        self._object_class_members = {}
 
     def types_backtrace_push(self, type_name):
         self._types_backtrace.append(type_name)
@@ -22,36 +113,176 @@ class Compiler(object):
     def types_backtrace(self):
         return self._types_backtrace
 
-    def process(self):
+    def is_recursive(self, type_name):
+        """Returns ``True`` if given type is being compiled, that is, if a
+        reference to it is recursive.
+
+        """
+
+        if type_name not in self._types_backtrace:
+            return False
+
+        # Remember the outermost type being compiled that a recursive
+        # reference was found to, as any type compiled after it
+        # depends on it.
+        index = len(self._types_backtrace) - 1
+        index -= self._types_backtrace[::-1].index(type_name)
+        self._recursion_index = min(self._recursion_index, index)
+        self._number_of_recursive_references += 1
+
+        return True
+
+    def compile_user_type(self, name, type_name, module_name):
+        """Returns the compiled user defined type `type_name` referenced as
+        `name` from module `module_name`.
+
+        Each referenced type is only compiled once and then shared by
+        all its references. The compiled type of a reference is a
+        shallow copy of the shared type, which its name, tag, and
+        other attributes set by the referencing type may be changed
+        on, while all its members are shared.
+
+        """
+
+        type_descriptor, module_name = self.lookup_type_descriptor(type_name,
+                                                                   module_name)
+        key = (module_name, type_name)
+        entry = self._compiled_user_types.get(key)
+
+        if entry is not None and entry[1] is None:
+            compiled = entry[0]
+        elif (entry is not None
+              and entry[1].isdisjoint(self._types_backtrace)):
+            # A shared recursive type can only be used if no type it
+            # expands is being compiled, as the reference should be
+            # recursive otherwise.
+            compiled, expanded_type_names = entry
+            self._expanded_type_names.update(expanded_type_names)
+            self._number_of_recursive_references += 1
+        else:
+            compiled, expanded_type_names, index = self.compile_user_type_once(
+                name,
+                type_name,
+                type_descriptor,
+                module_name)
+
+            # Types with recursive references to types compiled before
+            # them are not shared, as they differ between references.
+            if index >= len(self._types_backtrace):
+                self._compiled_user_types[key] = (compiled,
+                                                  expanded_type_names)
+
+        compiled = copy(compiled)
+        compiled.name = name
+
+        return compiled
+
+    def compile_user_type_once(self,
+                               name,
+                               type_name,
+                               type_descriptor,
+                               module_name):
+        """Returns given type compiled, the names of all types it expands,
+        or ``None`` if it has no recursive references, and the index
+        in the types backtrace of the outermost type it has a
+        recursive reference to.
+
+        """
+
+        outer_expanded_type_names = self._expanded_type_names
+        outer_recursion_index = self._recursion_index
+        number_of_recursive_references = self._number_of_recursive_references
+        self._expanded_type_names = set([type_name])
+        self._recursion_index = len(self._types_backtrace)
+        self._profile.count_compiled_type(module_name, type_name)
+        self.types_backtrace_push(type_name)
+
+        try:
+            compiled = self.compile_type(name, type_descriptor, module_name)
+        finally:
+            self.types_backtrace_pop()
+            index = self._recursion_index
+
+            # A type without recursive references expands no type
+            # being compiled when it is used, so its expanded types
+            # are not needed.
+            if (self._number_of_recursive_references
+                == number_of_recursive_references):
+                expanded_type_names = None
+            else:
+                expanded_type_names = frozenset(self._expanded_type_names)
+                outer_expanded_type_names.update(expanded_type_names)
+
+            self._expanded_type_names = outer_expanded_type_names
+            self._recursion_index = min(outer_recursion_index, index)
+
+        return compiled, expanded_type_names, index
+
+    def process(self, lazy=False):
+        """Returns a dictionary of all compiled types by module name and
+        type name. If `lazy` is ``True``, the types of each module are
+        instead a :class:`LazyTypes` mapping compiling each type on
+        first access.
+
+        """
+
+        if lazy:
+            return self.process_lazy()
+
         self.pre_process()
 
         compiled = {}
 
-        for module_name in self._specification:
-            items = self._specification[module_name]['types'].items()
-
-            for type_name, type_descriptor in items:
-                self.types_backtrace_push(type_name)
-                compiled_type = self.process_type(type_name,
-                                                  type_descriptor,
-                                                  module_name)
-                self.types_backtrace_pop()
+        with self._profile.phase('compile'):
+            for module_name in self._specification:
+                for type_name in self._specification[module_name]['types']:
+                    compiled_type = self.process_type(type_name, module_name)
 
-                if module_name not in compiled:
-                    compiled[module_name] = {}
+                    if module_name not in compiled:
+                        compiled[module_name] = {}
 
-                compiled[module_name][type_name] = compiled_type
+                    compiled[module_name][type_name] = compiled_type
 
         return compiled
 
+    def process_lazy(self):
+        self.pre_process()
+        self._lazy_compiled = {}
+
+        return {
+            module_name: LazyTypes(self, module_name)
+            for module_name in self._specification
+            if self._specification[module_name]['types']
+        }
+
+    def process_type_lazily(self, type_name, module_name):
+        key = (module_name, type_name)
+
+        try:
+            return self._lazy_compiled[key]
+        except KeyError:
+            pass
+
+        with self._profile.phase('compile'):
+            compiled_type = self.process_type(type_name, module_name)
+
+        self._lazy_compiled[key] = compiled_type
+
+        return compiled_type
+
+    def type_names(self, module_name):
+        return self._specification[module_name]['types']
+
     def pre_process(self):
         for module_name in self._specification:
             module = self._specification[module_name]
 
-            self.pre_process_components_of(module, module_name)
+            with self._profile.phase('pre-process: COMPONENTS OF'):
+                self.pre_process_components_of(module, module_name)
 
             if module['extensibility-implied']:
-                self.pre_process_extensibility_implied(module)
+                with self._profile.phase('pre-process: EXTENSIBILITY IMPLIED'):
+                    self.pre_process_extensibility_implied(module)
 
         return self._specification
 
@@ -109,8 +340,8 @@ class Compiler(object):
             if '...' not in members:
                 members.append('...')
 
-    def process_type(self, type_name, type_descriptor, module_name):
-        return NotImplementedError()
+    def process_type(self, type_name, module_name):
+        raise NotImplementedError()
 
     def get_size_range(self, type_descriptor, module_name):
         """Returns a tuple of the minimum and maximum values allowed according
@@ -181,108 +412,131 @@ class Compiler(object):
 
         return False
 
-    def lookup_type_descriptor(self, type_name, module_name):
-        module = self._specification[module_name]
-        type_descriptor = None
+    def symbols(self, kind):
+        """Returns the symbol index of given kind, ``'types'``, ``'values'``
+        or ``'object-classes'``. It is a dictionary of module names to
+        dictionaries of names to tuples of the descriptor and the name
+        of the module defining it. Imported symbols are resolved,
+        transitively if an imported module imports them in turn. The
+        index is created on first use.
 
-        if type_name in module['types']:
-            type_descriptor = module['types'][type_name]
-        else:
-            for from_module_name, imports in module['imports'].items():
-                if type_name in imports:
-                    try:
-                        from_module = self._specification[from_module_name]
-                    except KeyError:
-                        raise CompileError(
-                            "Module '{}' cannot import type '{}' from missing "
-                            "module '{}'.".format(module_name,
-                                                  type_name,
-                                                  from_module_name))
-
-                    try:
-                        type_descriptor = from_module['types'][type_name]
-                    except KeyError:
-                        raise CompileError(
-                            "Type '{}' imported by module '{}' not found "
-                            "in module '{}'.".format(type_name,
-                                                     module_name,
-                                                     from_module_name))
-
-                    module_name = from_module_name
-                    break
-
-        if type_descriptor is None:
-            raise CompileError("Type '{}' not found in module '{}'.".format(
-                type_name,
-                module_name))
+        """
+
+        try:
+            return self._symbols[kind]
+        except KeyError:
+            pass
 
-        return type_descriptor, module_name
+        index = {}
+        import_sources = {}
 
-    def lookup_value(self, value_name, module_name):
-        module = self._specification[module_name]
-        value = None
+        for module_name, module in self._specification.items():
+            index[module_name] = {
+                name: (descriptor, module_name)
+                for name, descriptor in module.get(kind, {}).items()
+            }
+            sources = {}
 
-        if value_name in module['values']:
-            value = module['values'][value_name]
-        else:
-            for from_module_name, imports in module['imports'].items():
-                if value_name in imports:
-                    try:
-                        from_module = self._specification[from_module_name]
-                    except KeyError:
-                        raise CompileError(
-                            "Module '{}' cannot import value '{}' from missing "
-                            "module '{}'.".format(module_name,
-                                                  value_name,
-                                                  from_module_name))
-
-                    try:
-                        value = from_module['values'][value_name]
-                    except KeyError:
-                        raise CompileError(
-                            "Value '{}' imported by module '{}' not found "
-                            "in module '{}'.".format(value_name,
-                                                     module_name,
-                                                     from_module_name))
-
-                    module_name = from_module_name
-                    break
-
-        if value is None:
-            raise CompileError("Value '{}' not found in module '{}'.".format(
-                value_name,
-                module_name))
-
-        return value, module_name
+            for from_module_name, imports in module.get('imports', {}).items():
+                for name in imports:
+                    sources.setdefault(name, from_module_name)
 
-    def lookup_object_class_descriptor(self, object_class_name, module_name):
+            import_sources[module_name] = sources
+
+        def resolve(module_name, name, resolving):
+            symbols = index[module_name]
+
+            if name in symbols:
+                return symbols[name]
+
+            from_module_name = import_sources[module_name].get(name)
+
+            # Give up on missing modules and import cycles.
+            if from_module_name not in index or module_name in resolving:
+                return None
+
+            resolving.add(module_name)
+            symbol = resolve(from_module_name, name, resolving)
+
+            if symbol is not None:
+                symbols[name] = symbol
+
+            return symbol
+
+        for module_name, sources in import_sources.items():
+            for name in sources:
+                resolve(module_name, name, set())
+
+        self._symbols[kind] = index
+
+        return index
+
+    def lookup_symbol(self, kind, name, module_name):
+        try:
+            return self.symbols(kind + 's')[module_name][name]
+        except KeyError:
+            pass
+
+        # Not found. Find out why.
         module = self._specification[module_name]
-        object_class_descriptor = None
 
-        if object_class_name in module['object-classes']:
-            object_class_descriptor = module['object-classes'][object_class_name]
-        else:
-            raise NotImplementedError()
+        for from_module_name, imports in module['imports'].items():
+            if name in imports:
+                if from_module_name not in self._specification:
+                    raise CompileError(
+                        "Module '{}' cannot import {} '{}' from missing "
+                        "module '{}'.".format(module_name,
+                                              kind,
+                                              name,
+                                              from_module_name))
+
+                raise CompileError(
+                    "{} '{}' imported by module '{}' not found "
+                    "in module '{}'.".format(kind.capitalize(),
+                                             name,
+                                             module_name,
+                                             from_module_name))
+
+        raise CompileError("{} '{}' not found in module '{}'.".format(
+            kind.capitalize(),
+            name,
+            module_name))
+
+    def lookup_type_descriptor(self, type_name, module_name):
+        return self.lookup_symbol('type', type_name, module_name)
 
-        if object_class_descriptor is None:
-            raise CompileError("Object class '{}' not found in module '{}'.".format(
-                object_class_name,
-                module_name))
+    def lookup_value(self, value_name, module_name):
+        return self.lookup_symbol('value', value_name, module_name)
 
-        return object_class_descriptor, module_name
+    def lookup_object_class_descriptor(self, object_class_name, module_name):
+        try:
+            return self.symbols('object-classes')[module_name][object_class_name]
+        except KeyError:
+            raise NotImplementedError()
 
     def convert_class_member_type(self, type_descriptor, module_name):
         type_name = type_descriptor['type']
         class_name, member_name = type_name.split('.')
         result = self.lookup_object_class_descriptor(class_name,
                                                      module_name)
-        object_class_descriptor, module_name = result
-        type_descriptor = deepcopy(type_descriptor)
+        object_class_descriptor, class_module_name = result
+        key = (class_module_name, class_name)
+
+        try:
+            members = self._object_class_members[key]
+        except KeyError:
+            members = {}
+
+            for member in object_class_descriptor['members']:
+                members.setdefault(member['name'], member)
+
+            self._object_class_members[key] = members
+
+        # Only the type is replaced, so a shallow copy is enough.
+        type_descriptor = dict(type_descriptor)
 
-        for member in object_class_descriptor['members']:
-            if member['name'] == member_name:
-                type_descriptor['type'] = member['type']
-                break
+        if member_name in members:
+            type_descriptor['type'] = members[member_name]['type']
 
         return type_descriptor
 
@@ -5,7 +5,18 @@
 from . import EncodeError
 from . import DecodeError
 from . import DecodeTagError
+from . import as_memoryview
+from . import create_path_tree
+from . import Undecoded
+from . import LazyDict
+from . import LazyList
+from . import StreamDecoder
+from . import decode_many
 from . import compiler
+from .ber import Encoder
+from .ber import encode_length_placeholder
+from .ber import set_length_definite
+from .ber import TlvIndex
 
 
 class Class(object):
@@ -78,6 +89,9 @@ def decode_length_definite(encoded, offset):
 
     if length <= 127:
         return length, offset
+    elif length == 0x80:
+        raise DecodeError(
+            'expected definite length at offset {}'.format(offset - 1))
     else:
         number_of_bytes = (length & 0x7f)
         encoded = encoded[offset:number_of_bytes + offset]
@@ -90,6 +104,49 @@ def decode_length_definite(encoded, offset):
         return length, offset + number_of_bytes
 
 
+def decode_end(data, offset):
+    """Returns the offset after the value at given offset in given data,
+    or None if its tag and length are not yet in the data.
+
+    """
+
+    size = len(data)
+    end = offset + 1
+
+    if end > size:
+        return None
+
+    if (data[offset] & 0x1f) == 0x1f:
+        while True:
+            if end >= size:
+                return None
+
+            end += 1
+
+            if not data[end - 1] & 0x80:
+                break
+
+    if end >= size:
+        return None
+
+    length = data[end]
+    end += 1
+
+    if length == 0x80:
+        raise DecodeError(
+            'expected definite length at offset {}'.format(end - 1))
+    elif length > 127:
+        number_of_bytes = (length & 0x7f)
+
+        if end + number_of_bytes > size:
+            return None
+
+        length = decode_integer(data[end:end + number_of_bytes])
+        end += number_of_bytes
+
+    return end + length
+
+
 def decode_integer(data):
     value = 0
 
@@ -149,6 +206,72 @@ def decode_tag(_data, offset):
     return 0, 0, offset + 1
 
 
+def read_tag(data, offset):
+    """Returns the tag at given offset in given data as bytes, or an
+    empty bytes object if out of data.
+
+    """
+
+    end = offset + 1
+
+    if end <= len(data) and (data[offset] & 0x1f) == 0x1f:
+        while end < len(data) and (data[end] & 0x80):
+            end += 1
+
+        end += 1
+
+    return bytes(data[offset:end])
+
+
+def skip_tlv(data, offset):
+    """Returns the offset after the tag, length and contents at given
+    offset in given data, without decoding the contents.
+
+    """
+
+    offset += len(read_tag(data, offset))
+    length, offset = decode_length_definite(data, offset)
+
+    return offset + length
+
+
+def any_defined_by_decoder(member, values):
+    """Returns a function decoding given ANY DEFINED BY member of a
+    lazily decoded value, using given decoded values.
+
+    """
+
+    def decode(data, offset):
+        return member.decode(data, offset, values)
+
+    return decode
+
+
+def create_tag_index(members):
+    """Returns a dictionary of the tags of given members to the members,
+    used to decode a CHOICE or SET member with a single lookup. An
+    untagged CHOICE member is found by all tags of its members. The
+    first member with a tag is used if the tag is not unique.
+
+    """
+
+    index = {}
+
+    for member in members:
+        if isinstance(member, Choice) and member.tag is None:
+            tags = member.tag_index
+        elif member.tag is not None:
+            tags = [bytes(member.tag)]
+        else:
+            continue
+
+        for tag in tags:
+            if tag not in index:
+                index[tag] = member
+
+    return index
+
+
 class Type(object):
 
     def __init__(self, name, type_name, number, flags=0):
@@ -185,6 +308,12 @@ class Type(object):
 
         return end
 
+    def decode_paths(self, data, offset, _paths):
+        return self.decode(data, offset)
+
+    def decode_lazy(self, data, offset):
+        return self.decode(data, offset)
+
 
 class Integer(Type):
 
@@ -268,7 +397,7 @@ class IA5String(Type):
         length, offset = decode_length_definite(data, offset)
         end = offset + length
 
-        return data[offset:end].decode('ascii'), end
+        return bytes(data[offset:end]).decode('ascii'), end
 
     def __repr__(self):
         return 'IA5String({})'.format(self.name)
@@ -291,7 +420,7 @@ class NumericString(Type):
         length, offset = decode_length_definite(data, offset)
         end = offset + length
 
-        return data[offset:end].decode('ascii'), end
+        return bytes(data[offset:end]).decode('ascii'), end
 
     def __repr__(self):
         return 'NumericString({})'.format(self.name)
@@ -306,12 +435,36 @@ class MembersType(Type):
                                           Encoding.CONSTRUCTED)
         self.members = members
 
+        # The tags of each optional member and member with a default
+        # value, used to find absent members without decoding them. None
+        # for other members and if the tags are unknown.
+        self.absent_member_tags = []
+
+        for member in members:
+            tags = None
+
+            if member.optional or member.default is not None:
+                tags = frozenset(create_tag_index([member]))
+
+                if not tags:
+                    tags = None
+
+            self.absent_member_tags.append(tags)
+
+        # Members needed to decode ANY DEFINED BY members.
+        self.type_member_names = frozenset([
+            member.type_member
+            for member in members
+            if isinstance(member, AnyDefinedBy)
+        ])
+
     def set_tag(self, number, flags):
         super(MembersType, self).set_tag(number,
                                          flags | Encoding.CONSTRUCTED)
 
     def encode(self, data, encoded):
-        encoded_members = bytearray()
+        encoded.extend(self.tag)
+        offset = encode_length_placeholder(encoded)
 
         for member in self.members:
             name = member.name
@@ -320,9 +473,9 @@ class MembersType(Type):
                 value = data[name]
 
                 if isinstance(member, AnyDefinedBy):
-                    member.encode(value, encoded_members, data)
+                    member.encode(value, encoded, data)
                 elif member.default != value or isinstance(member, Null):
-                    member.encode(value, encoded_members)
+                    member.encode(value, encoded)
             elif member.optional:
                 pass
             elif member.default is None:
@@ -331,22 +484,34 @@ class MembersType(Type):
                         name,
                         data))
 
-        encoded.extend(self.tag)
-        encoded.extend(encode_length_definite(len(encoded_members)))
-        encoded.extend(encoded_members)
+        set_length_definite(encoded, offset)
 
     def decode(self, data, offset):
         offset = self.decode_tag(data, offset)
+        length, offset = decode_length_definite(data, offset)
 
-        if data[offset] == 0x80:
-            raise NotImplementedError(
-                'decode until an end-of-contents tag is found')
-        else:
-            _, offset = decode_length_definite(data, offset)
-
+        end = offset + length
         values = {}
 
-        for member in self.members:
+        for member, tags in zip(self.members, self.absent_member_tags):
+            if offset >= end:
+                if member.optional:
+                    continue
+
+                if member.default is None:
+                    e = DecodeError('out of data at offset {}'.format(offset))
+                    e.location.append(member.name)
+                    raise e
+
+                values[member.name] = member.default
+                continue
+
+            if tags is not None and read_tag(data, offset) not in tags:
+                if not member.optional:
+                    values[member.name] = member.default
+
+                continue
+
             try:
                 if isinstance(member, AnyDefinedBy):
                     value, offset = member.decode(data, offset, values)
@@ -369,6 +534,126 @@ class MembersType(Type):
 
         return values, offset
 
+    def decode_paths(self, data, offset, paths):
+        offset = self.decode_tag(data, offset)
+        length, offset = decode_length_definite(data, offset)
+
+        end = offset + length
+        values = {}
+
+        for member, tags in zip(self.members, self.absent_member_tags):
+            name = member.name
+
+            if offset >= end:
+                if member.optional:
+                    continue
+
+                if member.default is None:
+                    e = DecodeError('out of data at offset {}'.format(offset))
+                    e.location.append(name)
+                    raise e
+
+                if name in paths:
+                    values[name] = member.default
+
+                continue
+
+            if tags is not None and read_tag(data, offset) not in tags:
+                if not member.optional and name in paths:
+                    values[name] = member.default
+
+                continue
+
+            try:
+                if name in paths:
+                    member_paths = paths[name]
+
+                    if isinstance(member, AnyDefinedBy):
+                        value, offset = member.decode(data, offset, values)
+                    elif member_paths is None:
+                        value, offset = member.decode(data, offset)
+                    else:
+                        value, offset = member.decode_paths(data,
+                                                            offset,
+                                                            member_paths)
+                elif name in self.type_member_names:
+                    value, offset = member.decode(data, offset)
+                else:
+                    offset = skip_tlv(data, offset)
+                    continue
+            except (DecodeError, IndexError) as e:
+                if member.optional:
+                    continue
+
+                if member.default is None:
+                    if isinstance(e, IndexError):
+                        e = DecodeError('out of data at offset {}'.format(offset))
+
+                    e.location.append(name)
+                    raise e
+
+                value = member.default
+
+            values[name] = value
+
+        for name in self.type_member_names:
+            if name in values and name not in paths:
+                del values[name]
+
+        return values, offset
+
+    def decode_lazy(self, data, offset):
+        offset = self.decode_tag(data, offset)
+        length, offset = decode_length_definite(data, offset)
+
+        end = offset + length
+        items = {}
+        values = LazyDict(data, items)
+
+        for member, tags in zip(self.members, self.absent_member_tags):
+            name = member.name
+
+            if offset >= end or (tags is not None
+                                 and read_tag(data, offset) not in tags):
+                if member.optional:
+                    continue
+
+                if member.default is None:
+                    e = DecodeError('out of data at offset {}'.format(offset))
+                    e.location.append(name)
+                    raise e
+
+                items[name] = member.default
+                continue
+
+            if isinstance(member, AnyDefinedBy):
+                decode = any_defined_by_decoder(member, values)
+            else:
+                decode = member.decode_lazy
+
+            if tags is None and (member.optional
+                                 or member.default is not None):
+                # The member tags are unknown, so the member must be
+                # decoded to find out if it is present.
+                try:
+                    items[name], offset = decode(data, offset)
+                except (DecodeError, IndexError):
+                    if not member.optional:
+                        items[name] = member.default
+
+                continue
+
+            items[name] = Undecoded(decode, offset, name)
+
+            try:
+                offset = skip_tlv(data, offset)
+            except IndexError:
+                e = DecodeError('out of data at offset {}'.format(offset))
+                e.location.append(name)
+                raise e
+
+        return values, end
+
     def __repr__(self):
         return '{}({}, [{}])'.format(
             self.__class__.__name__,
@@ -387,6 +672,117 @@ class Set(MembersType):
     def __init__(self, name, members):
         super(Set, self).__init__(name, 'SET', Tag.SET, members)
 
+        # Members are decoded in any order if all of them can be found
+        # by their tag, otherwise in the order they are defined.
+        if all([member.tag is not None or isinstance(member, Choice)
+                for member in members]):
+            self.tag_index = create_tag_index(members)
+        else:
+            self.tag_index = None
+
+    def decode(self, data, offset):
+        if self.tag_index is None:
+            return super(Set, self).decode(data, offset)
+
+        return self.decode_any_order(data, offset, None)
+
+    def decode_paths(self, data, offset, paths):
+        if self.tag_index is None:
+            return super(Set, self).decode_paths(data, offset, paths)
+
+        return self.decode_any_order(data, offset, paths)
+
+    def decode_lazy(self, data, offset):
+        if self.tag_index is None:
+            return super(Set, self).decode_lazy(data, offset)
+
+        offset = self.decode_tag(data, offset)
+        length, offset = decode_length_definite(data, offset)
+
+        end = offset + length
+        items = {}
+
+        while offset < end:
+            member = self.tag_index.get(read_tag(data, offset))
+
+            if member is not None:
+                items[member.name] = Undecoded(member.decode_lazy,
+                                               offset,
+                                               member.name)
+
+            try:
+                offset = skip_tlv(data, offset)
+            except IndexError:
+                raise DecodeError('out of data at offset {}'.format(offset))
+
+        for member in self.members:
+            if member.name in items or member.optional:
+                continue
+
+            if member.default is None:
+                e = DecodeError('member not found')
+                e.location.append(member.name)
+                raise e
+
+            items[member.name] = member.default
+
+        return LazyDict(data, items), end
+
+    def decode_any_order(self, data, offset, paths):
+        offset = self.decode_tag(data, offset)
+        length, offset = decode_length_definite(data, offset)
+
+        end = offset + length
+        values = {}
+
+        while offset < end:
+            member = self.tag_index.get(read_tag(data, offset))
+
+            if member is None:
+                # Skip unknown members, for example extension
+                # additions.
+                offset = skip_tlv(data, offset)
+                continue
+
+            name = member.name
+
+            try:
+                if paths is None:
+                    value, offset = member.decode(data, offset)
+                elif name not in paths:
+                    offset = skip_tlv(data, offset)
+                    continue
+                elif paths[name] is None:
+                    value, offset = member.decode(data, offset)
+                else:
+                    value, offset = member.decode_paths(data,
+                                                        offset,
+                                                        paths[name])
+            except (DecodeError, IndexError) as e:
+                if isinstance(e, IndexError):
+                    e = DecodeError('out of data at offset {}'.format(offset))
+
+                e.location.append(name)
+                raise e
+
+            values[name] = value
+
+        for member in self.members:
+            if member.name in values or member.optional:
+                continue
+
+            if paths is not None and member.name not in paths:
+                continue
+
+            if member.default is None:
+                e = DecodeError('member not found')
+                e.location.append(member.name)
+                raise e
+
+            values[member.name] = member.default
+
+        return values, end
+
 
 class ArrayType(Type):
 
@@ -402,14 +798,13 @@ class ArrayType(Type):
                                        flags | Encoding.CONSTRUCTED)
 
     def encode(self, data, encoded):
-        encoded_elements = bytearray()
+        encoded.extend(self.tag)
+        offset = encode_length_placeholder(encoded)
 
         for entry in data:
-            self.element_type.encode(entry, encoded_elements)
+            self.element_type.encode(entry, encoded)
 
-        encoded.extend(self.tag)
-        encoded.extend(encode_length_definite(len(encoded_elements)))
-        encoded.extend(encoded_elements)
+        set_length_definite(encoded, offset)
 
     def decode(self, data, offset):
         offset += 1
@@ -423,6 +818,36 @@ class ArrayType(Type):
 
         return decoded, offset
 
+    def decode_paths(self, data, offset, paths):
+        offset += 1
+        length, offset = decode_length_definite(data, offset)
+        decoded = []
+        start_offset = offset
+
+        while (offset - start_offset) < length:
+            decoded_element, offset = self.element_type.decode_paths(data,
+                                                                     offset,
+                                                                     paths)
+            decoded.append(decoded_element)
+
+        return decoded, offset
+
+    def decode_lazy(self, data, offset):
+        offset += 1
+        length, offset = decode_length_definite(data, offset)
+        end = offset + length
+        items = []
+
+        while offset < end:
+            items.append(Undecoded(self.element_type.decode_lazy, offset))
+
+            try:
+                offset = skip_tlv(data, offset)
+            except IndexError:
+                raise DecodeError('out of data at offset {}'.format(offset))
+
+        return LazyList(data, items), end
+
     def __repr__(self):
         return '{}({}, {})'.format(self.__class__.__name__,
                                    self.name,
@@ -472,7 +897,7 @@ class BitString(Type):
         number_of_bits = 8 * (length - 1) - data[offset]
         offset += 1
 
-        return (bytearray(data[offset:end]), number_of_bits), end
+        return (data[offset:end], number_of_bits), end
 
     def __repr__(self):
         return 'BitString({})'.format(self.name)
@@ -495,7 +920,7 @@ class OctetString(Type):
         length, offset = decode_length_definite(data, offset)
         end = offset + length
 
-        return bytearray(data[offset:end]), end
+        return data[offset:end], end
 
     def __repr__(self):
         return 'OctetString({})'.format(self.name)
@@ -518,7 +943,7 @@ class PrintableString(Type):
         length, offset = decode_length_definite(data, offset)
         end = offset + length
 
-        return data[offset:end].decode('ascii'), end
+        return bytes(data[offset:end]).decode('ascii'), end
 
     def __repr__(self):
         return 'PrintableString({})'.format(self.name)
@@ -541,7 +966,7 @@ class UniversalString(Type):
         length, offset = decode_length_definite(data, offset)
         end = offset + length
 
-        return data[offset:end].decode('ascii'), end
+        return bytes(data[offset:end]).decode('ascii'), end
 
     def __repr__(self):
         return 'UniversalString({})'.format(self.name)
@@ -564,7 +989,7 @@ class VisibleString(Type):
         length, offset = decode_length_definite(data, offset)
         end = offset + length
 
-        return data[offset:end].decode('ascii'), end
+        return bytes(data[offset:end]).decode('ascii'), end
 
     def __repr__(self):
         return 'VisibleString({})'.format(self.name)
@@ -587,7 +1012,7 @@ class UTF8String(Type):
         length, offset = decode_length_definite(data, offset)
         end = offset + length
 
-        return data[offset:end].decode('utf-8'), end
+        return bytes(data[offset:end]).decode('utf-8'), end
 
     def __repr__(self):
         return 'UTF8String({})'.format(self.name)
@@ -633,7 +1058,7 @@ class UTCTime(Type):
         length, offset = decode_length_definite(data, offset)
         end = offset + length
 
-        return data[offset:end][:-1].decode('ascii'), end
+        return bytes(data[offset:end - 1]).decode('ascii'), end
 
     def __repr__(self):
         return 'UTCTime({})'.format(self.name)
@@ -747,6 +1172,7 @@ class Choice(Type):
     def __init__(self, name, members):
         super(Choice, self).__init__(name, 'CHOICE', None)
         self.members = members
+        self.tag_index = create_tag_index(members)
 
     def set_tag(self, number, flags):
         super(Choice, self).set_tag(number,
@@ -758,11 +1184,10 @@ class Choice(Type):
                 if self.tag is None:
                     member.encode(data[member.name], encoded)
                 else:
-                    encoded_members = bytearray()
-                    member.encode(data[member.name], encoded_members)
                     encoded.extend(self.tag)
-                    encoded.extend(encode_length_definite(len(encoded_members)))
-                    encoded.extend(encoded_members)
+                    offset = encode_length_placeholder(encoded)
+                    member.encode(data[member.name], encoded)
+                    set_length_definite(encoded, offset)
 
                 return
 
@@ -776,17 +1201,50 @@ class Choice(Type):
             offset = self.decode_tag(data, offset)
             _, offset = decode_length_definite(data, offset)
 
-        for member in self.members:
-            if (isinstance(member, Choice)
-                or member.tag == data[offset:offset + len(member.tag)]):
-                try:
-                    decoded, offset = member.decode(data, offset)
-                except DecodeChoiceError:
-                    pass
-                else:
-                    return {member.name: decoded}, offset
+        member = self.tag_index.get(read_tag(data, offset))
+
+        if member is None:
+            raise DecodeChoiceError()
+
+        decoded, offset = member.decode(data, offset)
+
+        return {member.name: decoded}, offset
+
+    def decode_paths(self, data, offset, paths):
+        if self.tag is not None:
+            offset = self.decode_tag(data, offset)
+            _, offset = decode_length_definite(data, offset)
+
+        member = self.tag_index.get(read_tag(data, offset))
+
+        if member is None:
+            raise DecodeChoiceError()
+
+        if member.name not in paths:
+            return {}, skip_tlv(data, offset)
+
+        member_paths = paths[member.name]
 
-        raise DecodeChoiceError()
+        if member_paths is None:
+            decoded, offset = member.decode(data, offset)
+        else:
+            decoded, offset = member.decode_paths(data, offset, member_paths)
+
+        return {member.name: decoded}, offset
+
+    def decode_lazy(self, data, offset):
+        if self.tag is not None:
+            offset = self.decode_tag(data, offset)
+            _, offset = decode_length_definite(data, offset)
+
+        member = self.tag_index.get(read_tag(data, offset))
+
+        if member is None:
+            raise DecodeChoiceError()
+
+        decoded, offset = member.decode_lazy(data, offset)
+
+        return {member.name: decoded}, offset
 
     def __repr__(self):
         return 'Choice({}, [{}])'.format(
@@ -907,17 +1365,26 @@ class ExplicitTag(Type):
                                          flags | Encoding.CONSTRUCTED)
 
     def encode(self, data, encoded):
-        encoded_inner = bytearray()
-        self.inner.encode(data, encoded_inner)
         encoded.extend(self.tag)
-        encoded.extend(encode_length_definite(len(encoded_inner)))
-        encoded.extend(encoded_inner)
+        offset = encode_length_placeholder(encoded)
+        self.inner.encode(data, encoded)
+        set_length_definite(encoded, offset)
 
     def decode(self, data, offset):
         offset = self.decode_tag(data, offset)
         _, offset = decode_length_definite(data, offset)
         return self.inner.decode(data, offset)
 
+    def decode_paths(self, data, offset, paths):
+        offset = self.decode_tag(data, offset)
+        _, offset = decode_length_definite(data, offset)
+        return self.inner.decode_paths(data, offset, paths)
+
+    def decode_lazy(self, data, offset):
+        offset = self.decode_tag(data, offset)
+        _, offset = decode_length_definite(data, offset)
+        return self.inner.decode_lazy(data, offset)
+
     def __repr__(self):
         return 'Tag()'
 
@@ -943,29 +1410,47 @@ class Recursive(Type):
         return 'Recursive({})'.format(self.name)
 
 
-class CompiledType(object):
-
-    def __init__(self, type_):
-        self._type = type_
+class CompiledType(compiler.CompiledType):
 
     def encode(self, data):
-        encoded = bytearray()
+        encoded = Encoder()
         self._type.encode(data, encoded)
-        return encoded
+        return encoded.finish()
 
-    def decode(self, data):
-        return self._type.decode(bytearray(data), 0)[0]
+    def decode(self, data, zero_copy=False, paths=None, lazy=False):
+        if zero_copy:
+            data = as_memoryview(data)
+        else:
+            data = bytearray(data)
 
-    def __repr__(self):
-        return repr(self._type)
+        if paths is not None:
+            return self._type.decode_paths(data, 0, create_path_tree(paths))[0]
+        elif lazy:
+            return self._type.decode_lazy(data, 0)[0]
+        else:
+            return self._type.decode(data, 0)[0]
+
+    def decode_many(self, data, zero_copy=False, offsets=False):
+        if zero_copy:
+            data = as_memoryview(data)
+        else:
+            data = bytearray(data)
+
+        return decode_many(self._type.decode, decode_end, data, offsets)
+
+    def iter_decode(self, stream, offsets=False):
+        return self.stream_decoder(offsets).read(stream)
+
+    def stream_decoder(self, offsets=False):
+        return StreamDecoder(self._type.decode, decode_end, offsets)
 
 
 class Compiler(compiler.Compiler):
 
-    def process_type(self, type_name, type_descriptor, module_name):
-        return CompiledType(self.compile_type(type_name,
-                                              type_descriptor,
-                                              module_name))
+    def process_type(self, type_name, module_name):
+        return CompiledType(self.compile_user_type(type_name,
+                                                   type_name,
+                                                   module_name))
 
     def compile_implicit_type(self, name, type_descriptor, module_name):
         type_name = type_descriptor['type']
@@ -1045,18 +1530,14 @@ class Compiler(compiler.Compiler):
         elif type_name == 'NULL':
             compiled = Null(name)
         else:
-            if type_name in self.types_backtrace:
+            if self.is_recursive(type_name):
                 compiled = Recursive(name,
                                      type_name,
                                      module_name)
             else:
-                self.types_backtrace_push(type_name)
-                compiled = self.compile_type(
-                    name,
-                    *self.lookup_type_descriptor(
-                        type_name,
-                        module_name))
-                self.types_backtrace_pop()
+                compiled = self.compile_user_type(name,
+                                                  type_name,
+                                                  module_name)
 
         return compiled
 
@@ -1117,8 +1598,8 @@ class Compiler(compiler.Compiler):
         return compiled_members
 
 
-def compile_dict(specification):
-    return Compiler(specification).process()
+def compile_dict(specification, lazy=False, profile=None):
+    return Compiler(specification, profile).process(lazy)
 
 
 def decode_length(data):
@@ -1126,3 +1607,15 @@ def decode_length(data):
         return sum(decode_length_definite(bytearray(data), 1))
     except IndexError:
         raise DecodeError('Not enough data.')
+
+
+def tlv_index(data):
+    index = TlvIndex(data)
+
+    for i in range(len(index)):
+        if index.is_indefinite(i):
+            raise DecodeError(
+                'expected definite length of TLV at offset {}'.format(
+                    index.offsets[i]))
+
+    return index
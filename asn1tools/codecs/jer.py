@@ -564,29 +564,23 @@ class Recursive(Type):
         return 'Recursive({})'.format(self.name)
 
 
-class CompiledType(object):
-
-    def __init__(self, type_):
-        self._type = type_
+class CompiledType(compiler.CompiledType):
 
     def encode(self, data):
         string = json.dumps(self._type.encode(data), separators=(',', ':'))
 
         return string.encode('utf-8')
 
-    def decode(self, data):
+    def decode_value(self, data):
         return self._type.decode(json.loads(data.decode('utf-8')))
 
-    def __repr__(self):
-        return repr(self._type)
-
 
 class Compiler(compiler.Compiler):
 
-    def process_type(self, type_name, type_descriptor, module_name):
-        return CompiledType(self.compile_type(type_name,
-                                              type_descriptor,
-                                              module_name))
+    def process_type(self, type_name, module_name):
+        return CompiledType(self.compile_user_type(type_name,
+                                                   type_name,
+                                                   module_name))
 
     def compile_type(self, name, type_descriptor, module_name):
         type_name = type_descriptor['type']
@@ -663,18 +657,14 @@ class Compiler(compiler.Compiler):
         elif type_name == 'NULL':
             compiled = Null(name)
         else:
-            if type_name in self.types_backtrace:
+            if self.is_recursive(type_name):
                 compiled = Recursive(name,
                                      type_name,
                                      module_name)
             else:
-                self.types_backtrace_push(type_name)
-                compiled = self.compile_type(
-                    name,
-                    *self.lookup_type_descriptor(
-                        type_name,
-                        module_name))
-                self.types_backtrace_pop()
+                compiled = self.compile_user_type(name,
+                                                  type_name,
+                                                  module_name)
 
         return compiled
 
@@ -707,9 +697,13 @@ class Compiler(compiler.Compiler):
         return compiled_members, extension
 
 
-def compile_dict(specification):
-    return Compiler(specification).process()
+def compile_dict(specification, lazy=False, profile=None):
+    return Compiler(specification, profile).process(lazy)
 
 
 def decode_length(_data):
     raise DecodeError('Decode length not supported for this codec.')
+
+
+def tlv_index(_data):
+    raise DecodeError('TLV index not supported for this codec.')
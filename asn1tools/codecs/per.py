@@ -2,6 +2,9 @@
 
 """
 
+import sys
+import binascii
+
 from . import EncodeError
 from . import DecodeError
 from . import compiler
@@ -11,51 +14,103 @@ class DecodeChoiceError(Exception):
     pass
 
 
+if sys.version_info[0] < 3:
+    def bytes_to_integer(data):
+        return int(binascii.hexlify(data), 16)
+
+    def integer_to_bytes(value, number_of_bytes):
+        return bytearray(binascii.unhexlify('{:0{}x}'.format(
+            value,
+            2 * number_of_bytes)))
+else:
+    def bytes_to_integer(data):
+        return int.from_bytes(data, 'big')
+
+    def integer_to_bytes(value, number_of_bytes):
+        return bytearray(value.to_bytes(number_of_bytes, 'big'))
+
+
 class Encoder(object):
+    """Bits are shifted into an integer, `value`, and full bytes are
+    moved from it to the buffer once it holds at least 64 bits. This
+    makes it possible to append many bits at once instead of one at a
+    time.
+
+    """
 
     def __init__(self):
-        self.byte = 0
-        self.index = 7
+        self.value = 0
+        self.number_of_bits = 0
         self.buf = bytearray()
 
+    def flush(self):
+        """Move all full bytes from the integer to the buffer.
+
+        """
+
+        number_of_bytes = (self.number_of_bits >> 3)
+
+        if number_of_bytes == 0:
+            return
+
+        rest = (self.number_of_bits & 0x7)
+        self.buf.extend(
+            binascii.unhexlify('{:0{}x}'.format(self.value >> rest,
+                                                2 * number_of_bytes)))
+        self.value &= ((1 << rest) - 1)
+        self.number_of_bits = rest
+
     def append_bit(self, bit):
         """Append given bit.
 
         """
 
-        self.byte |= (bit << self.index)
-        self.index -= 1
+        self.value = ((self.value << 1) | bit)
+        self.number_of_bits += 1
 
-        if self.index == -1:
-            self.buf.append(self.byte)
-            self.byte = 0
-            self.index = 7
+        if self.number_of_bits >= 64:
+            self.flush()
 
     def append_bits(self, data, number_of_bits):
         """Append given bits.
 
         """
 
-        for i in range(number_of_bits):
-            self.append_bit((bytearray(data)[i // 8] >> (7 - (i % 8))) & 0x1)
+        if number_of_bits == 0:
+            return
+
+        number_of_bytes = ((number_of_bits + 7) >> 3)
+        data = data[:number_of_bytes]
+
+        if self.number_of_bits == 0 and (number_of_bits & 0x7) == 0:
+            self.buf.extend(data)
+        else:
+            value = int(binascii.hexlify(data), 16)
+            self.append_integer(value >> (8 * number_of_bytes - number_of_bits),
+                                number_of_bits)
 
     def append_integer(self, value, number_of_bits):
         """Append given integer value.
 
         """
 
-        for i in range(number_of_bits):
-            self.append_bit((value >> (number_of_bits - i - 1)) & 0x1)
+        self.value = ((self.value << number_of_bits)
+                      | (value & ((1 << number_of_bits) - 1)))
+        self.number_of_bits += number_of_bits
+
+        if self.number_of_bits >= 64:
+            self.flush()
 
     def append_bytes(self, data):
         """Append given data aligned to a byte boundary.
 
         """
 
-        if self.index != 7:
-            self.buf.append(self.byte)
-            self.byte = 0
-            self.index = 7
+        if self.number_of_bits > 0:
+            padding = (-self.number_of_bits & 0x7)
+            self.value <<= padding
+            self.number_of_bits += padding
+            self.flush()
 
         self.buf.extend(data)
 
@@ -64,20 +119,29 @@ class Encoder(object):
 
         """
 
-        if self.index < 7:
-            return self.buf + bytearray([self.byte])
-        else:
+        if self.number_of_bits == 0:
             return self.buf
 
+        number_of_bytes = ((self.number_of_bits + 7) >> 3)
+        value = (self.value << (8 * number_of_bytes - self.number_of_bits))
+
+        return self.buf + binascii.unhexlify('{:0{}x}'.format(
+            value,
+            2 * number_of_bytes))
+
     def __repr__(self):
         return str(self.as_bytearray())
 
 
 class Decoder(object):
+    """Bit fields are read by converting the bytes they span to an
+    integer and shifting and masking it, which makes the time to read
+    a field independent of its number of bits.
+
+    """
 
     def __init__(self, encoded):
-        self.byte = None
-        self.index = 0
+        # Offset in bits.
         self.offset = 0
         self.buf = encoded
 
@@ -86,39 +150,68 @@ class Decoder(object):
 
         """
 
-        if self.index == 0:
-            self.byte = self.buf[self.offset]
-            self.index = 7
-            self.offset += 1
+        offset = self.offset
+        self.offset += 1
 
-        bit = ((self.byte >> self.index) & 0x1)
-        self.index -= 1
-
-        return bit
+        return ((self.buf[offset >> 3] >> (7 - (offset & 0x7))) & 0x1)
 
     def read_integer(self, number_of_bits):
         """Read an integer value of given number of bits.
 
         """
 
-        value = 0
+        if number_of_bits == 0:
+            return 0
+
+        begin = (self.offset >> 3)
+        end = self.offset + number_of_bits
+        end_byte = ((end + 7) >> 3)
+
+        if end_byte > len(self.buf):
+            raise IndexError()
 
-        for _ in range(number_of_bits):
-            value <<= 1
-            value |= self.read_bit()
+        value = bytes_to_integer(self.buf[begin:end_byte])
+        self.offset = end
 
-        return value
+        return ((value >> (8 * end_byte - end)) & ((1 << number_of_bits) - 1))
+
+    def read_bits(self, number_of_bits):
+        """Read given number of bits. They are returned left aligned in
+        a bytearray, with the unused bits of the last byte set to zero.
+
+        """
+
+        number_of_bytes = ((number_of_bits + 7) >> 3)
+
+        if (self.offset & 0x7) == 0:
+            begin = (self.offset >> 3)
+
+            if begin + number_of_bytes > len(self.buf):
+                raise IndexError()
+
+            value = bytearray(self.buf[begin:begin + number_of_bytes])
+            self.offset += number_of_bits
+            rest = (number_of_bits & 0x7)
+
+            if rest != 0:
+                value[-1] &= (0xff00 >> rest) & 0xff
+
+            return value
+
+        value = self.read_integer(number_of_bits)
+
+        return integer_to_bytes(value << (8 * number_of_bytes - number_of_bits),
+                                number_of_bytes)
 
     def read_bytes(self, number_of_bytes):
-        """Read given number of bytes.
+        """Read given number of bytes aligned to a byte boundary.
 
         """
 
-        self.index = 0
-        data = self.buf[self.offset:self.offset + number_of_bytes]
-        self.offset += number_of_bytes
+        begin = ((self.offset + 7) >> 3)
+        self.offset = 8 * (begin + number_of_bytes)
 
-        return data
+        return self.buf[begin:begin + number_of_bytes]
 
 
 def encode_signed_integer(data):
@@ -271,16 +364,34 @@ class Sequence(Type):
                           for member in members
                           if member.optional]
 
+        # The preamble has one bit per OPTIONAL member, telling if it
+        # is present. It is appended and read as one integer, and the
+        # mask of each member is its bit in it, or zero if the member
+        # is not OPTIONAL.
+        masks = {}
+
+        for i, optional in enumerate(reversed(self.optionals)):
+            masks[optional] = (1 << i)
+
+        self.preamble = [(name, masks[name]) for name in self.optionals]
+        self.members_with_masks = [
+            (member, member.name, masks.get(member.name, 0))
+            for member in members
+        ]
+
     def encode(self, data, encoder):
-        for optional in self.optionals:
-            encoder.append_bit(optional in data)
+        preamble = 0
 
-        for member in self.members:
-            name = member.name
+        for name, mask in self.preamble:
+            if name in data:
+                preamble |= mask
+
+        encoder.append_integer(preamble, len(self.optionals))
 
+        for member, name, mask in self.members_with_masks:
             if name in data:
                 member.encode(data[name], encoder)
-            elif member.optional:
+            elif mask != 0:
                 pass
             elif member.default is not None:
                 member.encode(member.default, encoder)
@@ -292,12 +403,10 @@ class Sequence(Type):
 
     def decode(self, decoder):
         values = {}
+        preamble = decoder.read_integer(len(self.optionals))
 
-        optionals = {optional: decoder.read_bit()
-                     for optional in self.optionals}
-
-        for member in self.members:
-            if not optionals.get(member.name, True):
+        for member, name, mask in self.members_with_masks:
+            if mask != 0 and not preamble & mask:
                 continue
 
             try:
@@ -310,12 +419,12 @@ class Sequence(Type):
                     if isinstance(e, IndexError):
                         e = DecodeError('out of data at offset {}'.format(-1))
 
-                    e.location.append(member.name)
+                    e.location.append(name)
                     raise e
 
                 value = member.default
 
-            values[member.name] = value
+            values[name] = value
 
         return values
 
@@ -755,30 +864,24 @@ class Recursive(Type):
         return 'Recursive({})'.format(self.name)
 
 
-class CompiledType(object):
-
-    def __init__(self, type_):
-        self._type = type_
+class CompiledType(compiler.CompiledType):
 
     def encode(self, data):
         encoder = Encoder()
         self._type.encode(data, encoder)
         return encoder.as_bytearray()
 
-    def decode(self, data):
+    def decode_value(self, data):
         decoder = Decoder(bytearray(data))
         return self._type.decode(decoder)
 
-    def __repr__(self):
-        return repr(self._type)
-
 
 class Compiler(compiler.Compiler):
 
-    def process_type(self, type_name, type_descriptor, module_name):
-        return CompiledType(self.compile_type(type_name,
-                                              type_descriptor,
-                                              module_name))
+    def process_type(self, type_name, module_name):
+        return CompiledType(self.compile_user_type(type_name,
+                                                   type_name,
+                                                   module_name))
 
     def compile_type(self, name, type_descriptor, module_name):
         if '.' in type_descriptor['type']:
@@ -856,18 +959,14 @@ class Compiler(compiler.Compiler):
         elif type_name == 'OpenType':
             compiled = OpenType(name)
         else:
-            if type_name in self.types_backtrace:
+            if self.is_recursive(type_name):
                 compiled = Recursive(name,
                                      type_name,
                                      module_name)
             else:
-                self.types_backtrace_push(type_name)
-                compiled = self.compile_type(
-                    name,
-                    *self.lookup_type_descriptor(
-                        type_name,
-                        module_name))
-                self.types_backtrace_pop()
+                compiled = self.compile_user_type(name,
+                                                  type_name,
+                                                  module_name)
 
         return compiled
 
@@ -893,9 +992,13 @@ class Compiler(compiler.Compiler):
         return compiled_members
 
 
-def compile_dict(specification):
-    return Compiler(specification).process()
+def compile_dict(specification, lazy=False, profile=None):
+    return Compiler(specification, profile).process(lazy)
 
 
 def decode_length(_data):
     raise DecodeError('Decode length not supported for this codec.')
+
+
+def tlv_index(_data):
+    raise DecodeError('TLV index not supported for this codec.')
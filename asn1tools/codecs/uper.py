@@ -11,6 +11,10 @@ from . import DecodeError
 from . import compiler
 from .per import encode_signed_integer
 from .per import decode_signed_integer
+from .per import Encoder as PerEncoder
+from .per import Decoder as PerDecoder
+from .per import bytes_to_integer
+from .per import integer_to_bytes
 
 
 LOGGER = logging.getLogger(__name__)
@@ -28,11 +32,33 @@ CLASS_PRIO = {
 }
 
 
+# Number of characters packed into an integer at a time when encoding
+# and decoding strings. Shifting longer integers gets slow.
+CHARACTERS_PER_CHUNK = 64
+
+
+def create_translation_table(mapping):
+    """Returns given mapping of byte values as a table for
+    bytes.translate(). Values not in the mapping are translated to
+    0xff, which is not a valid character or index.
+
+    """
+
+    table = bytearray(256 * b'\xff')
+
+    for key, value in mapping.items():
+        table[key] = value
+
+    return bytes(table)
+
+
 class PermittedAlphabet(object):
 
     def __init__(self, encode_map, decode_map):
         self.encode_map = encode_map
         self.decode_map = decode_map
+        self.encode_table = create_translation_table(encode_map)
+        self.decode_table = create_translation_table(decode_map)
 
     def __len__(self):
         return len(self.encode_map)
@@ -44,129 +70,27 @@ class PermittedAlphabet(object):
         return self.decode_map[value]
 
 
-class Encoder(object):
-
-    def __init__(self):
-        self.byte = 0
-        self.index = 7
-        self.buf = bytearray()
-
-    def append_bit(self, bit):
-        """Append given bit.
-
-        """
-
-        self.byte |= (bit << self.index)
-        self.index -= 1
-
-        if self.index == -1:
-            self.buf.append(self.byte)
-            self.byte = 0
-            self.index = 7
-
-    def append_bits(self, data, number_of_bits):
-        """Append given bits.
-
-        """
-
-        for i in range(number_of_bits):
-            self.append_bit((bytearray(data)[i // 8] >> (7 - (i % 8))) & 0x1)
-
-    def append_integer(self, value, number_of_bits):
-        """Append given integer value.
-
-        """
-
-        for i in range(number_of_bits):
-            self.append_bit((value >> (number_of_bits - i - 1)) & 0x1)
+class Encoder(PerEncoder):
 
     def append_bytes(self, data):
-        """Append given data aligned to a byte boundary.
+        """Append given data, not aligned to a byte boundary.
 
         """
 
         self.append_bits(data, 8 * len(data))
 
-    def as_bytearray(self):
-        """Return the bits as a bytearray.
-
-        """
-
-        if self.index < 7:
-            return self.buf + bytearray([self.byte])
-        else:
-            return self.buf
-
     def __repr__(self):
         return binascii.hexlify(self.as_bytearray())
 
 
-class Decoder(object):
-
-    def __init__(self, encoded):
-        self.byte = None
-        self.index = -1
-        self.offset = 0
-        self.buf = encoded
-
-    def read_bit(self):
-        """Read a bit.
-
-        """
-
-        if self.index == -1:
-            self.byte = self.buf[self.offset]
-            self.index = 7
-            self.offset += 1
-
-        bit = ((self.byte >> self.index) & 0x1)
-        self.index -= 1
-
-        return bit
-
-    def read_bits(self, number_of_bits):
-        """Read given number of bits.
-
-        """
-
-        value = bytearray()
-        byte = 0
-
-        for i in range(number_of_bits):
-            index = i % 8
-            byte |= (self.read_bit() << (7 - index))
-
-            if index == 7:
-                value.append(byte)
-                byte = 0
-
-        if number_of_bits % 8 != 0:
-            value.append(byte)
-
-        return value
-
-    def read_integer(self, number_of_bits):
-        """Read an integer value of given number of bits.
-
-        """
-
-        value = 0
-
-        for _ in range(number_of_bits):
-            value <<= 1
-            value |= self.read_bit()
-
-        return value
+class Decoder(PerDecoder):
 
     def read_bytes(self, number_of_bytes):
-        """Read given number of bytes.
+        """Read given number of bytes, not aligned to a byte boundary.
 
         """
 
-        self.index = -1
-        data = self.buf[self.offset:self.offset + number_of_bytes]
-        self.offset += number_of_bytes
-        return data
+        return self.read_bits(8 * number_of_bytes)
 
 
 def size_as_number_of_bits(size):
@@ -179,6 +103,15 @@ def size_as_number_of_bits(size):
 
 
 class Type(object):
+    """Types whose values are always encoded in the same number of bits,
+    `fixed_number_of_bits`, also implement pack() and unpack(), which
+    convert a value to and from an integer of that number of bits. A
+    SEQUENCE of only such types packs all its members into one
+    integer, which is appended and read at once.
+
+    """
+
+    fixed_number_of_bits = None
 
     def __init__(self, name, type_name):
         self.name = name
@@ -203,6 +136,13 @@ class Integer(Type):
         else:
             size = self.maximum - self.minimum
             self.number_of_bits = size_as_number_of_bits(size)
+            self.fixed_number_of_bits = self.number_of_bits
+
+    def pack(self, data):
+        return data - self.minimum
+
+    def unpack(self, value):
+        return value + self.minimum
 
     def encode(self, data, encoder):
         if self.number_of_bits is None:
@@ -241,9 +181,17 @@ class Real(Type):
 
 class Boolean(Type):
 
+    fixed_number_of_bits = 1
+
     def __init__(self, name):
         super(Boolean, self).__init__(name, 'BOOLEAN')
 
+    def pack(self, data):
+        return 1 if data else 0
+
+    def unpack(self, value):
+        return bool(value)
+
     def encode(self, data, encoder):
         encoder.append_bit(bool(data))
 
@@ -254,30 +202,6 @@ class Boolean(Type):
         return 'Boolean({})'.format(self.name)
 
 
-class IA5String(Type):
-
-    def __init__(self, name):
-        super(IA5String, self).__init__(name, 'IA5String')
-
-    def encode(self, data, encoder):
-        encoder.append_bytes(bytearray([len(data)]))
-
-        for byte in bytearray(data.encode('ascii')):
-            encoder.append_bits(bytearray([(byte << 1) & 0xff]), 7)
-
-    def decode(self, decoder):
-        length = decoder.read_integer(8)
-        data = []
-
-        for _ in range(length):
-            data.append(decoder.read_integer(7))
-
-        return bytearray(data).decode('ascii')
-
-    def __repr__(self):
-        return 'IA5String({})'.format(self.name)
-
-
 class NumericString(Type):
 
     def __init__(self, name):
@@ -293,10 +217,10 @@ class NumericString(Type):
         return 'NumericString({})'.format(self.name)
 
 
-class Sequence(Type):
+class MembersType(Type):
 
-    def __init__(self, name, members, extension):
-        super(Sequence, self).__init__(name, 'SEQUENCE')
+    def __init__(self, name, type_name, members, extension):
+        super(MembersType, self).__init__(name, type_name)
         self.members = members
         self.extension = extension
         self.optionals = [
@@ -305,130 +229,159 @@ class Sequence(Type):
             if member.optional or member.default is not None
         ]
 
-    def encode(self, data, encoder):
-        if self.extension is not None:
-            if len(self.extension) == 0:
-                encoder.append_bit(0)
-            else:
-                raise NotImplementedError()
+        # The preamble is the extension bit, if any, followed by one
+        # bit per OPTIONAL or DEFAULT member, telling if it is
+        # encoded. It is appended and read as one integer, and the
+        # mask of each member is its bit in it, or zero if the member
+        # is always encoded.
+        self.number_of_preamble_bits = len(self.optionals)
 
-        for optional in self.optionals:
-            if optional.optional:
-                encoder.append_bit(optional.name in data)
-            elif optional.name in data:
-                encoder.append_bit(data[optional.name] != optional.default)
-            else:
-                encoder.append_bit(0)
+        if extension is not None:
+            self.number_of_preamble_bits += 1
 
-        for member in self.members:
-            name = member.name
+        masks = {}
 
-            if name in data:
-                if member.default is None:
-                    member.encode(data[name], encoder)
-                elif data[name] != member.default:
-                    member.encode(data[name], encoder)
-            elif member.optional or member.default is not None:
-                pass
-            else:
-                raise EncodeError(
-                    "Sequence member '{}' not found in {}.".format(
-                        name,
-                        data))
+        for i, optional in enumerate(reversed(self.optionals)):
+            masks[optional.name] = (1 << i)
 
-    def decode(self, decoder):
-        if self.extension is not None:
-            if len(self.extension) == 0:
-                decoder.read_bit()
-            else:
-                raise NotImplementedError()
+        self.preamble = [
+            (member.name, masks[member.name], member.default)
+            for member in self.optionals
+        ]
+        self.members_with_masks = [
+            (member, member.name, masks.get(member.name, 0))
+            for member in members
+        ]
+        self.layout = self.create_layout()
 
-        values = {}
-        optionals = {
-            optional: decoder.read_bit()
-            for optional in self.optionals
-        }
+        if self.layout is not None:
+            self.fixed_number_of_bits = sum([
+                member.fixed_number_of_bits for member in members
+            ])
 
-        for member in self.members:
-            if optionals.get(member, True):
-                value = member.decode(decoder)
-                values[member.name] = value
-            elif member.default is not None:
-                values[member.name] = member.default
+            if extension is not None:
+                # The extension bit is always zero.
+                self.fixed_number_of_bits += 1
 
-        return values
+    def create_layout(self):
+        """Returns a list of the name, member, shift and mask of all
+        members in the integer all members are packed into, or None if
+        not all members are always encoded in the same number of
+        bits.
 
-    def __repr__(self):
-        return 'Sequence({}, [{}])'.format(
-            self.name,
-            ', '.join([repr(member) for member in self.members]))
+        """
 
+        if self.optionals:
+            return None
 
-class Set(Type):
+        if self.extension is not None and len(self.extension) > 0:
+            return None
 
-    def __init__(self, name, members, extension):
-        super(Set, self).__init__(name, 'SET')
-        self.members = members
-        self.extension = extension
-        self.optionals = [
-            member
-            for member in members
-            if member.optional or member.default is not None
-        ]
+        for member in self.members:
+            if member.fixed_number_of_bits is None:
+                return None
 
-    def encode(self, data, encoder):
-        if self.extension is not None:
-            if len(self.extension) == 0:
-                encoder.append_bit(0)
-            else:
-                raise NotImplementedError()
+        layout = []
+        shift = 0
 
-        for optional in self.optionals:
-            if optional.optional:
-                encoder.append_bit(optional.name in data)
-            elif optional.name in data:
-                encoder.append_bit(data[optional.name] != optional.default)
-            else:
-                encoder.append_bit(0)
+        for member in reversed(self.members):
+            mask = ((1 << member.fixed_number_of_bits) - 1)
+            layout.append((member.name, member, shift, mask))
+            shift += member.fixed_number_of_bits
 
-        for member in self.members:
-            name = member.name
+        layout.reverse()
 
-            if name in data:
-                if member.default is None:
-                    member.encode(data[name], encoder)
-                elif data[name] != member.default:
-                    member.encode(data[name], encoder)
-            elif member.optional or member.default is not None:
-                pass
-            else:
+        return layout
+
+    def pack(self, data):
+        value = 0
+
+        for name, member, shift, mask in self.layout:
+            try:
+                member_data = data[name]
+            except KeyError:
                 raise EncodeError(
-                    "Set member '{}' not found in {}.".format(
+                    "{} member '{}' not found in {}.".format(
+                        self.type_name.capitalize(),
                         name,
                         data))
 
+            value |= ((member.pack(member_data) & mask) << shift)
+
+        return value
+
+    def unpack(self, value):
+        return {
+            name: member.unpack((value >> shift) & mask)
+            for name, member, shift, mask in self.layout
+        }
+
+    def encode(self, data, encoder):
+        if self.layout is not None:
+            encoder.append_integer(self.pack(data), self.fixed_number_of_bits)
+
+            return
+
+        if self.extension is not None and len(self.extension) > 0:
+            raise NotImplementedError()
+
+        preamble = 0
+
+        for name, mask, default in self.preamble:
+            if name in data:
+                if default is None or data[name] != default:
+                    preamble |= mask
+
+        encoder.append_integer(preamble, self.number_of_preamble_bits)
+
+        for member, name, mask in self.members_with_masks:
+            if mask == 0:
+                if name not in data:
+                    raise EncodeError(
+                        "{} member '{}' not found in {}.".format(
+                            self.type_name.capitalize(),
+                            name,
+                            data))
+
+                member.encode(data[name], encoder)
+            elif preamble & mask:
+                member.encode(data[name], encoder)
+
     def decode(self, decoder):
-        if self.extension is not None:
-            if len(self.extension) == 0:
-                decoder.read_bit()
-            else:
-                raise NotImplementedError()
+        if self.layout is not None:
+            return self.unpack(decoder.read_integer(self.fixed_number_of_bits))
+
+        if self.extension is not None and len(self.extension) > 0:
+            raise NotImplementedError()
 
+        preamble = decoder.read_integer(self.number_of_preamble_bits)
         values = {}
-        optionals = {
-            optional: decoder.read_bit()
-            for optional in self.optionals
-        }
 
-        for member in self.members:
-            if optionals.get(member, True):
-                value = member.decode(decoder)
-                values[member.name] = value
+        for member, name, mask in self.members_with_masks:
+            if mask == 0 or preamble & mask:
+                values[name] = member.decode(decoder)
             elif member.default is not None:
-                values[member.name] = member.default
+                values[name] = member.default
 
         return values
 
+
+class Sequence(MembersType):
+
+    def __init__(self, name, members, extension):
+        super(Sequence, self).__init__(name, 'SEQUENCE', members, extension)
+
+    def __repr__(self):
+        return 'Sequence({}, [{}])'.format(
+            self.name,
+            ', '.join([repr(member) for member in self.members]))
+
+
+class Set(MembersType):
+
+    def __init__(self, name, members, extension):
+        super(Set, self).__init__(name, 'SET', members, extension)
+
     def __repr__(self):
         return 'Set({}, [{}])'.format(
             self.name,
@@ -509,6 +462,25 @@ class BitString(Type):
             size = self.maximum - self.minimum
             self.number_of_bits = size_as_number_of_bits(size)
 
+            if minimum == maximum:
+                self.fixed_number_of_bits = minimum
+
+    def pack(self, data):
+        number_of_bytes = ((self.minimum + 7) >> 3)
+
+        if number_of_bytes == 0:
+            return 0
+
+        value = bytes_to_integer(data[0][:number_of_bytes])
+
+        return (value >> (8 * number_of_bytes - self.minimum))
+
+    def unpack(self, value):
+        number_of_bytes = ((self.minimum + 7) >> 3)
+        value <<= (8 * number_of_bytes - self.minimum)
+
+        return (integer_to_bytes(value, number_of_bytes), self.minimum)
+
     def encode(self, data, encoder):
         if self.number_of_bits is None:
             encoder.append_bytes(bytearray([data[1]]) + data[0])
@@ -576,21 +548,6 @@ class OctetString(Type):
         return 'OctetString({})'.format(self.name)
 
 
-class PrintableString(Type):
-
-    def __init__(self, name):
-        super(PrintableString, self).__init__(name, 'PrintableString')
-
-    def encode(self, data, encoder):
-        raise NotImplementedError()
-
-    def decode(self, decoder):
-        raise NotImplementedError()
-
-    def __repr__(self):
-        return 'PrintableString({})'.format(self.name)
-
-
 class UniversalString(Type):
 
     def __init__(self, name):
@@ -606,10 +563,15 @@ class UniversalString(Type):
         return 'UniversalString({})'.format(self.name)
 
 
-class VisibleString(Type):
+class KnownMultiplierStringType(Type):
 
-    def __init__(self, name, minimum, maximum, permitted_alphabet):
-        super(VisibleString, self).__init__(name, 'VisibleString')
+    def __init__(self,
+                 name,
+                 type_name,
+                 minimum=None,
+                 maximum=None,
+                 permitted_alphabet=None):
+        super(KnownMultiplierStringType, self).__init__(name, type_name)
         self.set_size_range(minimum, maximum)
         self.permitted_alphabet = permitted_alphabet
 
@@ -636,33 +598,107 @@ class VisibleString(Type):
             encoder.append_integer(len(data) - self.minimum,
                                    self.number_of_bits)
 
-        for value in bytearray(data.encode('ascii')):
-            if self.permitted_alphabet is not None:
-                value = self.permitted_alphabet.encode(value)
+        encoded = data.encode('ascii')
+
+        if self.permitted_alphabet is not None:
+            encoded = encoded.translate(self.permitted_alphabet.encode_table)
+
+            if b'\xff' in encoded:
+                raise EncodeError(
+                    "expected characters in the permitted alphabet, but "
+                    "got '{}'".format(data))
+
+        bits_per_character = self.bits_per_character
+
+        for offset in range(0, len(encoded), CHARACTERS_PER_CHUNK):
+            chunk = bytearray(encoded[offset:offset + CHARACTERS_PER_CHUNK])
+            value = 0
+
+            for byte in chunk:
+                value = ((value << bits_per_character) | byte)
 
-            encoder.append_bits(
-                bytearray([(value << (8 - self.bits_per_character)) & 0xff]),
-                self.bits_per_character)
+            encoder.append_integer(value, bits_per_character * len(chunk))
 
     def decode(self, decoder):
         if self.number_of_bits is None:
             length = decoder.read_integer(8)
         elif self.minimum != self.maximum:
-            length = decoder.read_integer(self.number_of_bits) + 1
+            length = decoder.read_integer(self.number_of_bits) + self.minimum
         else:
             length = self.minimum
 
-        data = []
+        bits_per_character = self.bits_per_character
+        mask = ((1 << bits_per_character) - 1)
+        data = bytearray()
+
+        for offset in range(0, length, CHARACTERS_PER_CHUNK):
+            number_of_characters = min(length - offset, CHARACTERS_PER_CHUNK)
+            value = decoder.read_integer(bits_per_character
+                                         * number_of_characters)
+            data.extend([
+                ((value >> shift) & mask)
+                for shift in range(
+                        bits_per_character * (number_of_characters - 1),
+                        -1,
+                        -bits_per_character)
+            ])
+
+        if self.permitted_alphabet is not None:
+            data = data.translate(self.permitted_alphabet.decode_table)
+
+            if b'\xff' in data:
+                raise DecodeError(
+                    'expected character indexes in the permitted alphabet')
+
+        return data.decode('ascii')
+
+
+class IA5String(KnownMultiplierStringType):
+
+    def __init__(self,
+                 name,
+                 minimum=None,
+                 maximum=None,
+                 permitted_alphabet=None):
+        super(IA5String, self).__init__(name,
+                                        'IA5String',
+                                        minimum,
+                                        maximum,
+                                        permitted_alphabet)
 
-        for _ in range(length):
-            value = decoder.read_integer(self.bits_per_character)
+    def __repr__(self):
+        return 'IA5String({})'.format(self.name)
+
+
+class PrintableString(KnownMultiplierStringType):
+
+    def __init__(self,
+                 name,
+                 minimum=None,
+                 maximum=None,
+                 permitted_alphabet=None):
+        super(PrintableString, self).__init__(name,
+                                              'PrintableString',
+                                              minimum,
+                                              maximum,
+                                              permitted_alphabet)
+
+    def __repr__(self):
+        return 'PrintableString({})'.format(self.name)
 
-            if self.permitted_alphabet is not None:
-                value = self.permitted_alphabet.decode(value)
 
-            data.append(value)
+class VisibleString(KnownMultiplierStringType):
 
-        return bytearray(data).decode('ascii')
+    def __init__(self,
+                 name,
+                 minimum=None,
+                 maximum=None,
+                 permitted_alphabet=None):
+        super(VisibleString, self).__init__(name,
+                                            'VisibleString',
+                                            minimum,
+                                            maximum,
+                                            permitted_alphabet)
 
     def __repr__(self):
         return 'VisibleString({})'.format(self.name)
@@ -810,9 +846,17 @@ class Choice(Type):
 
 class Null(Type):
 
+    fixed_number_of_bits = 0
+
     def __init__(self, name):
         super(Null, self).__init__(name, 'NULL')
 
+    def pack(self, _):
+        return 0
+
+    def unpack(self, _):
+        return None
+
     def encode(self, _, _encoder):
         pass
 
@@ -854,6 +898,30 @@ class Enumerated(Type):
         highest_value -= self.lowest_value
 
         self.number_of_bits = size_as_number_of_bits(highest_value)
+        self.encode_map = {name: value - self.lowest_value
+                           for value, name in values.items()}
+
+        if extension is None:
+            self.fixed_number_of_bits = self.number_of_bits
+        elif len(extension) == 0:
+            # The extension bit is always zero.
+            self.fixed_number_of_bits = self.number_of_bits + 1
+
+    def pack(self, data):
+        try:
+            return self.encode_map[data]
+        except KeyError:
+            raise EncodeError(
+                "Enumeration value '{}' not found in {}.".format(
+                    data,
+                    [value for value in self.values.values()]))
+
+    def unpack(self, value):
+        if value >> self.number_of_bits:
+            raise DecodeError(
+                'expected enumeration value in the extension root')
+
+        return self.values[value + self.lowest_value]
 
     def encode(self, data, encoder):
         if self.extension is not None:
@@ -876,7 +944,9 @@ class Enumerated(Type):
     def decode(self, decoder):
         if self.extension is not None:
             if len(self.extension) == 0:
-                decoder.read_bit()
+                if decoder.read_bit():
+                    raise DecodeError(
+                        'expected enumeration value in the extension root')
             else:
                 raise NotImplementedError()
 
@@ -925,30 +995,24 @@ class ExplicitTag(Type):
         return 'Tag()'
 
 
-class CompiledType(object):
-
-    def __init__(self, type_):
-        self._type = type_
+class CompiledType(compiler.CompiledType):
 
     def encode(self, data):
         encoder = Encoder()
         self._type.encode(data, encoder)
         return encoder.as_bytearray()
 
-    def decode(self, data):
+    def decode_value(self, data):
         decoder = Decoder(bytearray(data))
         return self._type.decode(decoder)
 
-    def __repr__(self):
-        return repr(self._type)
-
 
 class Compiler(compiler.Compiler):
 
-    def process_type(self, type_name, type_descriptor, module_name):
-        return CompiledType(self.compile_type(type_name,
-                                              type_descriptor,
-                                              module_name))
+    def process_type(self, type_name, module_name):
+        return CompiledType(self.compile_user_type(type_name,
+                                                   type_name,
+                                                   module_name))
 
     def compile_type(self, name, type_descriptor, module_name):
         type_name = type_descriptor['type']
@@ -1011,17 +1075,20 @@ class Compiler(compiler.Compiler):
         elif type_name == 'NumericString':
             compiled = NumericString(name)
         elif type_name == 'PrintableString':
-            compiled = PrintableString(name)
+            compiled = self.compile_known_multiplier_string(PrintableString,
+                                                            name,
+                                                            type_descriptor,
+                                                            module_name)
         elif type_name == 'IA5String':
-            compiled = IA5String(name)
+            compiled = self.compile_known_multiplier_string(IA5String,
+                                                            name,
+                                                            type_descriptor,
+                                                            module_name)
         elif type_name == 'VisibleString':
-            minimum, maximum = self.get_size_range(type_descriptor,
-                                                   module_name)
-            permitted_alphabet = self.get_permitted_alphabet(type_descriptor)
-            compiled = VisibleString(name,
-                                     minimum,
-                                     maximum,
-                                     permitted_alphabet)
+            compiled = self.compile_known_multiplier_string(VisibleString,
+                                                            name,
+                                                            type_descriptor,
+                                                            module_name)
         elif type_name == 'UTF8String':
             compiled = UTF8String(name)
         elif type_name == 'BMPString':
@@ -1043,18 +1110,14 @@ class Compiler(compiler.Compiler):
         elif type_name == 'NULL':
             compiled = Null(name)
         else:
-            if type_name in self.types_backtrace:
+            if self.is_recursive(type_name):
                 compiled = Recursive(name,
                                      type_name,
                                      module_name)
             else:
-                self.types_backtrace_push(type_name)
-                compiled = self.compile_type(
-                    name,
-                    *self.lookup_type_descriptor(
-                        type_name,
-                        module_name))
-                self.types_backtrace_pop()
+                compiled = self.compile_user_type(name,
+                                                  type_name,
+                                                  module_name)
 
         # Set any given tag.
         if 'tag' in type_descriptor:
@@ -1116,6 +1179,16 @@ class Compiler(compiler.Compiler):
 
         return compiled_members, extension
 
+    def compile_known_multiplier_string(self,
+                                        class_,
+                                        name,
+                                        type_descriptor,
+                                        module_name):
+        minimum, maximum = self.get_size_range(type_descriptor, module_name)
+        permitted_alphabet = self.get_permitted_alphabet(type_descriptor)
+
+        return class_(name, minimum, maximum, permitted_alphabet)
+
     def get_permitted_alphabet(self, type_descriptor):
         def char_range(begin, end):
             return ''.join([chr(char)
@@ -1138,9 +1211,13 @@ class Compiler(compiler.Compiler):
             return PermittedAlphabet(encode_map, decode_map)
 
 
-def compile_dict(specification):
-    return Compiler(specification).process()
+def compile_dict(specification, lazy=False, profile=None):
+    return Compiler(specification, profile).process(lazy)
 
 
 def decode_length(_data):
     raise DecodeError('Decode length not supported for this codec.')
+
+
+def tlv_index(_data):
+    raise DecodeError('TLV index not supported for this codec.')
@@ -3,8 +3,17 @@ encode and decode types.
 
 """
 
+import gc
+import pickle
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
 from .parser import parse_files
 from .parser import parse_string
+from .parser import _parse_files_profiled
 from .codecs import compiler
 from .codecs import ber
 from .codecs import der
@@ -13,6 +22,38 @@ from .codecs import per
 from .codecs import uper
 from .codecs import xer
 from .errors import CompileError
+from .profile import Profile
+from .profile import approximate_size
+from . import cache
+
+
+# Identifies a file written by Specification.save() and the version of
+# its format.
+SAVED_MAGIC = b'asn1tools-specification'
+SAVED_FORMAT_VERSION = 1
+
+
+class _LazyTypes(Mapping):
+    """All types in a specification by name. Each type is compiled on
+    first access by the lazy types mapping of its module.
+
+    """
+
+    def __init__(self, modules, module_names):
+        self._modules = modules
+        self._module_names = module_names
+
+    def __getitem__(self, type_name):
+        return self._modules[self._module_names[type_name]][type_name]
+
+    def __contains__(self, type_name):
+        return type_name in self._module_names
+
+    def __iter__(self):
+        return iter(self._module_names)
+
+    def __len__(self):
+        return len(self._module_names)
 
 
 class Specification(object):
@@ -26,28 +67,37 @@ class Specification(object):
 
     """
 
-    def __init__(self, modules, decode_length):
+    def __init__(self, modules, decode_length, lazy=False, tlv_index=None):
         self._modules = modules
         self._decode_length = decode_length
-        self._types = {}
+        self._tlv_index = tlv_index
+        self._profile = None
+        module_names = {}
 
         try:
             for module_name in modules:
-                types = modules[module_name]
-
-                for type_name in types:
-                    if type_name in self._types:
+                for type_name in modules[module_name]:
+                    if type_name in module_names:
                         raise CompileError()
 
-                    self._types[type_name] = types[type_name]
+                    module_names[type_name] = module_name
 
+            if lazy:
+                self._types = _LazyTypes(modules, module_names)
+            else:
+                self._types = {
+                    type_name: modules[module_name][type_name]
+                    for type_name, module_name in module_names.items()
+                }
         except CompileError:
             self._types = None
 
     @property
     def types(self):
         """A dictionary of all types in the specification, or ``None`` if a
-        type name was found in two or more modules.
+        type name was found in two or more modules. If compiled with
+        `lazy` set to ``True``, this is a mapping compiling each type on
+        first access.
 
         """
 
@@ -61,6 +111,16 @@ class Specification(object):
 
         return self._modules
 
+    @property
+    def profile(self):
+        """A :class:`~asn1tools.profile.Profile` of compiling the
+        specification if compiled with `profile` set to ``True``,
+        otherwise ``None``.
+
+        """
+
+        return self._profile
+
     def encode(self, name, data):
         """Encode given dictionary `data` as given type `name` and return the
         encoded data as a bytes object.
@@ -75,16 +135,135 @@ class Specification(object):
 
         return self._types[name].encode(data)
 
-    def decode(self, name, data):
+    def encode_stream(self, name, data, stream):
+        """Encode given iterable `data` as given SEQUENCE OF or SET OF type
+        `name` and write the encoded data to given file-like object
+        `stream`, one element at a time. The encoded data has an
+        indefinite length, so only the current element is kept in
+        memory, and `data` may for example be a generator.
+
+        This method is only implemented for the BER codec, as the
+        other codecs do not have indefinite lengths.
+
+        Here ``Questions`` is defined as ``SEQUENCE OF Question``.
+
+        >>> questions = ({'id': i, 'question': 'Is 1+1=3?'}
+        ...              for i in range(1000000))
+        >>> with open('questions.ber', 'wb') as fout:
+        ...     foo.encode_stream('Questions', questions, fout)
+
+        """
+
+        self._types[name].encode_stream(data, stream)
+
+    def decode(self, name, data, zero_copy=False, paths=None, lazy=False):
         """Decode given bytes object `data` as given type `name` and return
         the decoded data as a dictionary.
 
+        Give `zero_copy` as ``True`` to decode `data`, a bytes,
+        bytearray, memoryview or mmap object, without copying it. OCTET
+        STRING and BIT STRING values, and ANY and ANY DEFINED BY
+        values not decoded as a type, are then memoryview slices of
+        `data` instead of bytearrays. This saves time and memory for
+        large messages, but `data` must not be modified while the
+        decoded values are used. Only the BER and DER codecs support
+        zero-copy decoding, and `data` is still copied on Python 2.
+
+        Give `paths` as a list of dot separated member names, for
+        example ``['tbsCertificate.subject']``, to only decode given
+        members. The decoded data has the same structure as when
+        decoding all members, but only contains given members, and
+        other members are skipped without being decoded. Members of
+        SEQUENCE OF and SET OF elements apply to each element. Only
+        the BER and DER codecs support decoding paths.
+
+        Give `lazy` as ``True`` to only find the members of SEQUENCE
+        and SET values, and the elements of SEQUENCE OF and SET OF
+        values, and decode each of them when first accessed. The
+        decoded values are then dictionary and list like objects
+        instead of dictionaries and lists. This is much faster if
+        only a few members of a large message are used. Errors in a
+        member are raised when it is accessed, and `data` is kept
+        until all decoded values are deleted. `lazy` is ignored if
+        `paths` is given. Only the BER and DER codecs support lazy
+        decoding.
+
         >>> foo.decode('Question', b'0\\x0e\\x02\\x01\\x01\\x16\\x09Is 1+1=3?')
         {'id': 1, 'question': 'Is 1+1=3?'}
+        >>> foo.decode('Question',
+        ...            b'0\\x0e\\x02\\x01\\x01\\x16\\x09Is 1+1=3?',
+        ...            paths=['id'])
+        {'id': 1}
 
         """
 
-        return self._types[name].decode(data)
+        return self._types[name].decode(data, zero_copy, paths, lazy)
+
+    def decode_many(self, name, data, zero_copy=False, offsets=False):
+        """Returns an iterator over values of given type `name` decoded
+        from given data `data`, where the values are encoded one after
+        the other, for example records in a file. `data` is a bytes,
+        bytearray, memoryview or mmap object, and is not sliced per
+        value. See :meth:`.decode()` for `zero_copy`, which is
+        recommended for mmap objects of large files.
+
+        If `offsets` is ``True``, the iterator gives the offset of each
+        value in `data` and the value as a tuple.
+
+        This method is only implemented for BER and DER codecs, as
+        other codecs lacks length information in the data.
+
+        >>> list(foo.decode_many('Question',
+        ...                      b'0\\x0e\\x02\\x01\\x01\\x16\\x09Is 1+1=3?'
+        ...                      b'0\\x0e\\x02\\x01\\x02\\x16\\x09Is 1+2=3?',
+        ...                      offsets=True))
+        [(0, {'id': 1, 'question': 'Is 1+1=3?'}), (16, {'id': 2, 'question': 'Is 1+2=3?'})]
+
+        """
+
+        return self._types[name].decode_many(data, zero_copy, offsets)
+
+    def iter_decode(self, name, stream, offsets=False):
+        """Returns an iterator over values of given type `name` decoded
+        from given file-like object `stream`, where the values are
+        encoded one after the other. The stream is read in chunks, so
+        the whole stream is never in memory. See
+        :meth:`.decode_many()` for `offsets`.
+
+        This method is only implemented for BER and DER codecs, as
+        other codecs lacks length information in the data.
+
+        >>> with open('questions.ber', 'rb') as fin:
+        ...     for question in foo.iter_decode('Question', fin):
+        ...         print(question)
+        ...
+        {'id': 1, 'question': 'Is 1+1=3?'}
+        {'id': 2, 'question': 'Is 1+2=3?'}
+
+        """
+
+        return self._types[name].iter_decode(stream, offsets)
+
+    def stream_decoder(self, name, offsets=False):
+        """Returns a :class:`~asn1tools.codecs.StreamDecoder` object
+        decoding a stream of values of given type `name`. Feed it data
+        as it is received, and iterate over it to get the values
+        decoded so far. See :meth:`.decode_many()` for `offsets`.
+
+        This method is only implemented for BER and DER codecs, as
+        other codecs lacks length information in the data.
+
+        >>> decoder = foo.stream_decoder('Question')
+        >>> decoder.feed(b'0\\x0e\\x02\\x01\\x01\\x16\\x09Is 1+1=3?0\\x0e')
+        >>> list(decoder)
+        [{'id': 1, 'question': 'Is 1+1=3?'}]
+        >>> decoder.feed(b'\\x02\\x01\\x02\\x16\\x09Is 1+2=3?')
+        >>> list(decoder)
+        [{'id': 2, 'question': 'Is 1+2=3?'}]
+
+        """
+
+        return self._types[name].stream_decoder(offsets)
 
     def decode_length(self, data):
         """Decode the length of given data `data`.
@@ -99,6 +278,44 @@ class Specification(object):
 
         return self._decode_length(data)
 
+    def tlv_index(self, data):
+        """Scan given BER or DER encoded data `data` once and return an
+        index of all its tags, lengths and values (TLVs), as an
+        :class:`~asn1tools.codecs.ber.TlvIndex`. The index holds the
+        tag, offsets, length, depth and parent of each TLV in arrays,
+        which makes it much faster to create than decoding the data.
+
+        This method is only implemented for BER and DER codecs.
+
+        >>> index = foo.tlv_index(b'0\\x0e\\x02\\x01\\x01\\x16\\x09Is 1+1=3?')
+        >>> list(index.tags)
+        [48, 2, 22]
+        >>> list(index.parents)
+        [-1, 0, 0]
+        >>> bytes(index.contents(2))
+        b'Is 1+1=3?'
+
+        """
+
+        return self._tlv_index(data)
+
+    def save(self, path):
+        """Save the compiled specification to given file `path`. Load it
+        with :func:`~asn1tools.load()`, which is much faster than
+        compiling the specification again.
+
+        >>> foo.save('foo.spec')
+
+        """
+
+        from . import __version__
+
+        header = '{} {}\n'.format(SAVED_FORMAT_VERSION, __version__)
+
+        with open(path, 'wb') as fout:
+            fout.write(SAVED_MAGIC + b' ' + header.encode('ascii'))
+            pickle.dump(self, fout, pickle.HIGHEST_PROTOCOL)
+
 
 def _compile_any_defined_by_type(type_, choices):
     type_['choices'] = {}
@@ -130,17 +347,34 @@ def _compile_any_defined_by_choices(specification,
                 break
 
 
-def compile_dict(specification, codec='ber', any_defined_by_choices=None):
+def compile_dict(specification,
+                 codec='ber',
+                 any_defined_by_choices=None,
+                 lazy=False):
     """Compile given ASN.1 specification dictionary and return a
     :class:`~asn1tools.compiler.Specification` object that can be used
     to encode and decode data structures with given codec
     `codec`. `codec` may be one of ``'ber'``, ``'der'``, ``jer``,
     ``'per'``, ``'uper'`` and ``'xer'``.
 
+    Give `lazy` as ``True`` to compile each type, and the types it
+    references, when first used instead of compiling all types
+    up front. This is much faster if only a few of the types in a
+    large specification are used. Errors in a type are raised when
+    it is first used.
+
     >>> foo = asn1tools.compile_dict(asn1tools.parse_files('foo.asn'))
 
     """
 
+    return _compile_dict(specification,
+                         codec,
+                         any_defined_by_choices,
+                         lazy,
+                         None)
+
+
+def _compile_dict(specification, codec, any_defined_by_choices, lazy, profile):
     codecs = {
         'ber': ber,
         'der': der,
@@ -159,17 +393,24 @@ def compile_dict(specification, codec='ber', any_defined_by_choices=None):
         _compile_any_defined_by_choices(specification,
                                         any_defined_by_choices)
 
-    return Specification(codec.compile_dict(specification),
-                         codec.decode_length)
+    return Specification(codec.compile_dict(specification, lazy, profile),
+                         codec.decode_length,
+                         lazy,
+                         codec.tlv_index)
 
 
-def compile_string(string, codec='ber', any_defined_by_choices=None):
+def compile_string(string,
+                   codec='ber',
+                   any_defined_by_choices=None,
+                   lazy=False):
     """Compile given ASN.1 specification string and return a
     :class:`~asn1tools.compiler.Specification` object that can be used
     to encode and decode data structures with given codec
     `codec`. `codec` may be one of ``'ber'``, ``'der'``, ``jer``,
     ``'per'``, ``'uper'`` and ``'xer'``.
 
+    See :func:`~asn1tools.compile_dict()` for a description of `lazy`.
+
     >>> with open('foo.asn') as fin:
     ...     foo = asn1tools.compile_string(fin.read())
 
@@ -177,23 +418,149 @@ def compile_string(string, codec='ber', any_defined_by_choices=None):
 
     return compile_dict(parse_string(string),
                         codec,
-                        any_defined_by_choices)
+                        any_defined_by_choices,
+                        lazy)
 
 
-def compile_files(filenames, codec='ber', any_defined_by_choices=None):
+def compile_files(filenames,
+                  codec='ber',
+                  any_defined_by_choices=None,
+                  cache_dir=None,
+                  lazy=False,
+                  profile=False):
     """Compile given ASN.1 specification file(s) and return a
     :class:`~asn1tools.compiler.Specification` object that can be used
     to encode and decode data structures with given codec
     `codec`. `codec` may be one of ``'ber'``, ``'der'``, ``jer``,
     ``'per'``, ``'uper'`` and ``'xer'``.
 
+    Give `cache_dir` to cache the parsed and compiled specification in
+    given directory, making later calls with the same specification
+    files, codec and `any_defined_by_choices` much faster. Entries are
+    keyed by the files contents, so modified files are recompiled.
+
+    See :func:`~asn1tools.compile_dict()` for a description of `lazy`.
+
+    Give `profile` as ``True`` to measure the time spent in each phase
+    of parsing and compiling the specification, the number of compiled
+    types and the size of the compiled specification. The report is
+    available as the `profile` attribute of the returned
+    specification. The files are always parsed and compiled when
+    profiling, `cache_dir` is not used.
+
     >>> foo = asn1tools.compile_files('foo.asn')
+    >>> print(asn1tools.compile_files('foo.asn', profile=True).profile)
+    PHASE                           SECONDS
+    strip comments                  0.000157
+    parse                           0.049527
+    pre-process: COMPONENTS OF      0.000008
+    compile                         0.000057
+    total                           0.049749
+    <BLANKLINE>
+    Compiled types:          2
+    Duplicate compilations:  0
+    Memory (approximate):    1.7 kB
 
     """
 
-    return compile_dict(parse_files(filenames),
-                        codec,
-                        any_defined_by_choices)
+    if profile:
+        return _compile_files_profiled(filenames,
+                                       codec,
+                                       any_defined_by_choices,
+                                       lazy)
+
+    if cache_dir is None:
+        return compile_dict(parse_files(filenames),
+                            codec,
+                            any_defined_by_choices,
+                            lazy)
+
+    if isinstance(filenames, str):
+        filenames = [filenames]
+
+    key = cache.make_key('compile',
+                         filenames,
+                         'pyparsing',
+                         codec,
+                         any_defined_by_choices,
+                         lazy)
+    compiled = cache.load(cache_dir, key)
+
+    if compiled is None:
+        compiled = compile_dict(parse_files(filenames, cache_dir),
+                                codec,
+                                any_defined_by_choices,
+                                lazy)
+        cache.store(cache_dir, key, compiled)
+
+    return compiled
+
+
+def _compile_files_profiled(filenames, codec, any_defined_by_choices, lazy):
+    profile = Profile()
+    compiled = _compile_dict(_parse_files_profiled(filenames,
+                                                   'pyparsing',
+                                                   profile),
+                             codec,
+                             any_defined_by_choices,
+                             lazy,
+                             profile)
+
+    # The types of a lazily compiled specification are not yet
+    # compiled.
+    if not lazy:
+        profile.memory = approximate_size(compiled.modules)
+
+    compiled._profile = profile
+
+    return compiled
+
+
+def load(path):
+    """Load a compiled specification saved by
+    :meth:`~asn1tools.compiler.Specification.save()` from given file
+    `path` and return a :class:`~asn1tools.compiler.Specification`
+    object. The file must have been saved by the same version of
+    asn1tools.
+
+    >>> foo = asn1tools.load('foo.spec')
+
+    """
+
+    from . import __version__
+
+    with open(path, 'rb') as fin:
+        header = fin.readline().split()
+
+        if len(header) != 3 or header[0] != SAVED_MAGIC:
+            raise CompileError(
+                "'{}' is not a saved specification.".format(path))
+
+        format_version = header[1].decode('ascii')
+        version = header[2].decode('ascii')
+
+        if format_version != str(SAVED_FORMAT_VERSION):
+            raise CompileError(
+                "Unsupported saved specification format version {} in "
+                "'{}'.".format(format_version, path))
+
+        if version != __version__:
+            raise CompileError(
+                "'{}' was saved by asn1tools {}, not {}.".format(path,
+                                                                version,
+                                                                __version__))
+
+        # The garbage collector is disabled while loading, as it
+        # otherwise repeatedly traverses the growing number of loaded
+        # objects, which makes loading several times slower.
+        gc_enabled = gc.isenabled()
+        gc.disable()
+
+        try:
+            return pickle.load(fin)
+        finally:
+            if gc_enabled:
+                gc.enable()
 
 
 def pre_process_dict(specification):
@@ -0,0 +1,2147 @@
+"""A fast hand-written ASN.1 parser.
+
+The specification is split into tokens by a single regular expression
+and then parsed by a recursive descent parser. Each rule mirrors the
+corresponding pyparsing rule in :mod:`asn1tools.parser`, including its
+order of alternatives, and passes tokens shaped as pyparsing tokens to
+the same conversion functions. This way both parsers give the same
+dictionary.
+
+"""
+
+import re
+
+from .parser import ParseError
+from .parser import Tokens
+from .parser import ignore_comments
+from .parser import convert_integer
+from .parser import convert_real_number
+from .parser import convert_bstring
+from .parser import convert_hstring
+from .parser import convert_value_range
+from .parser import convert_size_constraint
+from .parser import convert_permitted_alphabet
+from .parser import convert_sequence_type
+from .parser import convert_sequence_of_type
+from .parser import convert_set_type
+from .parser import convert_set_of_type
+from .parser import convert_choice_type
+from .parser import convert_enumerated_type
+from .parser import convert_keyword_type
+from .parser import convert_any_defined_by_type
+from .parser import convert_parameterized_object_set_assignment
+from .parser import convert_parameterized_object_assignment
+from .parser import convert_parameterized_object_class_assignment
+from .parser import convert_parameterized_type_assignment
+from .parser import convert_parameterized_value_assignment
+from .parser import convert_imports
+from .parser import convert_assignment_list
+from .parser import convert_module_body
+from .parser import convert_module_definition
+from .parser import convert_specification
+
+
+# Token kinds.
+WORD = 0
+PUNCTUATION = 1
+CSTRING = 2
+BSTRING = 3
+HSTRING = 4
+REAL = 5
+ERROR = 6
+END_OF_TEXT = 7
+
+# Keywords consisting of more than one word. All keywords are
+# tokenized as words, as a multi word keyword is just a sequence of
+# words where pyparsing does not expect the keyword.
+KEYWORDS = [
+    'BIT STRING',
+    'OCTET STRING',
+    'OBJECT IDENTIFIER',
+    'ANY DEFINED BY',
+    'EXTENSIBILITY IMPLIED',
+    'WITH SYNTAX',
+    'WITH COMPONENTS',
+    'WITH COMPONENT',
+    'COMPONENTS OF',
+    'CONSTRAINED BY',
+    'CHARACTER STRING'
+]
+
+RE_TOKEN = re.compile(
+    r"(?P<ws>\s+)"
+    r"|(?P<bstring>'[01\s]*'B)"
+    r"|(?P<hstring>'[0-9A-F\s]*'H)"
+    r'|(?P<cstring>"[^"\n\r]*")'
+    r'|(?P<real>[+-]?\d+\.\d+(?:[eE][+-]?\d+)?)'
+    r'|(?P<punctuation>::=|\.\.\.|\.\.|[.\[\]{}(),;:|])'
+    r"|(?P<word>[!#-'*+\-/0-9<>-Z\\^-z~]+)"
+    r'|(?P<error>.)')
+
+RE_KEYWORD = re.compile(r'(?:{})(?![A-Za-z0-9_$])'.format(
+    '|'.join([keyword.replace(' ', r'\ ') for keyword in KEYWORDS])))
+
+KEYWORD_FIRST_WORDS = set([keyword.split()[0] for keyword in KEYWORDS])
+
+KINDS = {
+    'bstring': BSTRING,
+    'hstring': HSTRING,
+    'cstring': CSTRING,
+    'real': REAL,
+    'punctuation': PUNCTUATION,
+    'word': WORD,
+    'error': ERROR
+}
+
+RE_IDENTIFIER = re.compile(r'[a-z][a-zA-Z0-9-]*\Z')
+RE_TYPE_REFERENCE = re.compile(r'[A-Z][a-zA-Z0-9-]*\Z')
+RE_REFERENCE = re.compile(r'[a-zA-Z][a-zA-Z0-9-]*\Z')
+RE_OBJECT_CLASS_REFERENCE = re.compile(r'[A-Z][A-Z0-9-]*\Z')
+RE_TYPE_FIELD_REFERENCE = re.compile(r'&[A-Z][a-zA-Z0-9-]*\Z')
+RE_VALUE_FIELD_REFERENCE = re.compile(r'&[a-z][a-zA-Z0-9-]*\Z')
+RE_FIELD_REFERENCE = re.compile(r'&[a-zA-Z][a-zA-Z0-9-]*\Z')
+RE_INTEGER = re.compile(r'[0-9-]+\Z')
+RE_REAL_NUMBER = re.compile(r'[+-]?\d+\.?\d*([eE][+-]?\d+)?\Z')
+
+RESERVED_WORDS = ['END', 'SEQUENCE', 'ENUMERATED']
+
+CHARACTER_STRING_TYPES = [
+    'BMPString',
+    'GeneralString',
+    'GraphicString',
+    'IA5String',
+    'ISO646String',
+    'NumericString',
+    'PrintableString',
+    'TeletexString',
+    'UTCTime',
+    'GeneralizedTime',
+    'T61String',
+    'UniversalString',
+    'UTF8String',
+    'VideotexString',
+    'VisibleString',
+    'CHARACTER STRING'
+]
+
+UNION_MARKS = ['|', 'UNION']
+ELEMENT_SET_MARKS = ['|', 'UNION', '^', 'INTERSECTION']
+
+# Number of end of text tokens appended to the token list, so rules
+# can look ahead a few tokens without checking the list length.
+END_OF_TEXT_TOKENS = 4
+
+
+class Group(list):
+    """Tokens grouped by a pyparsing Group.
+
+    """
+
+    def asList(self):
+        return [item.asList() if isinstance(item, Group) else item
+                for item in self]
+
+
+def tokenize(string):
+    """Returns the texts, kinds and offsets of all tokens in given string,
+    and a dictionary of multi word keywords by their first token
+    index.
+
+    """
+
+    texts = []
+    kinds = []
+    offsets = []
+    keywords = {}
+
+    for mo in RE_TOKEN.finditer(string):
+        kind = mo.lastgroup
+
+        if kind == 'ws':
+            continue
+
+        text = mo.group()
+
+        if text in KEYWORD_FIRST_WORDS:
+            keyword_mo = RE_KEYWORD.match(string, mo.start())
+
+            if keyword_mo is not None:
+                keywords[len(texts)] = keyword_mo.group()
+
+        texts.append(text)
+        kinds.append(KINDS[kind])
+        offsets.append(mo.start())
+
+    for _ in range(END_OF_TEXT_TOKENS):
+        texts.append('')
+        kinds.append(END_OF_TEXT)
+        offsets.append(len(string))
+
+    return texts, kinds, offsets, keywords
+
+
+class Parser(object):
+
+    def __init__(self, string):
+        self.string = string
+        self.texts, self.kinds, self.offsets, self.keywords = tokenize(string)
+        self.pos = 0
+        self.builtin_types = {
+            'CHOICE': self.choice_type,
+            'INTEGER': self.integer_type,
+            'NULL': self.null_type,
+            'REAL': self.real_type,
+            'BIT STRING': self.bit_string_type,
+            'OCTET STRING': self.octet_string_type,
+            'ENUMERATED': self.enumerated_type,
+            'SEQUENCE': self.sequence_type,
+            'SET': self.set_type,
+            'OBJECT IDENTIFIER': self.object_identifier_type,
+            'BOOLEAN': self.boolean_type
+        }
+
+        for name in CHARACTER_STRING_TYPES:
+            self.builtin_types[name] = self.character_string_type
+
+    def parse(self):
+        return self.specification()
+
+    # Helpers.
+
+    def error(self, expected):
+        offset = self.offsets[self.pos]
+        line_start = self.string.rfind('\n', 0, offset) + 1
+        line_end = self.string.find('\n', offset)
+
+        if line_end == -1:
+            line_end = len(self.string)
+
+        line = self.string[line_start:line_end]
+        column = offset - line_start + 1
+        marked_line = (line[:column - 1] + '>!<' + line[column - 1:]).strip()
+
+        raise ParseError(
+            "Invalid ASN.1 syntax at line {}, column {}: '{}': Expected {}.".format(
+                self.string.count('\n', 0, offset) + 1,
+                column,
+                marked_line,
+                expected))
+
+    def peek(self, offset=0):
+        return self.texts[self.pos + offset]
+
+    def accept(self, text):
+        if self.texts[self.pos] == text:
+            self.pos += 1
+
+            return True
+        else:
+            return False
+
+    def peek_keyword(self):
+        """Returns the multi word keyword at current position, or the text
+        of current token if there is none.
+
+        """
+
+        return self.keywords.get(self.pos, self.texts[self.pos])
+
+    def accept_keyword(self, keyword):
+        if self.keywords.get(self.pos) == keyword:
+            self.pos += keyword.count(' ') + 1
+
+            return True
+        else:
+            return False
+
+    def expect(self, text, expected=None):
+        if not self.accept(text):
+            if expected is None:
+                expected = text
+
+            self.error(expected)
+
+    def is_adjacent(self, pos):
+        """Returns True if the token at given position is immediately
+        followed by the next token, without any whitespace in between.
+
+        """
+
+        return (self.offsets[pos] + len(self.texts[pos])
+                == self.offsets[pos + 1])
+
+    def accept_double(self, character):
+        """Accept two adjacent tokens of given character, used for the
+        version brackets '[[' and ']]'.
+
+        """
+
+        pos = self.pos
+
+        if (self.texts[pos] == character
+            and self.texts[pos + 1] == character
+            and self.is_adjacent(pos)):
+            self.pos += 2
+
+            return True
+        else:
+            return False
+
+    def is_word(self, pos):
+        return self.kinds[pos] == WORD
+
+    def is_identifier(self, pos):
+        return (self.kinds[pos] == WORD
+                and RE_IDENTIFIER.match(self.texts[pos]) is not None)
+
+    def is_reserved_word(self, pos):
+        if self.texts[pos] not in RESERVED_WORDS:
+            return False
+
+        end = self.offsets[pos] + len(self.texts[pos])
+
+        return end == len(self.string) or self.string[end].isspace()
+
+    def is_type_reference(self, pos):
+        return (self.kinds[pos] == WORD
+                and RE_TYPE_REFERENCE.match(self.texts[pos]) is not None
+                and not self.is_reserved_word(pos))
+
+    def is_object_class_reference(self, pos):
+        return (self.kinds[pos] == WORD
+                and RE_OBJECT_CLASS_REFERENCE.match(self.texts[pos]) is not None
+                and not self.is_reserved_word(pos))
+
+    def is_reference(self, pos):
+        return (self.kinds[pos] == WORD
+                and RE_REFERENCE.match(self.texts[pos]) is not None
+                and not self.is_reserved_word(pos))
+
+    def word(self):
+        if self.kinds[self.pos] != WORD:
+            return None
+
+        self.pos += 1
+
+        return [self.texts[self.pos - 1]]
+
+    def delimited_list(self, parse_item, delimiters=(',', )):
+        tokens = parse_item()
+
+        if tokens is None:
+            return None
+
+        while self.texts[self.pos] in delimiters:
+            pos = self.pos
+            self.pos += 1
+            item_tokens = parse_item()
+
+            if item_tokens is None:
+                self.pos = pos
+                break
+
+            tokens.extend(item_tokens)
+
+        return tokens
+
+    def first(self, *parse_items):
+        for parse_item in parse_items:
+            tokens = parse_item()
+
+            if tokens is not None:
+                return tokens
+
+        return None
+
+    # Modules.
+
+    def specification(self):
+        modules = []
+
+        while True:
+            module = self.module_definition()
+
+            if module is None:
+                break
+
+            modules.append(module)
+
+        if not modules:
+            self.error('modulereference')
+
+        if self.kinds[self.pos] != END_OF_TEXT:
+            self.error('end of text')
+
+        return convert_specification(None, None, modules)
+
+    def module_definition(self):
+        if not self.is_type_reference(self.pos):
+            return None
+
+        name = self.texts[self.pos]
+        self.pos += 1
+        definitive_identifier = self.definitive_identifier()
+        self.expect('DEFINITIONS')
+        tag_default = Group()
+
+        if (self.peek() in ['AUTOMATIC', 'EXPLICIT', 'IMPLICIT']
+            and self.peek(1) == 'TAGS'):
+            tag_default.extend([self.peek(), 'TAGS'])
+            self.pos += 2
+
+        extension_default = Group()
+
+        if self.accept_keyword('EXTENSIBILITY IMPLIED'):
+            extension_default.append('EXTENSIBILITY IMPLIED')
+
+        self.expect('::=')
+        self.expect('BEGIN')
+        module_body = self.module_body()
+        self.expect('END')
+
+        return convert_module_definition(
+            None,
+            None,
+            Group([
+                Group([name, definitive_identifier, tag_default, extension_default]),
+                Group([module_body])
+            ]))
+
+    def definitive_identifier(self):
+        if not self.accept('{'):
+            return Group()
+
+        components = Group()
+
+        while True:
+            component = self.definitive_obj_id_component()
+
+            if component is None:
+                break
+
+            components.append(component)
+
+        if not components:
+            self.error('{{identifier Suppress:("(") - definitiveNumberForm - '
+                       'Suppress:(")")} | identifier | definitiveNumberForm}')
+
+        self.expect('}', '"}"')
+
+        return components
+
+    def definitive_obj_id_component(self):
+        if self.is_identifier(self.pos) and self.peek(1) == '(':
+            name = self.texts[self.pos]
+            self.pos += 2
+            number = self.word()
+
+            if number is None:
+                self.error('definitiveNumberForm')
+
+            self.expect(')', '")"')
+
+            return Group([name] + number)
+
+        number = self.word()
+
+        if number is None:
+            return None
+
+        return Group(number)
+
+    def module_body(self):
+        self.exports()
+        imports = self.imports()
+        assignment_list = self.assignment_list()
+
+        return convert_module_body(None, None, [imports, assignment_list])
+
+    def exports(self):
+        if not self.accept('EXPORTS'):
+            return
+
+        if self.accept('ALL'):
+            return
+
+        if self.symbol_list() is None:
+            self.error('symbol')
+
+        while self.symbol_list() is not None:
+            pass
+
+        self.expect(';', '";"')
+
+    def symbol_list(self):
+        return self.delimited_list(self.symbol)
+
+    def symbol(self):
+        if not self.is_reference(self.pos):
+            return None
+
+        tokens = [self.texts[self.pos]]
+        self.pos += 1
+
+        if self.peek() == '{' and self.peek(1) == '}':
+            tokens += ['{', '}']
+            self.pos += 2
+
+        return tokens
+
+    def imports(self):
+        symbols_imported = Group()
+
+        if self.accept('IMPORTS'):
+            while True:
+                symbols_from_module = self.symbols_from_module()
+
+                if symbols_from_module is None:
+                    break
+
+                symbols_imported.append(symbols_from_module)
+
+            if not symbols_imported:
+                self.error('symbol')
+
+            self.expect(';', '";"')
+
+        return convert_imports(None, None, symbols_imported)
+
+    def symbols_from_module(self):
+        pos = self.pos
+        symbols = self.symbol_list()
+
+        if symbols is None:
+            return None
+
+        if not self.accept('FROM') or not self.is_type_reference(self.pos):
+            self.pos = pos
+
+            return None
+
+        name = self.texts[self.pos]
+        self.pos += 1
+        self.assigned_identifier()
+
+        return Group([Group(symbols), 'FROM', name])
+
+    def assigned_identifier(self):
+        pos = self.pos
+
+        if self.peek() == '{':
+            if self.object_identifier_value() is not None:
+                return
+
+        if self.defined_value() is not None:
+            if self.peek() not in [',', 'FROM']:
+                return
+
+        self.pos = pos
+
+    # Assignments.
+
+    def assignment_list(self):
+        assignments = []
+
+        while True:
+            assignment = self.assignment()
+
+            if assignment is None:
+                break
+
+            assignments.append(assignment)
+
+        return convert_assignment_list(None, None, assignments)
+
+    def assignment(self):
+        if self.is_type_reference(self.pos):
+            return self.first(self.parameterized_object_set_assignment,
+                              self.parameterized_object_class_assignment,
+                              self.parameterized_type_assignment)
+        elif self.is_identifier(self.pos):
+            return self.first(self.parameterized_object_assignment,
+                              self.parameterized_value_assignment)
+        else:
+            return None
+
+    def parameterized_object_set_assignment(self):
+        pos = self.pos
+        name = self.texts[pos]
+        self.pos += 1
+        self.parameter_list()
+
+        if not self.is_object_class_reference(self.pos):
+            self.pos = pos
+
+            return None
+
+        class_name = self.texts[self.pos]
+        self.pos += 1
+        self.expect('::=')
+        object_set = self.object_set()
+
+        if object_set is None:
+            self.error('"{"')
+
+        return convert_parameterized_object_set_assignment(
+            None,
+            None,
+            Group([name, class_name, '::='] + object_set))
+
+    def parameterized_object_assignment(self):
+        pos = self.pos
+        name = self.texts[pos]
+        self.pos += 1
+        self.parameter_list()
+
+        if self.is_object_class_reference(self.pos):
+            class_name = self.texts[self.pos]
+            self.pos += 1
+
+            if self.accept('::='):
+                object_ = self.object_()
+
+                if object_ is not None:
+                    return convert_parameterized_object_assignment(
+                        None,
+                        None,
+                        Group([name, class_name] + object_))
+
+        self.pos = pos
+
+        return None
+
+    def parameterized_object_class_assignment(self):
+        pos = self.pos
+
+        if not self.is_object_class_reference(pos):
+            return None
+
+        name = self.texts[pos]
+        self.pos += 1
+        self.parameter_list()
+
+        if self.accept('::='):
+            object_class = self.object_class()
+
+            if object_class is not None:
+                return convert_parameterized_object_class_assignment(
+                    None,
+                    None,
+                    Group([name, '::='] + object_class))
+
+        self.pos = pos
+
+        return None
+
+    def parameterized_type_assignment(self):
+        name = self.texts[self.pos]
+        self.pos += 1
+        self.parameter_list()
+        self.expect('::=')
+        tag = self.tag()
+        type_ = self.type_()
+
+        if type_ is None:
+            self.error('Type')
+
+        return convert_parameterized_type_assignment(
+            None,
+            None,
+            Group([name, '::='] + tag + type_))
+
+    def parameterized_value_assignment(self):
+        name = self.texts[self.pos]
+        self.pos += 1
+        self.parameter_list()
+        type_ = self.type_()
+
+        if type_ is None:
+            self.error('Type')
+
+        self.expect('::=')
+        value = self.value()
+
+        if value is None:
+            self.error('Value')
+
+        return convert_parameterized_value_assignment(
+            None,
+            None,
+            Group([name, Group(type_)] + value))
+
+    # X.683: Parameterization.
+
+    def parameter_list(self):
+        if self.peek() != '{':
+            return
+
+        pos = self.pos
+        self.pos += 1
+
+        if self.delimited_list(self.parameter) is not None:
+            if self.accept('}'):
+                return
+
+        self.pos = pos
+
+    def parameter(self):
+        pos = self.pos
+        governor = self.type_()
+
+        if governor is None and self.is_reference(self.pos):
+            self.pos += 1
+            governor = [self.texts[pos]]
+
+        if governor is None or not self.accept(':'):
+            self.pos = pos
+
+        if not self.is_reference(self.pos):
+            self.pos = pos
+
+            return None
+
+        self.pos += 1
+
+        return [self.texts[self.pos - 1]]
+
+    def actual_parameter_list(self):
+        pos = self.pos
+
+        if not self.accept('{'):
+            return None
+
+        parameters = self.delimited_list(self.actual_parameter)
+
+        if parameters is None or not self.accept('}'):
+            self.pos = pos
+
+            return None
+
+        return [Group(parameters)]
+
+    def actual_parameter(self):
+        tokens = self.first(self.type_,
+                            self.value,
+                            self.defined_object_class,
+                            self.object_,
+                            self.object_set)
+
+        if tokens is None:
+            return None
+
+        return [Group(tokens)]
+
+    # X.681: Information object classes, objects and object sets.
+
+    def defined_object_class(self):
+        if not self.is_object_class_reference(self.pos):
+            return None
+
+        self.pos += 1
+
+        return [self.texts[self.pos - 1]]
+
+    def object_class(self):
+        if self.accept('CLASS'):
+            self.expect('{', '"{"')
+            field_specs = self.delimited_list(self.field_spec)
+
+            if field_specs is None:
+                self.error('field specification')
+
+            self.expect('}', '"}"')
+            tokens = ['CLASS', Group(field_specs)]
+
+            if self.accept_keyword('WITH SYNTAX'):
+                tokens.append('WITH SYNTAX')
+                tokens += self.syntax_list()
+
+            return tokens
+
+        pos = self.pos
+        defined_object_class = self.defined_object_class()
+
+        if defined_object_class is not None:
+            actual_parameter_list = self.actual_parameter_list()
+
+            if actual_parameter_list is not None:
+                return defined_object_class + actual_parameter_list
+
+            self.pos = pos
+
+        return None
+
+    def field_spec(self):
+        text = self.peek()
+
+        if not self.is_word(self.pos):
+            return None
+
+        if RE_TYPE_FIELD_REFERENCE.match(text):
+            self.pos += 1
+            tokens = [text]
+
+            if self.accept('OPTIONAL'):
+                tokens.append('OPTIONAL')
+            elif self.accept('DEFAULT'):
+                type_ = self.type_()
+
+                if type_ is None:
+                    self.error('Type')
+
+                tokens += ['DEFAULT'] + type_
+
+            return [Group(tokens)]
+        elif RE_VALUE_FIELD_REFERENCE.match(text):
+            pos = self.pos
+            self.pos += 1
+            type_ = self.type_()
+
+            if type_ is None:
+                self.pos = pos
+
+                return None
+
+            tokens = [text] + type_
+
+            if self.accept('UNIQUE'):
+                tokens.append('UNIQUE')
+
+            if self.accept('OPTIONAL'):
+                tokens.append('OPTIONAL')
+            elif self.accept('DEFAULT'):
+                value = self.value()
+
+                if value is None:
+                    self.error('Value')
+
+                tokens += ['DEFAULT'] + value
+
+            return [Group(tokens)]
+        else:
+            return None
+
+    def syntax_list(self):
+        self.expect('{', '"{"')
+        tokens = ['{']
+        token_or_group_specs = self.token_or_group_specs()
+
+        if token_or_group_specs is None:
+            self.error('"}"')
+
+        tokens += token_or_group_specs
+        self.expect('}', '"}"')
+
+        return tokens + ['}']
+
+    def token_or_group_specs(self):
+        tokens = []
+
+        while True:
+            kind = self.kinds[self.pos]
+            text = self.texts[self.pos]
+
+            if kind == WORD or text == ',':
+                self.pos += 1
+                tokens.append(text)
+            elif text == '[':
+                pos = self.pos
+                self.pos += 1
+                group_tokens = self.token_or_group_specs()
+
+                if group_tokens is None or not self.accept(']'):
+                    self.pos = pos
+                    break
+
+                tokens += ['['] + group_tokens + [']']
+            else:
+                break
+
+        if not tokens:
+            return None
+
+        return tokens
+
+    def object_(self):
+        pos = self.pos
+
+        if not self.accept('{'):
+            return None
+
+        field_settings = self.delimited_list(self.field_setting)
+
+        if field_settings is None or not self.accept('}'):
+            self.pos = pos
+
+            return None
+
+        return [Group(field_settings)]
+
+    def field_setting(self):
+        pos = self.pos
+
+        if (not self.is_word(pos)
+            or not RE_FIELD_REFERENCE.match(self.texts[pos])):
+            return None
+
+        self.pos += 1
+        setting = self.first(self.type_,
+                             self.value,
+                             self.object_,
+                             self.object_set)
+
+        if setting is None:
+            self.pos = pos
+
+            return None
+
+        return [Group([self.texts[pos]] + setting)]
+
+    def object_set(self):
+        pos = self.pos
+
+        if not self.accept('{'):
+            return None
+
+        object_set_spec = self.object_set_spec()
+
+        if object_set_spec is None or not self.accept('}'):
+            self.pos = pos
+
+            return None
+
+        return ['{', Group(object_set_spec), '}']
+
+    def object_set_spec(self):
+        tokens = self.element_set_spec()
+
+        if tokens is not None:
+            pos = self.pos
+
+            if self.accept(',') and self.accept('...'):
+                tokens += [',', '...']
+                tokens += self.additional_element_set_spec()
+            else:
+                self.pos = pos
+
+            return tokens
+        elif self.accept('...'):
+            return ['...'] + self.additional_element_set_spec()
+        else:
+            return None
+
+    def additional_element_set_spec(self):
+        pos = self.pos
+
+        if self.accept(','):
+            tokens = self.element_set_spec()
+
+            if tokens is not None:
+                return [','] + tokens
+
+        self.pos = pos
+
+        return []
+
+    # Types.
+
+    def type_(self):
+        converted_type = self.builtin_type()
+
+        if converted_type is None:
+            converted_type = self.any_defined_by_type()
+
+            if converted_type is None:
+                converted_type = self.referenced_type()
+
+                if converted_type is None:
+                    return None
+
+        constraints = Group()
+
+        while self.texts[self.pos] == '(':
+            constraints += self.constraint()
+
+        return [Group([converted_type, constraints])]
+
+    def builtin_type(self):
+        parse_type = self.builtin_types.get(self.peek_keyword())
+
+        if parse_type is not None:
+            converted_type = parse_type()
+
+            if converted_type is not None:
+                return converted_type
+
+        return self.object_class_field_type()
+
+    def choice_type(self):
+        self.pos += 1
+        self.expect('{', '"{"')
+        alternative_type_lists = self.alternative_type_lists()
+
+        if alternative_type_lists is None:
+            self.error('identifier')
+
+        self.expect('}', '"}"')
+
+        return convert_choice_type(
+            None,
+            None,
+            ['CHOICE', '{', Group(alternative_type_lists), '}'])
+
+    def alternative_type_lists(self):
+        tokens = self.delimited_list(self.named_type)
+
+        if tokens is None:
+            return None
+
+        pos = self.pos
+
+        if self.accept(',') and self.accept('...'):
+            tokens.append('...')
+            tokens += self.extension_addition_alternatives()
+            tokens += self.optional_extension_marker()
+        else:
+            self.pos = pos
+
+        return tokens
+
+    def extension_addition_alternatives(self):
+        pos = self.pos
+
+        if self.accept(','):
+            tokens = self.delimited_list(self.extension_addition_alternative)
+
+            if tokens is not None:
+                return tokens
+
+        self.pos = pos
+
+        return []
+
+    def extension_addition_alternative(self):
+        if self.accept_double('['):
+            self.version_number()
+            tokens = self.delimited_list(self.named_type)
+
+            if tokens is None:
+                self.error('identifier')
+
+            if not self.accept_double(']'):
+                self.error('"]]"')
+
+            return tokens
+
+        return self.named_type()
+
+    def version_number(self):
+        if self.is_word(self.pos) and self.peek(1) == ':':
+            self.pos += 2
+
+    def optional_extension_marker(self):
+        if self.peek() == ',' and self.peek(1) == '...':
+            self.pos += 2
+
+            return ['...']
+
+        return []
+
+    def named_type(self):
+        if not self.is_identifier(self.pos):
+            return None
+
+        name = self.texts[self.pos]
+        self.pos += 1
+        tag = self.tag()
+        type_ = self.type_()
+
+        if type_ is None:
+            self.error('Type')
+
+        return [Group([name] + tag + type_)]
+
+    def tag(self):
+        if not self.accept('['):
+            return [Group()]
+
+        class_and_number = Group()
+
+        if self.peek() in ['UNIVERSAL', 'APPLICATION', 'PRIVATE']:
+            class_and_number.append(self.peek())
+            self.pos += 1
+
+        number = self.word()
+
+        if number is None:
+            self.error('ClassNumber')
+
+        class_and_number += number
+        self.expect(']', '"]"')
+        kind = Group()
+
+        if self.peek() in ['IMPLICIT', 'EXPLICIT']:
+            kind.append(self.peek())
+            self.pos += 1
+
+        return [Group([class_and_number, kind])]
+
+    def integer_type(self):
+        self.pos += 1
+        pos = self.pos
+
+        if self.accept('{'):
+            if (self.delimited_list(self.named_number) is None
+                or not self.accept('}')):
+                self.pos = pos
+
+        return {'type': 'INTEGER'}
+
+    def named_number(self):
+        pos = self.pos
+
+        if self.is_identifier(pos) and self.peek(1) == '(':
+            self.pos += 2
+
+            if self.word() is not None or self.defined_value() is not None:
+                if self.accept(')'):
+                    return []
+
+        self.pos = pos
+
+        return None
+
+    def null_type(self):
+        self.pos += 1
+
+        return {'type': 'NULL'}
+
+    def real_type(self):
+        self.pos += 1
+
+        return {'type': 'REAL'}
+
+    def boolean_type(self):
+        self.pos += 1
+
+        return {'type': 'BOOLEAN'}
+
+    def octet_string_type(self):
+        self.pos += 2
+
+        return {'type': 'OCTET STRING'}
+
+    def character_string_type(self):
+        keyword = self.peek_keyword()
+        self.pos += keyword.count(' ') + 1
+
+        return convert_keyword_type(None, None, [keyword])
+
+    def bit_string_type(self):
+        self.pos += 2
+        pos = self.pos
+
+        if self.accept('{'):
+            if (self.delimited_list(self.named_bit) is None
+                or not self.accept('}')):
+                self.pos = pos
+
+        return {'type': 'BIT STRING'}
+
+    def named_bit(self):
+        pos = self.pos
+
+        if (self.is_word(pos)
+            and self.texts[pos + 1] == '('
+            and self.is_word(pos + 2)
+            and self.texts[pos + 3] == ')'):
+            self.pos += 4
+
+            return []
+
+        return None
+
+    def object_identifier_type(self):
+        self.pos += 2
+        pos = self.pos
+
+        if self.accept('('):
+            if (self.delimited_list(self.word, ('|', )) is None
+                or not self.accept(')')):
+                self.pos = pos
+
+        return {'type': 'OBJECT IDENTIFIER'}
+
+    def enumerated_type(self):
+        self.pos += 1
+        self.expect('{', '"{"')
+        enumerations = self.delimited_list(self.enumeration)
+
+        if enumerations is None:
+            self.error('enumeration')
+
+        self.expect('}', '"}"')
+
+        return convert_enumerated_type(
+            None,
+            None,
+            ['ENUMERATED', '{', Group(enumerations), '}'])
+
+    def enumeration(self):
+        text = self.peek()
+
+        if self.is_word(self.pos):
+            self.pos += 1
+            pos = self.pos
+            enumeration = Group([text])
+
+            if self.accept('('):
+                number = self.word()
+
+                if number is not None and self.accept(')'):
+                    enumeration += number
+                else:
+                    self.pos = pos
+
+            return [enumeration]
+        elif text == '...':
+            self.pos += 1
+
+            return [Group(['...'])]
+        else:
+            return None
+
+    def sequence_type(self):
+        pos = self.pos
+        converted_type = self.sequence_of_type()
+
+        if converted_type is not None:
+            return converted_type
+
+        self.pos = pos + 1
+        self.expect('{', '"{"')
+        members = self.component_type_lists()
+        self.expect('}', '"}"')
+
+        return convert_sequence_type(None,
+                                     None,
+                                     ['SEQUENCE', '{', Group(members), '}'])
+
+    def sequence_of_type(self):
+        pos = self.pos
+        self.pos += 1
+        size = Group()
+        accepted_parenthesis = self.accept('(')
+        size_tokens = self.size()
+
+        if size_tokens is None:
+            if accepted_parenthesis:
+                self.pos -= 1
+        else:
+            size += size_tokens
+            self.accept(')')
+
+        if not self.accept('OF'):
+            self.pos = pos
+
+            return None
+
+        return convert_sequence_of_type(None,
+                                        None,
+                                        ['SEQUENCE', size, 'OF'] + self.tagged_element())
+
+    def set_type(self):
+        pos = self.pos
+        self.pos += 1
+        size = Group()
+        size_tokens = self.size()
+
+        if size_tokens is not None:
+            size += size_tokens
+
+        if self.accept('OF'):
+            return convert_set_of_type(None,
+                                       None,
+                                       ['SET', size, 'OF'] + self.tagged_element())
+
+        self.pos = pos + 1
+
+        if not self.accept('{'):
+            self.pos = pos
+
+            return None
+
+        members = self.component_type_lists()
+        self.expect('}', '"}"')
+
+        return convert_set_type(None, None, ['SET', '{', Group(members), '}'])
+
+    def tagged_element(self):
+        """The optional identifier, tag and type of a SEQUENCE OF or SET OF
+        element.
+
+        """
+
+        if self.is_identifier(self.pos):
+            self.pos += 1
+
+        tag = self.tag()
+        type_ = self.type_()
+
+        if type_ is None:
+            self.error('Type')
+
+        return tag + type_
+
+    def size(self):
+        pos = self.pos
+
+        if self.accept('SIZE') and self.accept('('):
+            items = self.delimited_list(self.size_item, UNION_MARKS)
+
+            if items is not None and self.accept(')'):
+                return [Group(['SIZE', Group([Group(items)])])]
+
+        self.pos = pos
+
+        return None
+
+    def size_item(self):
+        pos = self.pos
+
+        if not self.is_word(pos):
+            return None
+
+        if self.texts[pos + 1] == '..' and self.is_word(pos + 2):
+            self.pos += 3
+
+            return [self.texts[pos], '..', self.texts[pos + 2]]
+
+        self.pos += 1
+
+        return [self.texts[pos]]
+
+    def component_type_lists(self):
+        """The members of a SEQUENCE or SET, or an empty list if none.
+
+        """
+
+        tokens = self.delimited_list(self.component_type)
+
+        if tokens is not None:
+            pos = self.pos
+
+            if self.accept(',') and self.accept('...'):
+                tokens.append('...')
+                tokens += self.extension_additions()
+                tokens += self.extension_end()
+            else:
+                self.pos = pos
+        elif self.accept('...'):
+            tokens = ['...']
+            tokens += self.extension_additions()
+            tokens += self.extension_end()
+        else:
+            tokens = []
+
+        return tokens
+
+    def extension_additions(self):
+        pos = self.pos
+
+        if self.accept(','):
+            tokens = self.delimited_list(self.extension_addition)
+
+            if tokens is not None:
+                return tokens
+
+        self.pos = pos
+
+        return []
+
+    def extension_addition(self):
+        tokens = self.component_type()
+
+        if tokens is not None:
+            return tokens
+
+        pos = self.pos
+
+        if self.accept_double('['):
+            self.version_number()
+            tokens = self.delimited_list(self.component_type)
+
+            if tokens is not None and self.accept_double(']'):
+                return tokens
+
+        self.pos = pos
+
+        return None
+
+    def extension_end(self):
+        pos = self.pos
+
+        if self.accept(',') and self.accept('...'):
+            end_pos = self.pos
+
+            if self.accept(','):
+                tokens = self.delimited_list(self.component_type)
+
+                if tokens is not None:
+                    return ['...'] + tokens
+
+            self.pos = end_pos
+
+            return ['...']
+
+        self.pos = pos
+
+        return []
+
+    def component_type(self):
+        named_type = self.named_type()
+
+        if named_type is not None:
+            qualifiers = Group()
+
+            if self.accept('OPTIONAL'):
+                qualifiers.append('OPTIONAL')
+            elif self.peek() == 'DEFAULT':
+                pos = self.pos
+                self.pos += 1
+                value = self.value()
+
+                if value is None:
+                    self.pos = pos
+                else:
+                    qualifiers += ['DEFAULT'] + value
+
+            return [Group(named_type + [qualifiers])]
+
+        if self.accept_keyword('COMPONENTS OF'):
+            type_ = self.type_()
+
+            if type_ is None:
+                self.error('Type')
+
+            return [Group(['COMPONENTS OF'] + type_)]
+
+        return None
+
+    def object_class_field_type(self):
+        pos = self.pos
+
+        if (self.is_object_class_reference(pos)
+            and self.texts[pos + 1] == '.'
+            and self.is_adjacent(pos)
+            and self.is_adjacent(pos + 1)
+            and self.is_word(pos + 2)
+            and RE_FIELD_REFERENCE.match(self.texts[pos + 2])):
+            self.pos += 3
+
+            return convert_keyword_type(
+                None,
+                None,
+                [self.texts[pos] + '.' + self.texts[pos + 2]])
+
+        return None
+
+    def any_defined_by_type(self):
+        if (self.keywords.get(self.pos) == 'ANY DEFINED BY'
+            and self.is_word(self.pos + 3)):
+            self.pos += 4
+
+            return convert_any_defined_by_type(
+                None,
+                None,
+                ['ANY DEFINED BY', self.texts[self.pos - 1]])
+
+        return None
+
+    def referenced_type(self):
+        pos = self.pos
+
+        if not self.is_type_reference(pos):
+            return None
+
+        name = self.texts[pos]
+
+        if self.texts[pos + 1] == '.' and self.is_type_reference(pos + 2):
+            self.pos += 3
+        else:
+            self.pos += 1
+
+            if self.peek() == '{':
+                self.actual_parameter_list()
+
+        return {'type': name}
+
+    # Constraints.
+
+    def constraint(self):
+        self.pos += 1
+        tokens = self.general_constraint()
+
+        if tokens is None:
+            tokens = self.element_set_specs()
+
+            if tokens is None:
+                self.error('one or more constraints')
+
+        self.expect(')', '")"')
+
+        return tokens
+
+    def general_constraint(self):
+        text = self.peek_keyword()
+
+        if text == 'CONSTRAINED BY':
+            return self.user_defined_constraint()
+        elif text == '{':
+            return self.first(self.component_relation_constraint,
+                              self.object_set)
+        elif text == 'CONTAINING':
+            pos = self.pos
+            self.pos += 1
+            type_ = self.type_()
+
+            if type_ is not None:
+                return ['CONTAINING'] + type_
+
+            self.pos = pos
+        elif text == 'ENCODED_BY':
+            pos = self.pos
+            self.pos += 1
+            value = self.value()
+
+            if value is not None:
+                return ['ENCODED_BY'] + value
+
+            self.pos = pos
+
+        return None
+
+    def user_defined_constraint(self):
+        self.pos += 2
+        self.expect('{', '"{"')
+        parameters = self.delimited_list(self.user_defined_constraint_parameter)
+
+        if parameters is None:
+            parameters = []
+
+        self.expect('}', '"}"')
+
+        return ['CONSTRAINED BY', '{'] + parameters + ['}']
+
+    def user_defined_constraint_parameter(self):
+        pos = self.pos
+        governor = self.first(self.type_, self.defined_object_class)
+
+        if governor is not None:
+            if self.accept(':'):
+                tokens = self.first(self.value, self.object_, self.object_set)
+
+                if tokens is not None:
+                    return governor + [':'] + tokens
+
+            self.pos = pos
+
+        return self.first(self.type_, self.defined_object_class)
+
+    def component_relation_constraint(self):
+        pos = self.pos
+        self.pos += 1
+
+        if self.is_type_reference(self.pos):
+            object_set = self.texts[self.pos]
+            self.pos += 1
+
+            if self.accept('}') and self.accept('{'):
+                component_ids = self.delimited_list(self.at_notation)
+
+                if component_ids is None:
+                    self.error('"@"')
+
+                self.expect('}', '"}"')
+
+                return [
+                    '{',
+                    Group([Group([object_set])]),
+                    '}',
+                    '{',
+                    Group(component_ids),
+                    '}'
+                ]
+
+        self.pos = pos
+
+        return None
+
+    def at_notation(self):
+        text = self.peek()
+
+        if not self.is_word(self.pos) or not text.startswith('@'):
+            return None
+
+        self.pos += 1
+
+        if len(text) > 1:
+            if RE_IDENTIFIER.match(text[1:]):
+                return [text[1:]]
+
+            self.pos -= 1
+            self.error('identifier')
+
+        if self.is_identifier(self.pos):
+            self.pos += 1
+
+            return [self.texts[self.pos - 1]]
+
+        # Dots and an identifier, all adjacent.
+        level = ''
+
+        while self.peek() in ['.', '..', '...']:
+            if level and not self.is_adjacent(self.pos - 1):
+                break
+
+            level += self.peek()
+            self.pos += 1
+
+        if (level
+            and self.is_adjacent(self.pos - 1)
+            and self.is_identifier(self.pos)):
+            self.pos += 1
+
+            return [level + self.texts[self.pos - 1]]
+
+        self.error('identifier')
+
+    def element_set_specs(self):
+        tokens = self.element_set_spec()
+
+        if tokens is None:
+            return None
+
+        if self.accept(','):
+            self.expect('...', '"..."')
+
+            if self.accept(','):
+                additional_element_set_spec = self.element_set_spec()
+
+                if additional_element_set_spec is None:
+                    self.error('one or more constraints')
+
+                tokens += additional_element_set_spec
+
+        return tokens
+
+    def element_set_spec(self):
+        return self.delimited_list(self.elements, ELEMENT_SET_MARKS)
+
+    def elements(self):
+        tokens = self.subtype_elements()
+
+        if tokens is None:
+            # The alternatives defined object set and parameterized
+            # object set are never reached, as any word is a value.
+            tokens = self.object_()
+
+            if tokens is None:
+                pos = self.pos
+
+                if not self.accept('('):
+                    return None
+
+                element_set_spec = self.element_set_spec()
+
+                if element_set_spec is None or not self.accept(')'):
+                    self.pos = pos
+
+                    return None
+
+                tokens = ['('] + element_set_spec + [')']
+
+        return [Group(tokens)]
+
+    def subtype_elements(self):
+        text = self.peek_keyword()
+
+        if text == 'SIZE':
+            self.pos += 1
+
+            if self.peek() != '(':
+                self.error('"("')
+
+            return [
+                convert_size_constraint(None,
+                                        None,
+                                        Group(['SIZE', Group(self.constraint())]))
+            ]
+        elif text == 'FROM':
+            self.pos += 1
+
+            if self.peek() != '(':
+                self.error('"("')
+
+            return [
+                convert_permitted_alphabet(None,
+                                           None,
+                                           Group(['FROM'] + self.constraint()))
+            ]
+
+        tokens = self.value_range()
+
+        if tokens is not None:
+            return tokens
+
+        if text == 'WITH COMPONENT':
+            self.pos += 2
+
+            if self.peek() != '(':
+                self.error('"("')
+
+            return ['WITH COMPONENT'] + self.constraint()
+        elif text == 'WITH COMPONENTS':
+            self.pos += 2
+            tokens = self.multiple_type_constraints()
+
+            if tokens is None:
+                self.error('"{"')
+
+            return ['WITH COMPONENTS'] + tokens
+
+        tokens = self.value()
+
+        if tokens is not None:
+            return tokens
+
+        pos = self.pos
+
+        if self.accept('PATTERN'):
+            tokens = self.value()
+
+            if tokens is not None:
+                return ['PATTERN'] + tokens
+
+            self.pos = pos
+
+        if self.accept('INCLUDES'):
+            tokens = self.type_()
+
+            if tokens is not None:
+                return ['INCLUDES'] + tokens
+
+            self.pos = pos
+
+        return self.type_()
+
+    def value_range(self):
+        pos = self.pos
+        text = self.texts[pos]
+        lower = None
+
+        if self.is_word(pos) and RE_INTEGER.match(text):
+            following_text = self.texts[pos + 1]
+
+            if self.is_adjacent(pos):
+                if following_text == '.' and self.texts[pos + 2] == '..':
+                    lower = [self.combine_integer_dot(text)]
+                    self.pos += 3
+                elif following_text == '...':
+                    lower = [self.combine_integer_dot(text)]
+                    self.pos += 2
+
+            if lower is None and following_text == '..':
+                lower = self.integer(text)
+                self.pos += 2
+
+        if lower is None:
+            lower = self.value()
+
+            if lower is None:
+                return None
+
+            if self.accept('<'):
+                lower.append('<')
+
+            if not self.accept('..'):
+                self.pos = pos
+
+                return None
+
+        upper = []
+
+        if self.accept('<'):
+            upper.append('<')
+
+        value = self.value()
+
+        if value is None:
+            if self.accept('MAX'):
+                value = ['MAX']
+            else:
+                self.error('MAX')
+
+        return [convert_value_range(None, None, Group(lower + upper + value))]
+
+    def combine_integer_dot(self, text):
+        return str(self.integer(text)[0]) + '.'
+
+    def integer(self, text):
+        converted = convert_integer(None, None, [text])
+
+        if isinstance(converted, list):
+            return converted
+        else:
+            return [converted]
+
+    def multiple_type_constraints(self):
+        pos = self.pos
+
+        if self.accept('{'):
+            type_constraints = self.delimited_list(self.named_constraint)
+
+            if type_constraints is not None and self.accept('}'):
+                return ['{'] + type_constraints + ['}']
+
+            self.pos = pos + 1
+
+            if self.accept('...') and self.accept(','):
+                type_constraints = self.delimited_list(self.named_constraint)
+
+                if type_constraints is not None and self.accept('}'):
+                    return ['{', '...', ','] + type_constraints + ['}']
+
+        self.pos = pos
+
+        return None
+
+    def named_constraint(self):
+        if not self.is_identifier(self.pos):
+            return None
+
+        tokens = [self.texts[self.pos]]
+        self.pos += 1
+
+        if self.peek() == '(':
+            tokens += self.constraint()
+
+        if self.peek() in ['PRESENT', 'ABSENT', 'OPTIONAL']:
+            tokens.append(self.peek())
+            self.pos += 1
+
+        return tokens
+
+    # Values.
+
+    def value(self):
+        pos = self.pos
+        type_ = self.type_()
+
+        if type_ is not None:
+            if self.accept(':'):
+                value = self.value()
+
+                if value is not None:
+                    return [Group(type_ + [':'] + value)]
+
+            self.pos = pos
+
+        tokens = self.builtin_value()
+
+        if tokens is None:
+            return None
+
+        return [Group(tokens)]
+
+    def builtin_value(self):
+        pos = self.pos
+        text = self.texts[pos]
+        kind = self.kinds[pos]
+
+        # Bit string value.
+        if kind == BSTRING:
+            self.pos += 1
+
+            return [Tokens('BitStringValue', [convert_bstring(None, None, [text])])]
+        elif kind == HSTRING:
+            self.pos += 1
+
+            return [Tokens('BitStringValue', [convert_hstring(None, None, [text])])]
+        elif text == '{':
+            identifier_list = self.identifier_list()
+
+            if identifier_list is not None:
+                return [Tokens('BitStringValue', [identifier_list])]
+        elif text == 'CONTAINING':
+            self.pos += 1
+            value = self.value()
+
+            if value is None:
+                self.error('Value')
+
+            return [Tokens('BitStringValue', ['CONTAINING'] + Group(value).asList())]
+
+        # Boolean value.
+        if text in ['TRUE', 'FALSE']:
+            self.pos += 1
+
+            return [text]
+
+        # Character string value.
+        if kind == CSTRING:
+            self.pos += 1
+
+            return [text[1:-1]]
+        elif text == '{':
+            tokens = self.first(self.character_string_list,
+                                self.quadruple,
+                                self.tuple_)
+
+            if tokens is not None:
+                return tokens
+
+        is_identifier = self.is_identifier(pos)
+
+        # Choice value.
+        if is_identifier and self.texts[pos + 1] == ':':
+            self.pos += 2
+            value = self.value()
+
+            if value is not None:
+                return [text, ':'] + value
+
+            self.pos = pos
+
+        if text == '{':
+            tokens = self.first(self.relative_oid_value,
+                                self.sequence_value)
+
+            if tokens is not None:
+                return tokens
+
+        # Enumerated value.
+        if is_identifier:
+            self.pos += 1
+
+            return [text]
+
+        # Real value.
+        if kind == REAL or (kind == WORD and RE_REAL_NUMBER.match(text)):
+            self.pos += 1
+            converted = convert_real_number(None, None, [text])
+
+            if isinstance(converted, list):
+                return converted
+            else:
+                return [converted]
+
+        # Integer value, or any other word.
+        if kind == WORD:
+            self.pos += 1
+
+            return self.integer(text)
+
+        if text == '{':
+            return self.object_identifier_value()
+
+        return None
+
+    def identifier_list(self):
+        pos = self.pos
+        self.pos += 1
+        identifiers = []
+
+        if self.is_identifier(self.pos):
+            identifiers.append(self.texts[self.pos])
+            self.pos += 1
+
+            while self.peek() == ',' and self.is_identifier(self.pos + 1):
+                identifiers.append(self.texts[self.pos + 1])
+                self.pos += 2
+
+        if self.accept('}'):
+            return Tokens('IdentifierList', identifiers)
+
+        self.pos = pos
+
+        return None
+
+    def character_string_list(self):
+        pos = self.pos
+        self.pos += 1
+        tokens = self.delimited_list(self.chars_defn)
+
+        if tokens is not None and self.accept('}'):
+            return ['{'] + tokens + ['}']
+
+        self.pos = pos
+
+        return None
+
+    def chars_defn(self):
+        if self.kinds[self.pos] == CSTRING:
+            self.pos += 1
+
+            return [self.texts[self.pos - 1][1:-1]]
+
+        if self.peek() == '{':
+            tokens = self.first(self.quadruple, self.tuple_)
+
+            if tokens is not None:
+                return tokens
+
+        return self.defined_value()
+
+    def quadruple(self):
+        return self.numbers_in_braces(4)
+
+    def tuple_(self):
+        return self.numbers_in_braces(2)
+
+    def numbers_in_braces(self, count):
+        pos = self.pos
+        texts = self.texts
+
+        if texts[pos] != '{':
+            return None
+
+        tokens = ['{']
+
+        for i in range(count):
+            if i > 0:
+                if texts[pos + 2 * i] != ',':
+                    return None
+
+                tokens.append(',')
+
+            if not self.is_word(pos + 2 * i + 1):
+                return None
+
+            tokens.append(texts[pos + 2 * i + 1])
+
+        if texts[pos + 2 * count] != '}':
+            return None
+
+        self.pos += 2 * count + 1
+
+        return tokens + ['}']
+
+    def relative_oid_value(self):
+        pos = self.pos
+        self.pos += 1
+        tokens = []
+
+        while self.kinds[self.pos] == WORD:
+            tokens.append(Group([self.texts[self.pos]]))
+            self.pos += 1
+
+        if tokens and self.accept('}'):
+            return tokens
+
+        self.pos = pos
+
+        return None
+
+    def sequence_value(self):
+        pos = self.pos
+        self.pos += 1
+        tokens = self.delimited_list(self.named_value)
+
+        if tokens is None:
+            tokens = []
+
+        if self.accept('}'):
+            return ['{'] + tokens + ['}']
+
+        self.pos = pos
+
+        return None
+
+    def named_value(self):
+        pos = self.pos
+
+        if not self.is_identifier(pos):
+            return None
+
+        self.pos += 1
+        value = self.value()
+
+        if value is None:
+            self.pos = pos
+
+            return None
+
+        return [self.texts[pos]] + value
+
+    def object_identifier_value(self):
+        pos = self.pos
+
+        if not self.accept('{'):
+            return None
+
+        tokens = []
+
+        while True:
+            component = self.obj_id_component()
+
+            if component is None:
+                break
+
+            tokens.append(Group(component))
+
+        if tokens and self.accept('}'):
+            return tokens
+
+        self.pos = pos
+
+        return None
+
+    def obj_id_component(self):
+        pos = self.pos
+
+        if self.is_identifier(pos) and self.texts[pos + 1] == '(':
+            self.pos += 2
+            number_form = self.first(self.word, self.defined_value)
+
+            if number_form is None:
+                self.error('numberForm')
+
+            self.expect(')', '")"')
+
+            return [self.texts[pos]] + number_form
+
+        return self.first(self.defined_value, self.word)
+
+    def defined_value(self):
+        pos = self.pos
+
+        if (self.is_type_reference(pos)
+            and self.texts[pos + 1] == '.'
+            and self.is_identifier(pos + 2)):
+            self.pos += 3
+
+            return [self.texts[pos], '.', self.texts[pos + 2]]
+
+        if not self.is_identifier(pos):
+            return None
+
+        self.pos += 1
+        tokens = [self.texts[pos]]
+
+        if self.peek() == '{':
+            actual_parameter_list = self.actual_parameter_list()
+
+            if actual_parameter_list is not None:
+                tokens += actual_parameter_list
+
+        return tokens
+
+
+def parse_string(string):
+    """Parse given ASN.1 specification string and return a dictionary of
+    its contents.
+
+    """
+
+    return Parser(ignore_comments(string)).parse()
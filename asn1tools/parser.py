@@ -2,34 +2,35 @@
 
 """
 
+import os
 import logging
 import re
+import hashlib
+import pickle
+import time
+import multiprocessing
+from collections import OrderedDict
 
-from pyparsing import Literal
-from pyparsing import Keyword
-from pyparsing import Word
-from pyparsing import ZeroOrMore
-from pyparsing import Regex
-from pyparsing import printables
-from pyparsing import delimitedList
-from pyparsing import Group
-from pyparsing import Optional
-from pyparsing import Forward
-from pyparsing import StringEnd
-from pyparsing import OneOrMore
-from pyparsing import nums
-from pyparsing import Suppress
-from pyparsing import ParseException
-from pyparsing import ParseSyntaxException
-from pyparsing import NotAny
-from pyparsing import NoMatch
-from pyparsing import QuotedString
-from pyparsing import Combine
-from pyparsing import ParseResults
+from . import cache
 
 
 LOGGER = logging.getLogger(__name__)
 
+_GRAMMAR = None
+
+# Parsed files by absolute path and backend, least recently used
+# first. Each entry is the file modification time and size, the hash
+# of its contents and the pickled parsed dictionary.
+_PARSED_FILES = OrderedDict()
+
+# Maximum number of entries in _PARSED_FILES.
+_PARSED_FILES_MAXIMUM = 256
+
+# Files modified less than this number of seconds before they were
+# read may be modified again without changing their modification
+# time, and are always hashed.
+_RECENTLY_MODIFIED_SECONDS = 2
+
 
 class ParseError(Exception):
     pass
@@ -66,16 +67,6 @@ class Tokens(object):
                                                       self.tokens)
 
 
-class Tag(Group):
-
-    def __init__(self, tag, expr):
-        super(Tag, self).__init__(expr)
-        self.tag = tag
-
-    def postParse(self, instring, loc, tokenlist):
-        return Tokens(self.tag, tokenlist.asList())
-
-
 def merge_dicts(dicts):
     return {k: v for d in dicts for k, v in d.items()}
 
@@ -405,7 +396,7 @@ def convert_type(tokens):
         restricted_to = []
 
         for constraint_tokens in constraint:
-            if isinstance(constraint_tokens, ParseResults):
+            if hasattr(constraint_tokens, 'asList'):
                 constraint_tokens = constraint_tokens.asList()
 
             if len(constraint_tokens) != 1:
@@ -663,6 +654,34 @@ def create_grammar():
 
     """
 
+    from pyparsing import Literal
+    from pyparsing import Keyword
+    from pyparsing import Word
+    from pyparsing import ZeroOrMore
+    from pyparsing import Regex
+    from pyparsing import printables
+    from pyparsing import delimitedList
+    from pyparsing import Group
+    from pyparsing import Optional
+    from pyparsing import Forward
+    from pyparsing import StringEnd
+    from pyparsing import OneOrMore
+    from pyparsing import nums
+    from pyparsing import Suppress
+    from pyparsing import NotAny
+    from pyparsing import NoMatch
+    from pyparsing import QuotedString
+    from pyparsing import Combine
+
+    class Tag(Group):
+
+        def __init__(self, tag, expr):
+            super(Tag, self).__init__(expr)
+            self.tag = tag
+
+        def postParse(self, instring, loc, tokenlist):
+            return Tokens(self.tag, tokenlist.asList())
+
     # Keywords.
     SEQUENCE = Keyword('SEQUENCE').setName('SEQUENCE')
     SEQUENCE_OF = Keyword('SEQUENCE OF').setName('SEQUENCE OF')
@@ -1558,6 +1577,21 @@ def create_grammar():
     return specification
 
 
+def get_grammar():
+    """Return the ASN.1 grammar, creating it on first call. The grammar
+    is stateless and reused by all following calls, as creating it is
+    costly.
+
+    """
+
+    global _GRAMMAR
+
+    if _GRAMMAR is None:
+        _GRAMMAR = create_grammar()
+
+    return _GRAMMAR
+
+
 def ignore_comments(string):
     """Ignore comments in given string by replacing them with spaces. This
     reduces the parsing time by roughly a factor of two.
@@ -1571,19 +1605,38 @@ def ignore_comments(string):
                   string)
 
 
-def parse_string(string):
+def parse_string(string, backend='pyparsing'):
     """Parse given ASN.1 specification string and return a dictionary of
     its contents.
 
+    `backend` is the parser to use, either ``'pyparsing'`` or
+    ``'fast'``. Both give the same dictionary, but the fast parser is
+    many times faster and does not import pyparsing. The fast parser
+    is new and the pyparsing parser is therefore the default.
+
     >>> with open('foo.asn') as fin:
     ...     foo = asn1tools.parse_string(fin.read())
 
     """
 
-    grammar = create_grammar()
+    if backend not in ['pyparsing', 'fast']:
+        raise ParseError("unsupported backend '{}'".format(backend))
+
+    return _parse_string_without_comments(ignore_comments(string), backend)
+
+
+def _parse_string_without_comments(string, backend):
+    if backend == 'fast':
+        from . import fast_parser
+
+        return fast_parser.Parser(string).parse()
+
+    from pyparsing import ParseException
+    from pyparsing import ParseSyntaxException
+
+    grammar = get_grammar()
 
     try:
-        string = ignore_comments(string)
         tokens = grammar.parseString(string).asList()
     except (ParseException, ParseSyntaxException) as e:
         raise ParseError("Invalid ASN.1 syntax at line {}, column {}: '{}': {}.".format(
@@ -1595,10 +1648,29 @@ def parse_string(string):
     return tokens[0]
 
 
-def parse_files(filenames):
+def parse_files(filenames, cache_dir=None, backend='pyparsing', jobs=1):
     """Parse given ASN.1 specification file(s) and return a dictionary of
     its/their contents.
 
+    Each file is parsed separately and the parsed modules of all files
+    are merged into one dictionary. A file is only parsed again if
+    modified since it was last parsed by this process, or after
+    calling :func:`~asn1tools.parser.clear_parsed_files()`.
+
+    Give `cache_dir` to store the parsed dictionary of each file in
+    given directory and load it from there instead of parsing the
+    file as long as its contents is unchanged.
+
+    See :func:`~asn1tools.parse_string()` for a description of
+    `backend`.
+
+    Give `jobs` greater than one to parse up to `jobs` files in
+    parallel in a pool of worker processes. The result is identical
+    to parsing the files one after the other. On platforms starting
+    worker processes by spawning a new interpreter, for example
+    Windows, the main module must be guarded by ``if __name__ ==
+    '__main__':``.
+
     >>> foo = asn1tools.parse_files('foo.asn')
 
     """
@@ -1606,11 +1678,123 @@ def parse_files(filenames):
     if isinstance(filenames, str):
         filenames = [filenames]
 
-    string = ''
+    loaded = [_load_parsed_file(filename, backend) for filename in filenames]
+    args = [
+        (filename, cache_dir, backend)
+        for filename, (_, _, _, encoded) in zip(filenames, loaded)
+        if encoded is None
+    ]
+
+    if jobs > 1 and len(args) > 1:
+        pool = multiprocessing.Pool(min(jobs, len(args)))
+
+        try:
+            parsed = iter(pool.map(_parse_file, args))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        parsed = iter([_parse_file(file_args) for file_args in args])
+
+    dicts = []
+
+    for key, modified, digest, encoded in loaded:
+        if encoded is None:
+            encoded = next(parsed)
+
+        _PARSED_FILES.pop(key, None)
+        _PARSED_FILES[key] = (modified, digest, encoded)
+        dicts.append(pickle.loads(encoded))
+
+    while len(_PARSED_FILES) > _PARSED_FILES_MAXIMUM:
+        _PARSED_FILES.popitem(last=False)
+
+    return merge_dicts(dicts)
+
+
+def clear_parsed_files():
+    """Forget all files parsed by :func:`~asn1tools.parse_files()`, so
+    they are parsed again.
+
+    """
+
+    _PARSED_FILES.clear()
+
+
+def _parse_files_profiled(filenames, backend, profile):
+    """Parse given file(s) like :func:`parse_files()`, but always, and add
+    the time spent stripping comments and parsing to given profile.
+
+    """
+
+    if isinstance(filenames, str):
+        filenames = [filenames]
+
+    dicts = []
 
     for filename in filenames:
         with open(filename, 'r') as fin:
-            string += fin.read()
-            string += '\n'
+            string = fin.read()
+
+        with profile.phase('strip comments'):
+            string = ignore_comments(string)
+
+        with profile.phase('parse'):
+            dicts.append(_parse_string_without_comments(string, backend))
+
+    return merge_dicts(dicts)
+
+
+def _load_parsed_file(filename, backend):
+    """Returns the key, modification time and hash of given file, and its
+    pickled parsed dictionary, or ``None`` if it has to be parsed. The
+    modification time is ``None`` if the file was recently modified,
+    so its contents are hashed again next time.
+
+    """
+
+    key = (os.path.abspath(filename), backend)
+    stat = os.stat(filename)
+    modified = (stat.st_mtime, stat.st_size)
+    entry = _PARSED_FILES.get(key)
+
+    if entry is not None and entry[0] == modified:
+        return key, modified, entry[1], entry[2]
+
+    with open(filename, 'rb') as fin:
+        digest = hashlib.sha256(fin.read()).hexdigest()
+
+    if entry is not None and entry[1] == digest:
+        encoded = entry[2]
+    else:
+        encoded = None
+
+    if time.time() - stat.st_mtime < _RECENTLY_MODIFIED_SECONDS:
+        modified = None
+
+    return key, modified, digest, encoded
+
+
+def _parse_file(args):
+    """Parse given file and return its pickled dictionary. Runs in a worker
+    process if parsing files in parallel.
+
+    """
+
+    filename, cache_dir, backend = args
+    parsed = None
+
+    if cache_dir is not None:
+        key = cache.make_key('parse', [filename], backend)
+        parsed = cache.load(cache_dir, key)
+
+    if parsed is None:
+        LOGGER.debug("Parsing '%s'.", filename)
+
+        with open(filename, 'r') as fin:
+            parsed = parse_string(fin.read(), backend)
+
+        if cache_dir is not None:
+            cache.store(cache_dir, key, parsed)
 
-    return parse_string(string)
+    return pickle.dumps(parsed, pickle.HIGHEST_PROTOCOL)
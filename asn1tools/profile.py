@@ -0,0 +1,171 @@
+"""Profiling of compiling ASN.1 specifications.
+
+"""
+
+import gc
+import sys
+import time
+import types
+
+
+# Objects shared by all compiled specifications, and therefore not
+# part of the size of one.
+_SHARED_TYPES = (
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType
+)
+
+
+class _Phase(object):
+
+    def __init__(self, profile, name):
+        self._profile = profile
+        self._name = name
+        self._start_time = None
+
+    def __enter__(self):
+        self._start_time = time.time()
+
+    def __exit__(self, *_exc_info):
+        self._profile.add_phase_time(self._name,
+                                     time.time() - self._start_time)
+
+
+class _NullPhase(object):
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *_exc_info):
+        pass
+
+
+class Profile(object):
+    """Time spent in each phase of compiling a specification, and
+    statistics of its compiled types. Created by
+    :func:`~asn1tools.compile_files()` if `profile` is ``True``.
+
+    The attribute `memory` is the approximate size in bytes of the
+    compiled types, or ``None`` if unknown, which it is for lazily
+    compiled specifications.
+
+    """
+
+    def __init__(self):
+        self._phases = []
+        self._compiled_types = {}
+        self.memory = None
+
+    def phase(self, name):
+        """Returns a context manager adding the time spent in its body to
+        given phase.
+
+        """
+
+        return _Phase(self, name)
+
+    def add_phase_time(self, name, seconds):
+        for i, (phase_name, phase_seconds) in enumerate(self._phases):
+            if phase_name == name:
+                self._phases[i] = (name, phase_seconds + seconds)
+                break
+        else:
+            self._phases.append((name, seconds))
+
+    def count_compiled_type(self, module_name, type_name):
+        key = (module_name, type_name)
+        self._compiled_types[key] = self._compiled_types.get(key, 0) + 1
+
+    @property
+    def phases(self):
+        """A list of the name and time in seconds of each phase, in the
+        order they were first entered.
+
+        """
+
+        return list(self._phases)
+
+    @property
+    def number_of_compiled_types(self):
+        """The number of times a type was compiled.
+
+        """
+
+        return sum(self._compiled_types.values())
+
+    @property
+    def number_of_duplicate_compilations(self):
+        """The number of times a type already compiled was compiled again,
+        for example because it has recursive references.
+
+        """
+
+        return self.number_of_compiled_types - len(self._compiled_types)
+
+    def __str__(self):
+        lines = ['PHASE                           SECONDS']
+
+        for name, seconds in self._phases:
+            lines.append('{:31s} {:f}'.format(name, seconds))
+
+        total = sum([seconds for _, seconds in self._phases])
+        lines.append('{:31s} {:f}'.format('total', total))
+        lines.append('')
+        lines.append('Compiled types:          {}'.format(
+            self.number_of_compiled_types))
+        lines.append('Duplicate compilations:  {}'.format(
+            self.number_of_duplicate_compilations))
+
+        if self.memory is None:
+            memory = '-'
+        elif self.memory < 1000000:
+            memory = '{:.1f} kB'.format(self.memory / 1000.0)
+        else:
+            memory = '{:.1f} MB'.format(self.memory / 1000000.0)
+
+        lines.append('Memory (approximate):    {}'.format(memory))
+
+        return '\n'.join(lines)
+
+
+class NullProfile(Profile):
+    """A profile ignoring everything, used when not profiling.
+
+    """
+
+    _NULL_PHASE = _NullPhase()
+
+    def phase(self, name):
+        return self._NULL_PHASE
+
+    def add_phase_time(self, name, seconds):
+        pass
+
+    def count_compiled_type(self, module_name, type_name):
+        pass
+
+
+def approximate_size(obj):
+    """Returns the approximate size in bytes of given object and all
+    objects it references, except classes, modules and functions.
+
+    """
+
+    size = 0
+    seen = set()
+    objs = [obj]
+
+    while objs:
+        obj = objs.pop()
+
+        if id(obj) in seen or isinstance(obj, _SHARED_TYPES):
+            continue
+
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        objs.extend(gc.get_referents(obj))
+
+    return size
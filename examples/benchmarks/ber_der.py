@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+
+"""A performance example encoding, decoding and creating a TLV index of
+an X.509 certificate (RFC 5280) and the SNMP message of packages.py
+(RFC 1157) using the BER and DER codecs.
+
+Example execution:
+
+$ ./ber_der.py
+Starting encoding and decoding of a certificate and an SNMP message 10000 times. This may take a few seconds.
+
+MESSAGE      CODEC  ENCODE    DECODE    TLV INDEX
+certificate  ber    1.152024  1.293603  0.671954
+snmp         ber    0.769454  0.765260  0.258176
+certificate  der    1.283926  1.445099  0.730710
+snmp         der    0.801688  0.753724  0.258017
+$
+
+"""
+
+from __future__ import print_function
+
+import os
+import timeit
+import asn1tools
+
+SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
+SNMP_V1_ASN_PATHS = [
+    os.path.join(SCRIPT_DIR,
+                 '..',
+                 '..',
+                 'tests',
+                 'files',
+                 'ietf',
+                 filename)
+    for filename in ['rfc1155.asn', 'rfc1157.asn']]
+RFC5280_ASN_PATH = os.path.join(SCRIPT_DIR,
+                                '..',
+                                '..',
+                                'tests',
+                                'files',
+                                'ietf',
+                                'rfc5280.asn')
+
+# The message in packages.py.
+SNMP_ENCODED_MESSAGE = (
+    b'0\x81\x9f\x02\x01\x00\x04\x06public\xa3\x81\x91\x02'
+    b'\x01<\x02\x01\x00\x02\x01\x000\x81\x850"\x06\x12+\x06'
+    b'\x01\x04\x01\x81}\x083\n\x02\x01\x07\n\x86\xde\xb75'
+    b'\x04\x0c172.31.19.730\x17\x06\x12+\x06\x01\x04\x01\x81'
+    b'}\x083\n\x02\x01\x05\n\x86\xde\xb9`\x02\x01\x020#\x06'
+    b'\x12+\x06\x01\x04\x01\x81}\x083\n\x02\x01\x07\n\x86\xde'
+    b'\xb76\x04\r255.255.255.00!\x06\x12+\x06\x01\x04\x01\x81'
+    b'}\x083\n\x02\x01\x07\n\x86\xde\xb78\x04\x0b172.31.19.2'
+)
+
+CERTIFICATE = (
+    b'\x30\x82\x02\x12\x30\x82\x01\x7b\x02\x02\x0d\xfa\x30\x0d\x06\x09'
+    b'\x2a\x86\x48\x86\xf7\x0d\x01\x01\x05\x05\x00\x30\x81\x9b\x31\x0b'
+    b'\x30\x09\x06\x03\x55\x04\x06\x13\x02\x4a\x50\x31\x0e\x30\x0c\x06'
+    b'\x03\x55\x04\x08\x13\x05\x54\x6f\x6b\x79\x6f\x31\x10\x30\x0e\x06'
+    b'\x03\x55\x04\x07\x13\x07\x43\x68\x75\x6f\x2d\x6b\x75\x31\x11\x30'
+    b'\x0f\x06\x03\x55\x04\x0a\x13\x08\x46\x72\x61\x6e\x6b\x34\x44\x44'
+    b'\x31\x18\x30\x16\x06\x03\x55\x04\x0b\x13\x0f\x57\x65\x62\x43\x65'
+    b'\x72\x74\x20\x53\x75\x70\x70\x6f\x72\x74\x31\x18\x30\x16\x06\x03'
+    b'\x55\x04\x03\x13\x0f\x46\x72\x61\x6e\x6b\x34\x44\x44\x20\x57\x65'
+    b'\x62\x20\x43\x41\x31\x23\x30\x21\x06\x09\x2a\x86\x48\x86\xf7\x0d'
+    b'\x01\x09\x01\x16\x14\x73\x75\x70\x70\x6f\x72\x74\x40\x66\x72\x61'
+    b'\x6e\x6b\x34\x64\x64\x2e\x63\x6f\x6d\x30\x1e\x17\x0d\x31\x32\x30'
+    b'\x38\x32\x32\x30\x35\x32\x36\x35\x34\x5a\x17\x0d\x31\x37\x30\x38'
+    b'\x32\x31\x30\x35\x32\x36\x35\x34\x5a\x30\x4a\x31\x0b\x30\x09\x06'
+    b'\x03\x55\x04\x06\x13\x02\x4a\x50\x31\x0e\x30\x0c\x06\x03\x55\x04'
+    b'\x08\x0c\x05\x54\x6f\x6b\x79\x6f\x31\x11\x30\x0f\x06\x03\x55\x04'
+    b'\x0a\x0c\x08\x46\x72\x61\x6e\x6b\x34\x44\x44\x31\x18\x30\x16\x06'
+    b'\x03\x55\x04\x03\x0c\x0f\x77\x77\x77\x2e\x65\x78\x61\x6d\x70\x6c'
+    b'\x65\x2e\x63\x6f\x6d\x30\x5c\x30\x0d\x06\x09\x2a\x86\x48\x86\xf7'
+    b'\x0d\x01\x01\x01\x05\x00\x03\x4b\x00\x30\x48\x02\x41\x00\x9b\xfc'
+    b'\x66\x90\x79\x84\x42\xbb\xab\x13\xfd\x2b\x7b\xf8\xde\x15\x12\xe5'
+    b'\xf1\x93\xe3\x06\x8a\x7b\xb8\xb1\xe1\x9e\x26\xbb\x95\x01\xbf\xe7'
+    b'\x30\xed\x64\x85\x02\xdd\x15\x69\xa8\x34\xb0\x06\xec\x3f\x35\x3c'
+    b'\x1e\x1b\x2b\x8f\xfa\x8f\x00\x1b\xdf\x07\xc6\xac\x53\x07\x02\x03'
+    b'\x01\x00\x01\x30\x0d\x06\x09\x2a\x86\x48\x86\xf7\x0d\x01\x01\x05'
+    b'\x05\x00\x03\x81\x81\x00\x14\xb6\x4c\xbb\x81\x79\x33\xe6\x71\xa4'
+    b'\xda\x51\x6f\xcb\x08\x1d\x8d\x60\xec\xbc\x18\xc7\x73\x47\x59\xb1'
+    b'\xf2\x20\x48\xbb\x61\xfa\xfc\x4d\xad\x89\x8d\xd1\x21\xeb\xd5\xd8'
+    b'\xe5\xba\xd6\xa6\x36\xfd\x74\x50\x83\xb6\x0f\xc7\x1d\xdf\x7d\xe5'
+    b'\x2e\x81\x7f\x45\xe0\x9f\xe2\x3e\x79\xee\xd7\x30\x31\xc7\x20\x72'
+    b'\xd9\x58\x2e\x2a\xfe\x12\x5a\x34\x45\xa1\x19\x08\x7c\x89\x47\x5f'
+    b'\x4a\x95\xbe\x23\x21\x4a\x53\x72\xda\x2a\x05\x2f\x2e\xc9\x70\xf6'
+    b'\x5b\xfa\xfd\xdf\xb4\x31\xb2\xc1\x4a\x9c\x06\x25\x43\xa1\xe6\xb4'
+    b'\x1e\x7f\x86\x9b\x16\x40'
+)
+
+ITERATIONS = 10000
+
+
+def benchmark(specification, type_name, encoded):
+    decoded = specification.decode(type_name, encoded)
+
+    def encode():
+        specification.encode(type_name, decoded)
+
+    def decode():
+        specification.decode(type_name, encoded)
+
+    def tlv_index():
+        specification.tlv_index(encoded)
+
+    encode_time = timeit.timeit(encode, number=ITERATIONS)
+    decode_time = timeit.timeit(decode, number=ITERATIONS)
+    tlv_index_time = timeit.timeit(tlv_index, number=ITERATIONS)
+
+    return encode_time, decode_time, tlv_index_time
+
+
+def main():
+    print('Starting encoding and decoding of a certificate and an SNMP '
+          'message {} times. This may take a few seconds.'.format(ITERATIONS))
+    print()
+    print('MESSAGE      CODEC  ENCODE    DECODE    TLV INDEX')
+
+    for codec in ['ber', 'der']:
+        rfc5280 = asn1tools.compile_files(RFC5280_ASN_PATH, codec)
+        snmp_v1 = asn1tools.compile_files(SNMP_V1_ASN_PATHS, codec)
+
+        for message, specification, type_name, encoded in [
+                ('certificate', rfc5280, 'Certificate', CERTIFICATE),
+                ('snmp', snmp_v1, 'Message', SNMP_ENCODED_MESSAGE)
+        ]:
+            encode_time, decode_time, tlv_index_time = benchmark(
+                specification,
+                type_name,
+                encoded)
+            print('{:12s} {:6s} {:f}  {:f}  {:f}'.format(message,
+                                                        codec,
+                                                        encode_time,
+                                                        decode_time,
+                                                        tlv_index_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -10,16 +10,16 @@ Starting encoding and decoding of a message 1000 times. This may take a few seco
 Encoding the message 1000 times took:
 
 CODEC      SECONDS
-jer        0.222054
-ber        0.341499
-uper       0.620804
+jer        0.174980
+uper       0.206334
+ber        0.211220
 
 Decoding the message 1000 times took:
 
 CODEC      SECONDS
-jer        0.352046
-uper       0.538043
-ber        0.650008
+jer        0.154010
+ber        0.255027
+uper       0.268737
 $
 
 """
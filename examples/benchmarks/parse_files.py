@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+
+"""A performance example comparing parsing the 3GPP specifications
+one file after the other and in parallel in a pool of worker
+processes, using both parser backends.
+
+The speedup of parallel parsing depends on the number of CPUs. Below
+is an example execution on a machine with a single CPU, where the
+worker processes only add overhead.
+
+$ ./parse_files.py
+Parsing 4 specification files using 1, 2 and 4 jobs. This may take a few seconds.
+
+BACKEND      JOBS  SECONDS
+pyparsing    1     9.066638
+pyparsing    2     8.525959
+pyparsing    4     8.321796
+fast         1     0.302095
+fast         2     0.395664
+fast         4     0.440859
+$
+
+"""
+
+from __future__ import print_function
+
+import os
+import glob
+import time
+import shutil
+import tempfile
+import asn1tools
+
+SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
+ASN_PATHS = sorted(glob.glob(os.path.join(SCRIPT_DIR,
+                                          '..',
+                                          '..',
+                                          'tests',
+                                          'files',
+                                          '3gpp',
+                                          '*.asn')))
+JOBS = [1, 2, 4]
+
+
+def parse_files(backend, jobs):
+    # Parse copies of the files, as parse_files() does not parse files
+    # it has already parsed again.
+    tmp_dir = tempfile.mkdtemp()
+
+    try:
+        filenames = []
+
+        for path in ASN_PATHS:
+            filename = os.path.join(tmp_dir, os.path.basename(path))
+            shutil.copy(path, filename)
+            filenames.append(filename)
+
+        start_time = time.time()
+        parsed = asn1tools.parse_files(filenames, backend=backend, jobs=jobs)
+
+        return time.time() - start_time, parsed
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def main():
+    print('Parsing {} specification files using {} jobs. This may take '
+          'a few seconds.'.format(
+              len(ASN_PATHS),
+              ', '.join([str(jobs) for jobs in JOBS[:-1]])
+              + ' and ' + str(JOBS[-1])))
+    print()
+    print('BACKEND      JOBS  SECONDS')
+
+    expected = None
+
+    for backend in ['pyparsing', 'fast']:
+        for jobs in JOBS:
+            seconds, parsed = parse_files(backend, jobs)
+
+            if expected is None:
+                expected = parsed
+            elif parsed != expected:
+                raise Exception('Parsed specifications differ.')
+
+            print('{:12s} {:<5d} {:f}'.format(backend, jobs, seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -66,11 +66,19 @@ print('done.')
 
 # Receive the bind response, decode it, and print it.
 print('Receiving LDAP bind response from the server... ', end='')
-encoded_bind_response = sock.recv(2)
-length = db.decode_length(encoded_bind_response)
-encoded_bind_response += sock.recv(length - 2)
+decoder = db.stream_decoder('LDAPMessage')
+bind_response = None
+
+while bind_response is None:
+    data = sock.recv(4096)
+
+    if not data:
+        raise Exception('Connection closed by the server.')
+
+    decoder.feed(data)
+    bind_response = next(decoder, None)
+
 print('done.')
 
-bind_response = db.decode('LDAPMessage', encoded_bind_response)
 pprint(bind_response)
 sock.close()
@@ -1,6 +1,9 @@
+import io
+import mmap
 import unittest
 import timeit
 import sys
+import tempfile
 from copy import deepcopy
 
 import asn1tools
@@ -1356,7 +1359,7 @@ class Asn1ToolsBerTest(unittest.TestCase):
             all_types.encode('Sequence12', {'a': [{'a': []}]})
 
         with self.assertRaises(NotImplementedError):
-            all_types.decode('Sequence12', b'\x30\x04\xa0\x02\x30\x00')
+            all_types.decode('Sequence12', b'\x30\x04\x30\x02\x30\x00')
 
     def test_all_types_automatic_tags(self):
         all_types = asn1tools.compile_files(
@@ -2045,6 +2048,606 @@ class Asn1ToolsBerTest(unittest.TestCase):
 
         self.assertEqual(str(cm.exception), "'1.3.1000.8'")
 
+    def test_nested_long_lengths(self):
+        foo = asn1tools.compile_string(
+            'Foo DEFINITIONS ::= BEGIN '
+            'A ::= SEQUENCE { a SEQUENCE { b OCTET STRING, '
+            'c SEQUENCE OF OCTET STRING } } '
+            'END',
+            'ber')
+        decoded = {'a': {'b': 200 * b'\x01', 'c': 2 * [150 * b'\x02']}}
+        encoded = foo.encode('A', decoded)
+        self.assertEqual(type(encoded), bytearray)
+        self.assertEqual(
+            encoded,
+            b'\x30\x82\x02\x05\x30\x82\x02\x01\x04\x81\xc8' + 200 * b'\x01'
+            + b'\x30\x82\x01\x32' + 2 * (b'\x04\x81\x96' + 150 * b'\x02'))
+        self.assertEqual(foo.decode('A', encoded), decoded)
+
+    def test_zero_copy(self):
+        foo = asn1tools.compile_string(
+            'Foo DEFINITIONS ::= BEGIN '
+            'A ::= SEQUENCE { a OCTET STRING, b BIT STRING, c ANY, d IA5String } '
+            'END',
+            'ber')
+        decoded_message = {
+            'a': b'\x01\x02\x03',
+            'b': (b'\x80', 1),
+            'c': b'\x02\x01\x05',
+            'd': 'hi'
+        }
+        encoded_message = foo.encode('A', decoded_message)
+
+        with tempfile.TemporaryFile() as fout:
+            fout.write(encoded_message)
+            fout.flush()
+            mapped = mmap.mmap(fout.fileno(), 0, access=mmap.ACCESS_READ)
+
+            for data in [bytes(encoded_message),
+                         bytearray(encoded_message),
+                         memoryview(encoded_message),
+                         mapped]:
+                decoded = foo.decode('A', data, zero_copy=True)
+                self.assertEqual(decoded, decoded_message)
+
+                if sys.version_info[0] > 2:
+                    self.assertIsInstance(decoded['a'], memoryview)
+                    self.assertIsInstance(decoded['b'][0], memoryview)
+                    self.assertIsInstance(decoded['c'], memoryview)
+                    self.assertEqual(decoded['a'].tobytes(), b'\x01\x02\x03')
+
+                del decoded
+
+            mapped.close()
+
+        # The decoded values are copies by default.
+        decoded = foo.decode('A', encoded_message)
+        self.assertIsInstance(decoded['a'], bytearray)
+
+    def test_choice_and_set_tag_index(self):
+        foo = asn1tools.compile_string(
+            'Foo DEFINITIONS IMPLICIT TAGS ::= BEGIN '
+            'A ::= CHOICE { a [0] INTEGER, b B, c [100] BOOLEAN } '
+            'B ::= CHOICE { d [1] INTEGER, e [2] NULL } '
+            'C ::= SET { a [0] INTEGER, b B, c [100] BOOLEAN OPTIONAL, '
+            'f [3] INTEGER DEFAULT 5 } '
+            'END',
+            'ber')
+
+        # CHOICE members, including members of a nested untagged
+        # CHOICE, are found by their tag.
+        datas = [
+            ({'a': 1},           b'\x80\x01\x01'),
+            ({'b': {'d': 2}},    b'\x81\x01\x02'),
+            ({'b': {'e': None}}, b'\x82\x00'),
+            ({'c': True},        b'\x9f\x64\x01\xff')
+        ]
+
+        for decoded, encoded in datas:
+            self.assertEqual(foo.encode('A', decoded), encoded)
+            self.assertEqual(foo.decode('A', encoded), decoded)
+
+        # SET members in any order, and unknown members are skipped.
+        decoded = {'a': 1, 'b': {'d': 2}, 'f': 5}
+        encoded = b'\x31\x06\x80\x01\x01\x81\x01\x02'
+        self.assertEqual(foo.encode('C', decoded), encoded)
+
+        for encoded in [b'\x31\x06\x80\x01\x01\x81\x01\x02',
+                        b'\x31\x06\x81\x01\x02\x80\x01\x01',
+                        b'\x31\x09\x84\x01\x07\x81\x01\x02\x80\x01\x01']:
+            self.assertEqual(foo.decode('C', encoded), decoded)
+
+        self.assertEqual(
+            foo.decode('C', b'\x31\x0a\x9f\x64\x01\x00\x81\x01\x02\x80\x01\x01'),
+            {'a': 1, 'b': {'d': 2}, 'c': False, 'f': 5})
+
+        # Missing mandatory member.
+        with self.assertRaises(asn1tools.DecodeError) as cm:
+            foo.decode('C', b'\x31\x03\x81\x01\x02')
+
+        self.assertEqual(str(cm.exception), 'a: member not found')
+
+    def test_absent_members(self):
+        foo = asn1tools.compile_string(
+            'Foo DEFINITIONS IMPLICIT TAGS ::= BEGIN '
+            'A ::= SEQUENCE { a [0] INTEGER OPTIONAL, b [1] INTEGER DEFAULT 3, '
+            'c CHOICE { d [2] INTEGER, e [3] NULL } OPTIONAL, f INTEGER } '
+            'END',
+            'ber')
+
+        datas = [
+            ({'b': 3, 'f': 5},                   b'\x30\x03\x02\x01\x05'),
+            ({'b': 3, 'c': {'e': None}, 'f': 5}, b'\x30\x05\x83\x00\x02\x01\x05'),
+            ({'a': 1, 'b': 4, 'f': 5},
+             b'\x30\x09\x80\x01\x01\x81\x01\x04\x02\x01\x05')
+        ]
+
+        for decoded, encoded in datas:
+            self.assertEqual(foo.decode('A', encoded), decoded)
+
+        # Absent optional members are skipped, but a bad mandatory
+        # member is still an error.
+        with self.assertRaises(asn1tools.DecodeError) as cm:
+            foo.decode('A', b'\x30\x03\x04\x01\x05')
+
+        self.assertEqual(str(cm.exception),
+                         'f: expected INTEGER with tag 0x02 but got 0x04 at offset 2')
+
+    def test_decode_paths(self):
+        rfc1157 = asn1tools.compile_files([
+            'tests/files/ietf/rfc1155.asn',
+            'tests/files/ietf/rfc1157.asn'
+        ])
+        encoded_message = (
+            b'0\x81\x9f\x02\x01\x00\x04\x06public\xa3\x81\x91\x02'
+            b'\x01<\x02\x01\x00\x02\x01\x000\x81\x850"\x06\x12+\x06'
+            b'\x01\x04\x01\x81}\x083\n\x02\x01\x07\n\x86\xde\xb75'
+            b'\x04\x0c172.31.19.730\x17\x06\x12+\x06\x01\x04\x01\x81'
+            b'}\x083\n\x02\x01\x05\n\x86\xde\xb9`\x02\x01\x020#\x06'
+            b'\x12+\x06\x01\x04\x01\x81}\x083\n\x02\x01\x07\n\x86\xde'
+            b'\xb76\x04\r255.255.255.00!\x06\x12+\x06\x01\x04\x01\x81'
+            b'}\x083\n\x02\x01\x07\n\x86\xde\xb78\x04\x0b172.31.19.2'
+        )
+        decoded = rfc1157.decode('Message', encoded_message)
+        set_request = decoded['data']['set-request']
+
+        datas = [
+            (['community'], {'community': b'public'}),
+            (['version', 'community'], {'version': 0, 'community': b'public'}),
+            (['data.set-request.request-id'],
+             {'data': {'set-request': {'request-id': 60}}}),
+            (['data.get-request'], {'data': {}}),
+            (['data.set-request.variable-bindings.name'],
+             {
+                 'data': {
+                     'set-request': {
+                         'variable-bindings': [
+                             {'name': binding['name']}
+                             for binding in set_request['variable-bindings']
+                         ]
+                     }
+                 }
+             }),
+            (['data', 'data.set-request.error-index'],
+             {'data': decoded['data']}),
+            ([], {})
+        ]
+
+        for paths, expected in datas:
+            self.assertEqual(rfc1157.decode('Message',
+                                            encoded_message,
+                                            paths=paths),
+                             expected)
+
+        # SET members in any order.
+        foo = asn1tools.compile_string(
+            'Foo DEFINITIONS IMPLICIT TAGS ::= BEGIN '
+            'A ::= SET { a [0] INTEGER, b [1] SEQUENCE { c [2] INTEGER, '
+            'd [3] INTEGER DEFAULT 4 } } '
+            'END',
+            'ber')
+        encoded = b'\x31\x08\xa1\x03\x82\x01\x02\x80\x01\x01'
+        self.assertEqual(foo.decode('A', encoded, paths=['a']), {'a': 1})
+        self.assertEqual(foo.decode('A', encoded, paths=['b.d']),
+                         {'b': {'d': 4}})
+
+    def test_decode_lazy(self):
+        rfc1157 = asn1tools.compile_files([
+            'tests/files/ietf/rfc1155.asn',
+            'tests/files/ietf/rfc1157.asn'
+        ])
+        encoded_message = (
+            b'0\x81\x9f\x02\x01\x00\x04\x06public\xa3\x81\x91\x02'
+            b'\x01<\x02\x01\x00\x02\x01\x000\x81\x850"\x06\x12+\x06'
+            b'\x01\x04\x01\x81}\x083\n\x02\x01\x07\n\x86\xde\xb75'
+            b'\x04\x0c172.31.19.730\x17\x06\x12+\x06\x01\x04\x01\x81'
+            b'}\x083\n\x02\x01\x05\n\x86\xde\xb9`\x02\x01\x020#\x06'
+            b'\x12+\x06\x01\x04\x01\x81}\x083\n\x02\x01\x07\n\x86\xde'
+            b'\xb76\x04\r255.255.255.00!\x06\x12+\x06\x01\x04\x01\x81'
+            b'}\x083\n\x02\x01\x07\n\x86\xde\xb78\x04\x0b172.31.19.2'
+        )
+        decoded = rfc1157.decode('Message', encoded_message)
+        lazy = rfc1157.decode('Message', encoded_message, lazy=True)
+
+        self.assertEqual(lazy['community'], b'public')
+        self.assertEqual(list(lazy), ['version', 'community', 'data'])
+        bindings = lazy['data']['set-request']['variable-bindings']
+        self.assertEqual(len(bindings), 4)
+        self.assertEqual(bindings[-1]['name'],
+                         '1.3.6.1.4.1.253.8.51.10.2.1.7.10.14130104')
+        self.assertEqual(bindings[1:3],
+                         decoded['data']['set-request']['variable-bindings'][1:3])
+        self.assertEqual(lazy, decoded)
+        self.assertEqual(decoded, lazy)
+        self.assertEqual(repr(lazy), repr(decoded))
+
+        # Lazily decoded values can be modified and encoded.
+        lazy['version'] = 1
+        del bindings[0]
+        decoded['version'] = 1
+        del decoded['data']['set-request']['variable-bindings'][0]
+        self.assertEqual(lazy, decoded)
+        self.assertEqual(rfc1157.encode('Message', lazy),
+                         rfc1157.encode('Message', decoded))
+
+        # Errors are raised when a member is accessed.
+        lazy = rfc1157.decode('Message',
+                              b'\x30\x0c\x02\x01\x00\x02\x01\x00\xa3\x04\x30\x00\x30\x00',
+                              lazy=True)
+        self.assertEqual(lazy['version'], 0)
+
+        with self.assertRaises(asn1tools.DecodeError) as cm:
+            lazy['community']
+
+        self.assertEqual(str(cm.exception),
+                         'community: expected OCTET STRING with tag 0x04 but '
+                         'got 0x02 at offset 5')
+
+        # Errors in nested members have the same location as when
+        # decoding all at once.
+        foo = asn1tools.compile_string(
+            'Foo DEFINITIONS ::= BEGIN '
+            'A ::= SEQUENCE { a SEQUENCE OF SEQUENCE { '
+            'b CHOICE { c SEQUENCE { d INTEGER } } } } '
+            'END')
+        encoded = b'\x30\x08\x30\x06\x30\x04\x30\x02\x01\x00'
+
+        with self.assertRaises(asn1tools.DecodeError) as cm:
+            foo.decode('A', encoded)
+
+        message = str(cm.exception)
+        self.assertEqual(message,
+                         'a: b: d: expected INTEGER with tag 0x02 but got '
+                         '0x01 at offset 8')
+        lazy = foo.decode('A', encoded, lazy=True)
+
+        with self.assertRaises(asn1tools.DecodeError) as cm:
+            lazy['a'][0]['b']['c']['d']
+
+        self.assertEqual(str(cm.exception), message)
+
+        # Out of data.
+        with self.assertRaises(asn1tools.DecodeError) as cm:
+            rfc1157.decode('Message', b'\x30\x03\x02\x01\x00', lazy=True)
+
+        self.assertEqual(str(cm.exception),
+                         'community: out of data at offset 5')
+
+        # Optional members with unknown tags are only present if they
+        # can be decoded, as when decoding all at once.
+        foo = asn1tools.compile_string(
+            'Foo DEFINITIONS ::= BEGIN '
+            'A ::= SEQUENCE { a INTEGER, b ANY DEFINED BY a OPTIONAL, '
+            'c BOOLEAN } '
+            'END',
+            any_defined_by_choices={('Foo', 'A', 'b'): {0: 'NULL'}})
+        encoded = b'\x30\x06\x02\x01\x00\x01\x01\xff'
+        self.assertEqual(foo.decode('A', encoded), {'a': 0, 'c': True})
+        self.assertEqual(foo.decode('A', encoded, lazy=True),
+                         {'a': 0, 'c': True})
+
+    def test_stream_decoder(self):
+        foo = asn1tools.compile_string(
+            'Foo DEFINITIONS ::= BEGIN '
+            'A ::= [APPLICATION 100] SEQUENCE { a INTEGER, b OCTET STRING } '
+            'END',
+            'ber')
+        decoded_messages = [
+            {'a': 1, 'b': b''},
+            {'a': 2, 'b': 200 * b'\x12'},
+            {'a': 3, 'b': b'\x34'}
+        ]
+        encoded = b''.join([foo.encode('A', decoded)
+                            for decoded in decoded_messages])
+        self.assertEqual(encoded[:4], b'\x7f\x64\x07\x30')
+
+        # Feed all data at once, one byte at a time and in chunks of
+        # various sizes.
+        for size in [len(encoded), 1, 2, 3, 100]:
+            decoder = foo.stream_decoder('A')
+            decoded = []
+
+            for i in range(0, len(encoded), size):
+                decoder.feed(encoded[i:i + size])
+                decoded.extend(decoder)
+
+            self.assertEqual(decoded, decoded_messages)
+            self.assertEqual(list(decoder), [])
+
+        # A bad value is skipped.
+        decoder = foo.stream_decoder('A')
+        decoder.feed(b'\x7f\x64\x05\x30\x03\x04\x01\x00' + encoded[:10])
+
+        with self.assertRaises(asn1tools.DecodeError):
+            next(decoder)
+
+        self.assertEqual(list(decoder), [decoded_messages[0]])
+
+        # An absent optional member at the end of a value is not taken
+        # from the next value.
+        foo = asn1tools.compile_string(
+            'Foo DEFINITIONS ::= BEGIN '
+            'R ::= SEQUENCE { a INTEGER, b SEQUENCE { c INTEGER } OPTIONAL } '
+            'END',
+            'ber')
+        decoder = foo.stream_decoder('R')
+        decoder.feed(3 * b'\x30\x03\x02\x01\x01')
+        self.assertEqual(list(decoder), 3 * [{'a': 1}])
+
+        # A member may not end after the value.
+        decoder.feed(b'\x30\x03\x02\x02\x01' + b'\x30\x03\x02\x01\x01')
+
+        with self.assertRaises(asn1tools.DecodeError) as cm:
+            next(decoder)
+
+        self.assertEqual(str(cm.exception),
+                         ': expected value at offset 15 to end at offset 20 '
+                         'but it ended at offset 21')
+        self.assertEqual(list(decoder), [{'a': 1}])
+
+    def test_indefinite_length(self):
+        foo = asn1tools.compile_string(
+            'Foo DEFINITIONS ::= BEGIN '
+            'A ::= SEQUENCE { a INTEGER, b [0] SEQUENCE OF INTEGER, '
+            'c [1] CHOICE { d INTEGER, e BOOLEAN }, f ANY OPTIONAL, '
+            'g BOOLEAN OPTIONAL } '
+            'B ::= SET { a [0] INTEGER, b [1] BOOLEAN OPTIONAL } '
+            'C ::= SEQUENCE OF INTEGER '
+            'D ::= [5] SEQUENCE OF B '
+            'END')
+
+        datas = [
+            ('A',
+             {'a': 1, 'b': [1, 2], 'c': {'e': True}, 'f': b'\x30\x80\x02\x01\x05\x00\x00'},
+             b'\x30\x80\x02\x01\x01\xa0\x80\x30\x80\x02\x01\x01\x02\x01\x02'
+             b'\x00\x00\x00\x00\xa1\x80\x01\x01\xff\x00\x00\x30\x80\x02\x01'
+             b'\x05\x00\x00\x00\x00'),
+            ('A',
+             {'a': 1, 'b': [], 'c': {'d': 5}},
+             b'\x30\x80\x02\x01\x01\xa0\x80\x30\x80\x00\x00\x00\x00\xa1\x80'
+             b'\x02\x01\x05\x00\x00\x00\x00'),
+            # An unknown member is skipped.
+            ('A',
+             {'a': 1, 'b': [], 'c': {'d': 5}, 'f': b'\x01\x01\x00'},
+             b'\x30\x80\x02\x01\x01\xa0\x02\x30\x00\xa1\x03\x02\x01\x05\x01'
+             b'\x01\x00\x85\x00\x00\x00'),
+            ('B',
+             {'b': True, 'a': 2},
+             b'\x31\x80\xa1\x80\x01\x01\xff\x00\x00\xa0\x03\x02\x01\x02\x00'
+             b'\x00')
+        ]
+
+        for type_name, decoded, encoded in datas:
+            self.assertEqual(foo.decode(type_name, encoded), decoded)
+            self.assertEqual(foo.decode(type_name, encoded, lazy=True),
+                             decoded)
+            decoder = foo.stream_decoder(type_name)
+
+            for i in range(len(encoded)):
+                decoder.feed(encoded[i:i + 1])
+
+                if i < len(encoded) - 1:
+                    self.assertEqual(list(decoder), [])
+
+            self.assertEqual(list(decoder), [decoded])
+
+        self.assertEqual(foo.decode('A', datas[0][2], paths=['a', 'c']),
+                         {'a': 1, 'c': {'e': True}})
+
+        # Missing end-of-contents.
+        with self.assertRaises(asn1tools.DecodeError) as cm:
+            foo.decode('A',
+                       b'\x30\x80\x02\x01\x01\xa0\x80\x30\x00\x02\x01\x05')
+
+        self.assertEqual(str(cm.exception),
+                         'b: expected end-of-contents at offset 9')
+
+        # Encode to a stream.
+        for type_name, decoded, encoded in [
+                ('C',
+                 [0, 1, 2],
+                 b'\x30\x80\x02\x01\x00\x02\x01\x01\x02\x01\x02\x00\x00'),
+                ('D',
+                 [{'a': 1}],
+                 b'\xa5\x80\x30\x80\x31\x05\xa0\x03\x02\x01\x01\x00\x00\x00'
+                 b'\x00')
+        ]:
+            stream = io.BytesIO()
+            foo.encode_stream(type_name, iter(decoded), stream)
+            self.assertEqual(stream.getvalue(), encoded)
+            self.assertEqual(foo.decode(type_name, encoded), decoded)
+
+        with self.assertRaises(asn1tools.EncodeError) as cm:
+            foo.encode_stream('A', [], io.BytesIO())
+
+        self.assertEqual(str(cm.exception),
+                         'only SEQUENCE OF and SET OF can be encoded to a '
+                         'stream, not SEQUENCE')
+
+    def test_constructed_strings(self):
+        foo = asn1tools.compile_string(
+            'Foo DEFINITIONS ::= BEGIN '
+            'A ::= OCTET STRING '
+            'B ::= BIT STRING '
+            'C ::= IA5String '
+            'D ::= SEQUENCE { a [0] IMPLICIT OCTET STRING, b UTF8String } '
+            'END')
+
+        datas = [
+            # Indefinite length.
+            ('A',
+             b'\x01\x02\x03',
+             b'\x24\x80\x04\x02\x01\x02\x04\x01\x03\x00\x00'),
+            # Definite length.
+            ('A',
+             b'\x01\x02\x03',
+             b'\x24\x07\x04\x02\x01\x02\x04\x01\x03'),
+            # Nested constructed segments.
+            ('A',
+             b'\x01\x02\x03',
+             b'\x24\x80\x24\x04\x04\x02\x01\x02\x24\x80\x04\x01\x03'
+             b'\x00\x00\x00\x00'),
+            ('A', b'', b'\x24\x80\x00\x00'),
+            ('B',
+             (b'\x01\x80', 9),
+             b'\x23\x80\x03\x02\x00\x01\x03\x02\x07\x80\x00\x00'),
+            ('C', 'foo', b'\x36\x80\x04\x02fo\x04\x01o\x00\x00'),
+            ('D',
+             {'a': b'\x01\x02', 'b': 'bar'},
+             b'\x30\x80\xa0\x80\x04\x01\x01\x04\x01\x02\x00\x00\x2c'
+             b'\x07\x04\x01b\x04\x02ar\x00\x00')
+        ]
+
+        for type_name, decoded, encoded in datas:
+            self.assertEqual(foo.decode(type_name, encoded), decoded)
+            self.assertEqual(foo.decode(type_name, encoded, zero_copy=True),
+                             decoded)
+            decoder = foo.stream_decoder(type_name)
+            decoder.feed(encoded)
+            self.assertEqual(list(decoder), [decoded])
+
+        # Bad segment tag.
+        with self.assertRaises(asn1tools.DecodeError) as cm:
+            foo.decode('A', b'\x24\x80\x03\x01\x01\x00\x00')
+
+        self.assertEqual(str(cm.exception),
+                         ': expected segment with tag 0x04 but got 0x03 at '
+                         'offset 2')
+
+        # A segment beyond the end of the constructed string.
+        with self.assertRaises(asn1tools.DecodeError) as cm:
+            foo.decode('A', b'\x24\x02\x04\x01\x01')
+
+        self.assertEqual(str(cm.exception),
+                         ': segments end at offset 5, but the constructed '
+                         'string ends at offset 4')
+
+    def test_decode_many(self):
+        foo = asn1tools.compile_files('tests/files/foo.asn')
+        decoded_messages = [
+            {'id': i, 'question': 'Is {}+1=3?'.format(i)}
+            for i in range(1000)
+        ]
+        encoded = bytearray()
+        offsets = []
+
+        for decoded in decoded_messages:
+            offsets.append(len(encoded))
+            encoded += foo.encode('Question', decoded)
+
+        encoded = bytes(encoded)
+        expected = list(zip(offsets, decoded_messages))
+
+        self.assertEqual(list(foo.decode_many('Question', encoded)),
+                         decoded_messages)
+        self.assertEqual(list(foo.decode_many('Question',
+                                              encoded,
+                                              offsets=True)),
+                         expected)
+        self.assertEqual(list(foo.iter_decode('Question',
+                                              io.BytesIO(encoded))),
+                         decoded_messages)
+        self.assertEqual(list(foo.iter_decode('Question',
+                                              io.BytesIO(encoded),
+                                              offsets=True)),
+                         expected)
+
+        with tempfile.TemporaryFile() as fout:
+            fout.write(encoded)
+            fout.flush()
+            mapped = mmap.mmap(fout.fileno(), 0, access=mmap.ACCESS_READ)
+            self.assertEqual(list(foo.decode_many('Question',
+                                                  mapped,
+                                                  zero_copy=True,
+                                                  offsets=True)),
+                             expected)
+            mapped.close()
+
+        # Out of data in the last value.
+        for decode_many in [foo.decode_many, foo.iter_decode]:
+            data = encoded[:offsets[1] + 4]
+
+            if decode_many == foo.iter_decode:
+                data = io.BytesIO(data)
+
+            decoded = decode_many('Question', data)
+            self.assertEqual(next(decoded), decoded_messages[0])
+
+            with self.assertRaises(asn1tools.DecodeError) as cm:
+                next(decoded)
+
+            self.assertEqual(str(cm.exception),
+                             ': out of data at offset 16')
+
+        # An absent optional member at the end of a value is not taken
+        # from the next value.
+        foo = asn1tools.compile_string(
+            'Foo DEFINITIONS ::= BEGIN '
+            'R ::= SEQUENCE { a INTEGER, b SEQUENCE { c INTEGER } OPTIONAL } '
+            'END')
+        encoded = 3 * b'\x30\x03\x02\x01\x01'
+        self.assertEqual(list(foo.decode_many('R', encoded)), 3 * [{'a': 1}])
+
+        # A member may not end after the value.
+        decoded = foo.decode_many('R', b'\x30\x03\x02\x02\x01' + encoded)
+
+        with self.assertRaises(asn1tools.DecodeError) as cm:
+            next(decoded)
+
+        self.assertEqual(str(cm.exception),
+                         ': expected value at offset 0 to end at offset 5 '
+                         'but it ended at offset 6')
+
+    def test_tlv_index(self):
+        foo = asn1tools.compile_files('tests/files/foo.asn')
+
+        # Two values, the second with indefinite lengths.
+        encoded = (b'0\x0e\x02\x01\x01\x16\x09Is 1+1=3?'
+                   b'\x30\x80\x02\x01\x02\x7f\x64\x80\x04\x01\x05\x00\x00'
+                   b'\x00\x00')
+        index = foo.tlv_index(encoded)
+        self.assertEqual(len(index), 7)
+        self.assertEqual(list(index.tags),
+                         [0x30, 0x02, 0x16, 0x30, 0x02, 0x7f64, 0x04])
+        self.assertEqual(list(index.offsets), [0, 2, 5, 16, 18, 21, 24])
+        self.assertEqual(list(index.contents_offsets), [2, 4, 7, 18, 20, 24, 26])
+        self.assertEqual(list(index.lengths), [14, 1, 9, 11, 1, 3, 1])
+        self.assertEqual(list(index.depths), [0, 1, 1, 0, 1, 1, 2])
+        self.assertEqual(list(index.parents), [-1, 0, 0, -1, 3, 3, 5])
+        self.assertEqual(index.children(0), [1, 2])
+        self.assertEqual(index.children(2), [])
+        self.assertEqual(index.children(3), [4, 5])
+        self.assertTrue(index.is_constructed(0))
+        self.assertFalse(index.is_constructed(1))
+        self.assertFalse(index.is_indefinite(0))
+        self.assertTrue(index.is_indefinite(3))
+        self.assertEqual(bytes(index.contents(2)), b'Is 1+1=3?')
+        self.assertEqual(foo.decode('Question', index.encoded(0)),
+                         {'id': 1, 'question': 'Is 1+1=3?'})
+        self.assertEqual(bytes(index.encoded(3)), encoded[16:])
+
+        # Bad data.
+        datas = [
+            (b'\x30\x05\x02\x01', ': out of data at offset 0'),
+            (b'\x30\x80\x02\x01\x01', ': out of data at offset 5'),
+            (b'\x1f', ': out of data at offset 1'),
+            (b'\x04\x05ab', ': out of data at offset 0'),
+            (b'\x02\x01\x01\x04\x05ab', ': out of data at offset 3'),
+            (b'\x30\x80\x04\x05ab', ': out of data at offset 2'),
+            (b'\x30\x02\x02\x02\x01\x01', ': out of data at offset 2'),
+            (b'\x30\x03\x30\x80\x00\x00',
+             ': contents of TLV at offset 0 end at offset 5, but its last '
+             'enclosed TLV ends at offset 6'),
+            (b'\x04\x80',
+             ': expected definite length of primitive TLV at offset 0')
+        ]
+
+        for data, message in datas:
+            with self.assertRaises(asn1tools.DecodeError) as cm:
+                foo.tlv_index(data)
+
+            self.assertEqual(str(cm.exception), message)
+
 
 if __name__ == '__main__':
     unittest.main()
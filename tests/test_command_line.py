@@ -28,7 +28,7 @@ class Asn1ToolsCommandLineTest(unittest.TestCase):
             sys.stdout = stdout
 
         expected_output = [
-            "usage: asn1tools [-h] [-d] [-v {0,1,2}] [--version] {decode} ...",
+            "usage: asn1tools [-h] [-d] [-v {0,1,2}] [--version] {compile,decode} ...",
             "",
             "Various ASN.1 utilities.",
             "",
@@ -45,7 +45,7 @@ class Asn1ToolsCommandLineTest(unittest.TestCase):
             "  --version             Print version information and exit.",
             "",
             "subcommands:",
-            "  {decode}"
+            "  {compile,decode}"
         ]
 
         for line in expected_output:
@@ -85,6 +85,28 @@ class Asn1ToolsCommandLineTest(unittest.TestCase):
         for line in expected_output:
             self.assertIn(line, actual_output)
 
+    def test_command_line_compile_profile_foo(self):
+        argv = ['asn1tools',
+                'compile',
+                '--profile',
+                'tests/files/foo.asn']
+
+        stdout = sys.stdout
+        sys.argv = argv
+        sys.stdout = StringIO()
+
+        try:
+            asn1tools._main()
+        finally:
+            actual_output = sys.stdout.getvalue()
+            sys.stdout = stdout
+
+        self.assertIn('PHASE                           SECONDS', actual_output)
+        self.assertIn('parse', actual_output)
+        self.assertIn('compile', actual_output)
+        self.assertIn('Compiled types:          2', actual_output)
+        self.assertIn('Duplicate compilations:  0', actual_output)
+
     def test_command_line_decode_ber_foo_question(self):
         argv = ['asn1tools',
                 'decode',
@@ -1,6 +1,10 @@
+import os
 import sys
+import shutil
+import tempfile
 import unittest
 import asn1tools
+from asn1tools import cache
 from copy import deepcopy
 
 sys.path.append('tests/files')
@@ -82,6 +86,204 @@ class Asn1ToolsCompileTest(unittest.TestCase):
         self.assertEqual(str(cm.exception),
                          "Module 'A' cannot import value 'b' from missing module 'C'.")
 
+    def test_transitive_import(self):
+        foo = asn1tools.compile_string(
+            'A DEFINITIONS ::= BEGIN IMPORTS B, c FROM C; '
+            'D ::= SEQUENCE { a B, b INTEGER (0..c) } END '
+            'C DEFINITIONS ::= BEGIN IMPORTS B, c FROM E; END '
+            'E DEFINITIONS ::= BEGIN B ::= INTEGER c INTEGER ::= 7 END',
+            'uper')
+        self.assertEqual(foo.encode('D', {'a': 1, 'b': 5}), b'\x01\x01\xa0')
+
+        # Import cycle.
+        with self.assertRaises(asn1tools.CompileError) as cm:
+            asn1tools.compile_string(
+                'A DEFINITIONS ::= BEGIN IMPORTS B FROM C; D ::= B END '
+                'C DEFINITIONS ::= BEGIN IMPORTS B FROM A; END')
+
+        self.assertEqual(str(cm.exception),
+                         "Type 'B' imported by module 'A' not found in module 'C'.")
+
+    def test_cache_dir(self):
+        cache_dir = tempfile.mkdtemp()
+
+        try:
+            filename = os.path.join(cache_dir, 'foo.asn')
+            shutil.copy('tests/files/foo.asn', filename)
+
+            # Compile twice, the second time from the cache.
+            for _ in range(2):
+                foo = asn1tools.compile_files(filename, cache_dir=cache_dir)
+                encoded = foo.encode('Question',
+                                     {'id': 1, 'question': 'Is 1+1=3?'})
+                self.assertEqual(encoded,
+                                 b'0\x0e\x02\x01\x01\x16\x09Is 1+1=3?')
+                entries = sorted([name
+                                  for name in os.listdir(cache_dir)
+                                  if name.endswith('.pickle')])
+                self.assertEqual(len(entries), 2)
+                self.assertTrue(entries[0].startswith('compile-'))
+                self.assertTrue(entries[1].startswith('parse-'))
+
+            self.assertEqual(asn1tools.parse_files(filename, cache_dir),
+                             asn1tools.parse_files(filename))
+
+            # Each parser backend has its own entries.
+            asn1tools.parse_files(filename, cache_dir, backend='fast')
+            parse_entries = [name
+                             for name in os.listdir(cache_dir)
+                             if name.startswith('parse-')]
+            self.assertEqual(len(parse_entries), 2)
+
+            # A modified file is parsed and compiled again.
+            with open(filename, 'a') as fout:
+                fout.write('Bar DEFINITIONS ::= BEGIN A ::= INTEGER END\n')
+
+            foo = asn1tools.compile_files(filename, cache_dir=cache_dir)
+            self.assertEqual(sorted(foo.modules), ['Bar', 'Foo'])
+
+            # A corrupt entry is removed.
+            path = os.path.join(cache_dir, entries[0])
+
+            with open(path, 'wb') as fout:
+                fout.write(b'corrupt')
+
+            self.assertIsNone(cache.load(cache_dir, entries[0][:-7]))
+            self.assertFalse(os.path.exists(path))
+
+            # Evict entries until at most one byte is used, that is, all
+            # of them.
+            cache.evict(cache_dir, 1)
+            entries = [name
+                       for name in os.listdir(cache_dir)
+                       if name.endswith('.pickle')]
+            self.assertEqual(len(entries), 0)
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_lazy(self):
+        decoded = {'id': 1, 'question': 'Is 1+1=3?'}
+
+        for codec in ['ber', 'der', 'jer', 'per', 'uper', 'xer']:
+            foo = asn1tools.compile_files('tests/files/foo.asn', codec)
+            lazy_foo = asn1tools.compile_files('tests/files/foo.asn',
+                                               codec,
+                                               lazy=True)
+            self.assertEqual(sorted(lazy_foo.types), sorted(foo.types))
+            self.assertEqual(sorted(lazy_foo.modules['Foo']),
+                             sorted(foo.modules['Foo']))
+            self.assertIn('Question', lazy_foo.types)
+            self.assertNotIn('Missing', lazy_foo.types)
+            encoded = foo.encode('Question', decoded)
+            self.assertEqual(lazy_foo.encode('Question', decoded), encoded)
+            self.assertEqual(lazy_foo.decode('Question', encoded), decoded)
+            self.assertIs(lazy_foo.types['Question'],
+                          lazy_foo.modules['Foo']['Question'])
+
+        # Types are compiled when first used, so an error in an unused
+        # type is not raised.
+        foo = asn1tools.compile_string(
+            'A DEFINITIONS ::= BEGIN A ::= B C ::= INTEGER END',
+            lazy=True)
+        self.assertEqual(foo.encode('C', 1), b'\x02\x01\x01')
+
+        with self.assertRaises(asn1tools.CompileError) as cm:
+            foo.encode('A', 1)
+
+        self.assertEqual(str(cm.exception), "Type 'B' not found in module 'A'.")
+
+    def test_shared_types(self):
+        foo = asn1tools.compile_string(
+            'A DEFINITIONS IMPLICIT TAGS ::= BEGIN '
+            'B ::= SEQUENCE { a INTEGER, b BOOLEAN } '
+            'C ::= SEQUENCE { x [0] B, y [1] B OPTIONAL, z B } '
+            'END')
+
+        # Each reference has its own name, tag and optional flag, but
+        # the members of the referenced type are shared.
+        x, y, z = foo.types['C']._type.members
+        self.assertEqual([x.name, y.name, z.name], ['x', 'y', 'z'])
+        self.assertEqual([x.tag, y.tag, z.tag], [b'\xa0', b'\xa1', b'\x30'])
+        self.assertEqual([x.optional, y.optional, z.optional],
+                         [False, True, False])
+        self.assertIs(x.members, y.members)
+        self.assertIs(x.members, z.members)
+
+        # The top-level type shares its members with the references.
+        self.assertIs(foo.types['B']._type.members, x.members)
+
+        decoded = {
+            'x': {'a': 1, 'b': True},
+            'z': {'a': 3, 'b': True}
+        }
+        encoded = (b'\x30\x10\xa0\x06\x02\x01\x01\x01\x01\xff\x30\x06\x02\x01'
+                   b'\x03\x01\x01\xff')
+        self.assertEqual(foo.encode('C', decoded), encoded)
+        self.assertEqual(foo.decode('C', encoded), decoded)
+
+    def test_profile(self):
+        foo = asn1tools.compile_files('tests/files/foo.asn', profile=True)
+        profile = foo.profile
+        self.assertEqual([name for name, _ in profile.phases],
+                         [
+                             'strip comments',
+                             'parse',
+                             'pre-process: COMPONENTS OF',
+                             'compile'
+                         ])
+        self.assertEqual(profile.number_of_compiled_types, 2)
+        self.assertEqual(profile.number_of_duplicate_compilations, 0)
+        self.assertGreater(profile.memory, 0)
+        self.assertIn('Compiled types:          2', str(profile))
+        self.assertEqual(foo.encode('Question', {'id': 1, 'question': 'Is 1+1=3?'}),
+                         b'0\x0e\x02\x01\x01\x16\x09Is 1+1=3?')
+        self.assertIsNone(asn1tools.compile_files('tests/files/foo.asn').profile)
+
+    def test_save_load(self):
+        tmp_dir = tempfile.mkdtemp()
+
+        try:
+            path = os.path.join(tmp_dir, 'foo.spec')
+            decoded = {'id': 1, 'question': 'Is 1+1=3?'}
+
+            for codec in ['ber', 'der', 'jer', 'per', 'uper', 'xer']:
+                foo = asn1tools.compile_files('tests/files/foo.asn', codec)
+                foo.save(path)
+                loaded = asn1tools.load(path)
+                self.assertEqual(sorted(loaded.modules), ['Foo'])
+                encoded = foo.encode('Question', decoded)
+                self.assertEqual(loaded.encode('Question', decoded), encoded)
+                self.assertEqual(loaded.decode('Question', encoded), decoded)
+
+            # Not a saved specification.
+            with self.assertRaises(asn1tools.CompileError) as cm:
+                asn1tools.load('tests/files/foo.asn')
+
+            self.assertEqual(str(cm.exception),
+                             "'tests/files/foo.asn' is not a saved "
+                             "specification.")
+
+            # Saved by another version of asn1tools.
+            with open(path, 'rb') as fin:
+                data = fin.read()
+
+            header, data = data.split(b'\n', 1)
+            header = header.replace(asn1tools.__version__.encode('ascii'),
+                                    b'0.0.0')
+
+            with open(path, 'wb') as fout:
+                fout.write(header + b'\n' + data)
+
+            with self.assertRaises(asn1tools.CompileError) as cm:
+                asn1tools.load(path)
+
+            self.assertEqual(str(cm.exception),
+                             "'{}' was saved by asn1tools 0.0.0, not {}.".format(
+                                 path,
+                                 asn1tools.__version__))
+        finally:
+            shutil.rmtree(tmp_dir)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,3 +1,6 @@
+import sys
+import mmap
+import tempfile
 import unittest
 import asn1tools
 
@@ -60,7 +63,7 @@ class Asn1ToolsDerTest(unittest.TestCase):
             all_types.encode('Sequence12', {'a': [{'a': []}]})
 
         with self.assertRaises(NotImplementedError):
-            all_types.decode('Sequence12', b'\x30\x04\xa0\x02\x30\x00')
+            all_types.decode('Sequence12', b'\x30\x04\x30\x02\x30\x00')
 
     def test_repr_all_types(self):
         all_types = asn1tools.compile_files('tests/files/all_types.asn',
@@ -140,6 +143,159 @@ class Asn1ToolsDerTest(unittest.TestCase):
 
             self.assertEqual(str(cm.exception), ': Not enough data.')
 
+    def test_nested_long_lengths(self):
+        foo = asn1tools.compile_string(
+            'Foo DEFINITIONS ::= BEGIN '
+            'A ::= SEQUENCE { a SEQUENCE { b OCTET STRING, '
+            'c SEQUENCE OF OCTET STRING } } '
+            'END',
+            'der')
+        decoded = {'a': {'b': 200 * b'\x01', 'c': 2 * [150 * b'\x02']}}
+        encoded = foo.encode('A', decoded)
+        self.assertEqual(type(encoded), bytearray)
+        self.assertEqual(
+            encoded,
+            b'\x30\x82\x02\x05\x30\x82\x02\x01\x04\x81\xc8' + 200 * b'\x01'
+            + b'\x30\x82\x01\x32' + 2 * (b'\x04\x81\x96' + 150 * b'\x02'))
+        self.assertEqual(foo.decode('A', encoded), decoded)
+
+    def test_zero_copy(self):
+        foo = asn1tools.compile_string(
+            'Foo DEFINITIONS ::= BEGIN '
+            'A ::= SEQUENCE { a OCTET STRING, b BIT STRING, c ANY, d IA5String } '
+            'END',
+            'der')
+        decoded_message = {
+            'a': b'\x01\x02\x03',
+            'b': (b'\x80', 1),
+            'c': b'\x02\x01\x05',
+            'd': 'hi'
+        }
+        encoded_message = foo.encode('A', decoded_message)
+
+        with tempfile.TemporaryFile() as fout:
+            fout.write(encoded_message)
+            fout.flush()
+            mapped = mmap.mmap(fout.fileno(), 0, access=mmap.ACCESS_READ)
+
+            for data in [bytes(encoded_message),
+                         bytearray(encoded_message),
+                         memoryview(encoded_message),
+                         mapped]:
+                decoded = foo.decode('A', data, zero_copy=True)
+                self.assertEqual(decoded, decoded_message)
+
+                if sys.version_info[0] > 2:
+                    self.assertIsInstance(decoded['a'], memoryview)
+                    self.assertIsInstance(decoded['b'][0], memoryview)
+                    self.assertIsInstance(decoded['c'], memoryview)
+                    self.assertEqual(decoded['a'].tobytes(), b'\x01\x02\x03')
+
+                del decoded
+
+            mapped.close()
+
+        # The decoded values are copies by default.
+        decoded = foo.decode('A', encoded_message)
+        self.assertIsInstance(decoded['a'], bytearray)
+
+    def test_tlv_index(self):
+        foo = asn1tools.compile_files('tests/files/foo.asn', 'der')
+        index = foo.tlv_index(b'0\x0e\x02\x01\x01\x16\x09Is 1+1=3?')
+        self.assertEqual(list(index.tags), [0x30, 0x02, 0x16])
+        self.assertEqual(list(index.parents), [-1, 0, 0])
+
+        # Indefinite length is not allowed.
+        with self.assertRaises(asn1tools.DecodeError) as cm:
+            foo.tlv_index(b'\x30\x80\x02\x01\x01\x00\x00')
+
+        self.assertEqual(str(cm.exception),
+                         ': expected definite length of TLV at offset 0')
+
+    def test_decode_indefinite_length(self):
+        foo = asn1tools.compile_files('tests/files/foo.asn', 'der')
+        all_types = asn1tools.compile_files('tests/files/all_types.asn',
+                                            'der')
+        datas = [
+            (foo, 'Question', b'\x30\x80\x02\x01\x01\x00\x00', None),
+            (foo, 'Question', b'\x30\x80\x02\x01\x01\x00\x00', ['id']),
+            (all_types, 'Set2', b'\x31\x80\x00\x00', None)
+        ]
+
+        for specification, type_name, encoded, paths in datas:
+            with self.assertRaises(asn1tools.DecodeError) as cm:
+                specification.decode(type_name, encoded, paths=paths)
+
+            self.assertEqual(str(cm.exception),
+                             ': expected definite length at offset 1')
+
+    def test_decode_lazy(self):
+        foo = asn1tools.compile_string(
+            'Foo DEFINITIONS ::= BEGIN '
+            'A ::= SEQUENCE { a INTEGER, b ANY DEFINED BY a OPTIONAL, '
+            'c BOOLEAN } '
+            'B ::= SET { a [0] INTEGER } '
+            'END',
+            'der',
+            any_defined_by_choices={('Foo', 'A', 'b'): {0: 'NULL'}})
+        encoded = b'\x30\x06\x02\x01\x00\x01\x01\xff'
+        self.assertEqual(foo.decode('A', encoded), {'a': 0, 'c': True})
+        self.assertEqual(foo.decode('A', encoded, lazy=True),
+                         {'a': 0, 'c': True})
+
+        # Indefinite length is not allowed.
+        datas = [
+            ('A', b'\x30\x80\x02\x01\x00\x01\x01\xff\x00\x00'),
+            ('B', b'\x31\x80\x80\x01\x01\x00\x00')
+        ]
+
+        for type_name, encoded in datas:
+            with self.assertRaises(asn1tools.DecodeError) as cm:
+                foo.decode(type_name, encoded, lazy=True)
+
+            self.assertEqual(str(cm.exception),
+                             ': expected definite length at offset 1')
+
+    def test_stream_decoder_optional_tail(self):
+        foo = asn1tools.compile_string(
+            'Foo DEFINITIONS ::= BEGIN '
+            'R ::= SEQUENCE { a INTEGER, b SEQUENCE { c INTEGER } OPTIONAL } '
+            'END',
+            'der')
+        decoder = foo.stream_decoder('R')
+        decoder.feed(b'\x30\x03\x02\x01\x01\x30\x08\x02\x01\x02')
+        decoder.feed(b'\x30\x03\x02\x01\x03\x30\x03\x02\x01\x04')
+        self.assertEqual(list(decoder),
+                         [{'a': 1}, {'a': 2, 'b': {'c': 3}}, {'a': 4}])
+
+    def test_decode_many_optional_tail(self):
+        rfc5280 = asn1tools.compile_files('tests/files/ietf/rfc5280.asn',
+                                          'der')
+        decoded = {'algorithm': '1.2.840.113549.1.1.11'}
+        encoded = 2 * rfc5280.encode('AlgorithmIdentifier', decoded)
+        self.assertEqual(list(rfc5280.decode_many('AlgorithmIdentifier',
+                                                  encoded)),
+                         2 * [decoded])
+
+    def test_decode_many_indefinite_length(self):
+        foo = asn1tools.compile_files('tests/files/foo.asn', 'der')
+        encoded = b'\x30\x80\x02\x01\x01\x16\x00\x00\x00'
+
+        with self.assertRaises(asn1tools.DecodeError) as cm:
+            list(foo.decode_many('Question', encoded))
+
+        self.assertEqual(str(cm.exception),
+                         ': expected definite length at offset 1')
+
+        decoder = foo.stream_decoder('Question')
+        decoder.feed(encoded)
+
+        with self.assertRaises(asn1tools.DecodeError) as cm:
+            next(decoder)
+
+        self.assertEqual(str(cm.exception),
+                         ': expected definite length at offset 1')
+
 
 if __name__ == '__main__':
     unittest.main()
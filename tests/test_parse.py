@@ -1,8 +1,13 @@
+import os
 import sys
+import shutil
+import tempfile
 import unittest
+import subprocess
 import importlib
 
 import asn1tools
+from asn1tools import parser
 
 sys.path.append('tests/files')
 sys.path.append('tests/files/ietf')
@@ -13,9 +18,9 @@ class Asn1ToolsParseTest(unittest.TestCase):
 
     maxDiff = None
 
-    def parse_and_verify(self, module, path='.'):
+    def parse_and_verify(self, module, path='.', backend='pyparsing'):
         asn_path = 'tests/files/' + path + '/' + module + '.asn'
-        actual = asn1tools.parse_files(asn_path)
+        actual = asn1tools.parse_files(asn_path, backend=backend)
 
         # from pprint import pformat
         #
@@ -121,6 +126,186 @@ class Asn1ToolsParseTest(unittest.TestCase):
     def test_parse_rfc5280(self):
         self.parse_and_verify('rfc5280', 'ietf')
 
+    def test_parse_fast_backend(self):
+        modules = [
+            ('foo', '.'),
+            ('bar', '.'),
+            ('all_types', '.'),
+            ('extensibility_implied', '.'),
+            ('all_types_automatic_tags', '.'),
+            ('information_object', '.'),
+            ('x680', '.'),
+            ('x691_a1', '.'),
+            ('x691_a4', '.'),
+            ('zforce', '.'),
+            ('rrc_8_6_0', '3gpp'),
+            ('rrc_14_4_0', '3gpp'),
+            ('s1ap_14_4_0', '3gpp'),
+            ('lpp_14_3_0', '3gpp'),
+            ('rfc1155', 'ietf'),
+            ('rfc1157', 'ietf'),
+            ('rfc2986', 'ietf'),
+            ('rfc3161', 'ietf'),
+            ('rfc3279', 'ietf'),
+            ('rfc3281', 'ietf'),
+            ('rfc3447', 'ietf'),
+            ('rfc3852', 'ietf'),
+            ('rfc4210', 'ietf'),
+            ('rfc4211', 'ietf'),
+            ('rfc4511', 'ietf'),
+            ('rfc5084', 'ietf'),
+            ('rfc5280', 'ietf')
+        ]
+
+        for module, path in modules:
+            self.parse_and_verify(module, path, 'fast')
+
+    def test_parse_fast_backend_errors(self):
+        # The fast parser gives the same error messages as pyparsing.
+        specifications = [
+            '',
+            'A DEFINITIONS ::= END',
+            'A {} DEFINITIONS ::= BEGIN END',
+            'A DEFINITIONS ::= BEGIN B ::= SEQUENCE { a } END',
+            'A DEFINITIONS ::= BEGIN B ::= INTEGER (SIZE 1) END',
+            'A DEFINITIONS ::= BEGIN B ::= SEQUENCE { a [] INTEGER } END'
+        ]
+
+        for specification in specifications:
+            with self.assertRaises(asn1tools.ParseError) as cm:
+                asn1tools.parse_string(specification)
+
+            with self.assertRaises(asn1tools.ParseError) as cm_fast:
+                asn1tools.parse_string(specification, backend='fast')
+
+            self.assertEqual(str(cm_fast.exception), str(cm.exception))
+
+    def test_parse_unsupported_backend(self):
+        with self.assertRaises(asn1tools.ParseError) as cm:
+            asn1tools.parse_string('', backend='bad_backend')
+
+        self.assertEqual(str(cm.exception), "unsupported backend 'bad_backend'")
+
+    def test_parse_files_modified(self):
+        tmp_dir = tempfile.mkdtemp()
+        parsed = []
+        parse_file = parser._parse_file
+
+        def counting_parse_file(args):
+            parsed.append(args[0])
+
+            return parse_file(args)
+
+        parser._parse_file = counting_parse_file
+
+        try:
+            foo = os.path.join(tmp_dir, 'foo.asn')
+            bar = os.path.join(tmp_dir, 'bar.asn')
+            shutil.copy('tests/files/foo.asn', foo)
+            shutil.copy('tests/files/bar.asn', bar)
+            actual = asn1tools.parse_files([foo, bar])
+            self.assertEqual(sorted(actual), ['Bar', 'Foo'])
+            self.assertEqual(parsed, [foo, bar])
+
+            # Only the modified file is parsed again.
+            with open(bar, 'a') as fout:
+                fout.write('Fie DEFINITIONS ::= BEGIN A ::= INTEGER END\n')
+
+            actual = asn1tools.parse_files([foo, bar])
+            self.assertEqual(sorted(actual), ['Bar', 'Fie', 'Foo'])
+            self.assertEqual(parsed, [foo, bar, bar])
+
+            # A file with a new modification time but unmodified
+            # contents is not parsed again.
+            stat = os.stat(foo)
+            os.utime(foo, (stat.st_atime, stat.st_mtime + 10))
+            actual = asn1tools.parse_files([foo, bar])
+            self.assertEqual(sorted(actual), ['Bar', 'Fie', 'Foo'])
+            self.assertEqual(parsed, [foo, bar, bar])
+
+            # A recently modified file with modified contents, but the
+            # same modification time and size, is parsed again.
+            stat = os.stat(bar)
+
+            with open(bar, 'r') as fin:
+                contents = fin.read()
+
+            with open(bar, 'w') as fout:
+                fout.write(contents.replace('Fie', 'Fum'))
+
+            os.utime(bar, (stat.st_atime, stat.st_mtime))
+            actual = asn1tools.parse_files([foo, bar])
+            self.assertEqual(sorted(actual), ['Bar', 'Foo', 'Fum'])
+            self.assertEqual(parsed, [foo, bar, bar, bar])
+
+            # All files are parsed again once cleared.
+            parser.clear_parsed_files()
+            asn1tools.parse_files([foo, bar])
+            self.assertEqual(parsed, [foo, bar, bar, bar, foo, bar])
+
+            # The returned dictionary is a copy.
+            actual['Foo']['types'].clear()
+            self.assertEqual(asn1tools.parse_files(foo),
+                             asn1tools.parse_files('tests/files/foo.asn'))
+        finally:
+            parser._parse_file = parse_file
+            shutil.rmtree(tmp_dir)
+
+    def test_parse_files_fast_backend_cache(self):
+        # pyparsing is not imported when parsing with the fast backend,
+        # also when using a cache directory.
+        cache_dir = tempfile.mkdtemp()
+        code = (
+            'import sys\n'
+            'import asn1tools\n'
+            'asn1tools.parse_files("tests/files/foo.asn",\n'
+            '                      sys.argv[1],\n'
+            '                      backend="fast")\n'
+            'sys.exit("pyparsing" in sys.modules)\n'
+        )
+
+        try:
+            self.assertEqual(
+                subprocess.call([sys.executable, '-c', code, cache_dir]),
+                0)
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_parse_files_jobs(self):
+        filenames = [
+            'tests/files/3gpp/lpp_14_3_0.asn',
+            'tests/files/3gpp/s1ap_14_4_0.asn',
+            'tests/files/foo.asn',
+            'tests/files/bar.asn'
+        ]
+        expected = asn1tools.parse_files(filenames, backend='fast')
+
+        parser.clear_parsed_files()
+        actual = asn1tools.parse_files(filenames, backend='fast', jobs=2)
+        self.assertEqual(actual, expected)
+        self.assertEqual(list(actual), list(expected))
+
+        # Errors in worker processes are raised.
+        tmp_dir = tempfile.mkdtemp()
+
+        try:
+            filenames = [
+                os.path.join(tmp_dir, 'foo.asn'),
+                os.path.join(tmp_dir, 'x691_a3.asn')
+            ]
+            shutil.copy('tests/files/foo.asn', filenames[0])
+            shutil.copy('tests/files/x691_a3.asn', filenames[1])
+
+            with self.assertRaises(asn1tools.ParseError) as cm:
+                asn1tools.parse_files(filenames, jobs=2)
+
+            self.assertEqual(
+                str(cm.exception),
+                "Invalid ASN.1 syntax at line 10, column 22: 'SEQUENCE >!<"
+                "(SIZE(2, ...)) OF ChildInformation OPTIONAL,': Expected \"{\".")
+        finally:
+            shutil.rmtree(tmp_dir)
+
     def test_parse_imports_global_module_reference(self):
         actual = asn1tools.parse_string('A DEFINITIONS ::= BEGIN '
                                         'IMPORTS '
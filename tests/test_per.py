@@ -629,6 +629,23 @@ class Asn1ToolsPerTest(unittest.TestCase):
             encoded = information_object.encode('ErrorReturn', decoded_message)
             self.assertEqual(encoded, encoded_message)
 
+    def test_optional_members(self):
+        foo = asn1tools.compile_string(
+            'A DEFINITIONS ::= BEGIN '
+            'S ::= SEQUENCE { a BOOLEAN OPTIONAL, b BOOLEAN OPTIONAL, '
+            'c BOOLEAN OPTIONAL, d BOOLEAN OPTIONAL, e BOOLEAN OPTIONAL, '
+            'f BOOLEAN OPTIONAL, g BOOLEAN OPTIONAL, h BOOLEAN OPTIONAL, '
+            'i BOOLEAN OPTIONAL, j BOOLEAN } '
+            'END',
+            'per')
+
+        # The presence bits of the nine optional members are followed
+        # by the four present members.
+        decoded = {'a': True, 'e': False, 'i': True, 'j': True}
+        encoded = b'\x88\xd8'
+        self.assertEqual(foo.encode('S', decoded), encoded)
+        self.assertEqual(foo.decode('S', encoded), decoded)
+
 
 if __name__ == '__main__':
     unittest.main()
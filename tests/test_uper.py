@@ -54,6 +54,39 @@ class Asn1ToolsUPerTest(unittest.TestCase):
         self.assertEqual(str(cm.exception),
                          ': Decode length not supported for this codec.')
 
+    def test_unsupported_options(self):
+        foo = asn1tools.compile_files('tests/files/foo.asn', 'uper')
+
+        with self.assertRaises(asn1tools.DecodeError) as cm:
+            foo.decode('Question', b'', paths=['id'])
+
+        self.assertEqual(str(cm.exception),
+                         ': Decoding paths not supported for this codec.')
+
+        with self.assertRaises(asn1tools.DecodeError) as cm:
+            foo.decode('Question', b'', lazy=True)
+
+        self.assertEqual(str(cm.exception),
+                         ': Lazy decoding not supported for this codec.')
+
+        with self.assertRaises(asn1tools.DecodeError) as cm:
+            foo.stream_decoder('Question')
+
+        self.assertEqual(str(cm.exception),
+                         ': Stream decoding not supported for this codec.')
+
+        with self.assertRaises(asn1tools.EncodeError) as cm:
+            foo.encode_stream('Question', [], None)
+
+        self.assertEqual(str(cm.exception),
+                         'Stream encoding not supported for this codec.')
+
+        with self.assertRaises(asn1tools.DecodeError) as cm:
+            foo.tlv_index(b'')
+
+        self.assertEqual(str(cm.exception),
+                         ': TLV index not supported for this codec.')
+
     def test_x691_a1(self):
         a1 = asn1tools.compile_files('tests/files/x691_a1.asn', 'uper')
 
@@ -806,6 +839,185 @@ class Asn1ToolsUPerTest(unittest.TestCase):
             self.assertEqual(all_types.encode(type_name, decoded), encoded)
             self.assertEqual(all_types.decode(type_name, encoded), decoded)
 
+    def test_unaligned_bits(self):
+        foo = asn1tools.compile_string(
+            'A DEFINITIONS ::= BEGIN '
+            'S ::= SEQUENCE { a BOOLEAN, b BIT STRING, '
+            'c OCTET STRING (SIZE(3)), d INTEGER (0..1000), '
+            'e OCTET STRING (SIZE(1000)) } '
+            'END',
+            'uper')
+
+        decoded = {
+            'a': True,
+            'b': (b'\xab\xc0', 10),
+            'c': b'xyz',
+            'd': 999,
+            'e': 500 * b'\x5a\xa5'
+        }
+        encoded = foo.encode('S', decoded)
+        self.assertEqual(encoded[:8], b'\x85\x55\xe0\x3c\x3c\xbd\x7c\xeb')
+        self.assertEqual(len(encoded), 1008)
+        self.assertEqual(foo.decode('S', encoded), decoded)
+
+    def test_known_multiplier_strings(self):
+        # The parser does not output sizes and permitted alphabets of
+        # strings, so the specification is a dictionary.
+        foo = asn1tools.compile_dict(
+            {
+                'A': {
+                    'imports': {},
+                    'types': {
+                        'S': {
+                            'type': 'SEQUENCE',
+                            'members': [
+                                {
+                                    'name': 'a',
+                                    'type': 'PrintableString',
+                                    'size': [(2, 200)]
+                                },
+                                {
+                                    'name': 'b',
+                                    'type': 'IA5String'
+                                },
+                                {
+                                    'name': 'c',
+                                    'type': 'VisibleString',
+                                    'permitted-alphabet': ['ACGT']
+                                }
+                            ]
+                        }
+                    },
+                    'values': {},
+                    'object-classes': {},
+                    'object-sets': {},
+                    'extensibility-implied': False
+                }
+            },
+            'uper')
+
+        decoded = {
+            'a': 'Hello World? ' * 15,
+            'b': 'abc',
+            'c': 'ACGT' * 37 + 'AC'
+        }
+        encoded = foo.encode('S', decoded)
+        self.assertEqual(encoded[:4], b'\xc1\x91\x97\x66')
+        self.assertEqual(len(encoded), 233)
+        self.assertEqual(foo.decode('S', encoded), decoded)
+
+        # Character not in the permitted alphabet.
+        decoded['c'] = 'ACGX' * 37 + 'AC'
+
+        with self.assertRaises(asn1tools.EncodeError) as cm:
+            foo.encode('S', decoded)
+
+        self.assertEqual(str(cm.exception),
+                         "expected characters in the permitted alphabet, "
+                         "but got '{}'".format(decoded['c']))
+
+        # Known encodings of constrained strings.
+        foo = asn1tools.compile_dict(
+            {
+                'A': {
+                    'imports': {},
+                    'types': {
+                        'V': {
+                            'type': 'VisibleString',
+                            'size': [(2, 5)]
+                        },
+                        'P': {
+                            'type': 'PrintableString'
+                        },
+                        'I': {
+                            'type': 'IA5String',
+                            'size': [(1, 4)],
+                            'permitted-alphabet': ['ABC']
+                        }
+                    },
+                    'values': {},
+                    'object-classes': {},
+                    'object-sets': {},
+                    'extensibility-implied': False
+                }
+            },
+            'uper')
+
+        datas = [
+            ('V',  'abc', b'\x70\xe2\xc6'),
+            ('P',  'foo', b'\x03\xcd\xbf\x78'),
+            ('I', 'ABCA', b'\xc6\x00')
+        ]
+
+        for type_name, decoded, encoded in datas:
+            self.assertEqual(foo.encode(type_name, decoded), encoded)
+            self.assertEqual(foo.decode(type_name, encoded), decoded)
+
+    def test_fixed_layout_sequence(self):
+        foo = asn1tools.compile_string(
+            'A DEFINITIONS ::= BEGIN '
+            'S ::= SEQUENCE { a INTEGER (0..255), b BOOLEAN, '
+            'c ENUMERATED { x, y, z }, d INTEGER (-10..10), e T, '
+            'f BIT STRING (SIZE (12)), g NULL } '
+            'T ::= SEQUENCE { a INTEGER (0..65535), b BOOLEAN, c BOOLEAN, ... } '
+            'U ::= SEQUENCE { a INTEGER (0..255), b BOOLEAN OPTIONAL } '
+            'V ::= SEQUENCE { a ENUMERATED { x, y, ... }, b BOOLEAN } '
+            'E ::= ENUMERATED { x, y, ... } '
+            'END',
+            'uper')
+
+        # Sequences of fixed size members only are packed into one
+        # integer.
+        self.assertIsNotNone(foo.types['S']._type.layout)
+        self.assertEqual(foo.types['S']._type.fixed_number_of_bits, 47)
+        self.assertIsNone(foo.types['U']._type.layout)
+
+        decoded = {
+            'a': 200,
+            'b': True,
+            'c': 'z',
+            'd': -3,
+            'e': {'a': 1000, 'b': False, 'c': True},
+            'f': (b'\xab\xc0', 12),
+            'g': None
+        }
+        encoded = b'\xc8\xc7\x01\xf4\x35\x78'
+        self.assertEqual(foo.encode('S', decoded), encoded)
+        self.assertEqual(foo.decode('S', encoded), decoded)
+
+        # Missing member.
+        del decoded['g']
+
+        with self.assertRaises(asn1tools.EncodeError) as cm:
+            foo.encode('S', decoded)
+
+        self.assertTrue(
+            str(cm.exception).startswith("Sequence member 'g' not found in "))
+
+        # Bad enumeration value.
+        decoded['g'] = None
+        decoded['c'] = 'w'
+
+        with self.assertRaises(asn1tools.EncodeError) as cm:
+            foo.encode('S', decoded)
+
+        self.assertEqual(str(cm.exception),
+                         "Enumeration value 'w' not found in "
+                         "['x', 'y', 'z'].")
+
+        # An extension enumeration value cannot be decoded.
+        self.assertIsNotNone(foo.types['V']._type.layout)
+        self.assertEqual(foo.encode('V', {'a': 'y', 'b': True}), b'\x60')
+        self.assertEqual(foo.decode('V', b'\x60'), {'a': 'y', 'b': True})
+
+        for type_name, encoded in [('V', b'\xe0'), ('E', b'\xc0')]:
+            with self.assertRaises(asn1tools.DecodeError) as cm:
+                foo.decode(type_name, encoded)
+
+            self.assertEqual(str(cm.exception),
+                             ': expected enumeration value in the extension '
+                             'root')
+
 
 if __name__ == '__main__':
     unittest.main()